@@ -0,0 +1,273 @@
+# benchmarks/bench_crawl.py
+"""Mesure de bout en bout de run.py contre un site synthétique local, sans accès réseau
+
+Le site (benchmarks/synthetic_site.py) est servi dans ce processus ; le crawler est
+lancé dans un sous-processus avec une configuration dérivée de config/settings.yaml
+(domaine local, délais de politesse nuls, sortie temporaire). Sont mesurés : pages/s,
+latence p50/p99 des requêtes (temps jusqu'aux en-têtes) et des téléchargements, secondes
+CPU par page (crawler et ses processus d'analyse et d'OCR), pic de mémoire résidente et
+octets écrits. Le résultat est enregistré en JSON ; --compare le confronte à un
+résultat précédent et signale les régressions.
+
+Usage : python benchmarks/bench_crawl.py --pages 2000 --latency-ms 20
+        python benchmarks/bench_crawl.py --set crawler.max_workers=20 --compare benchmarks/results/base.json
+"""
+import glob
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import click
+import yaml
+
+from synthetic_site import SyntheticSite, SiteServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mesure -> True si une valeur plus grande est meilleure
+RESULT_FIELDS = {
+    'pages_per_sec': True,
+    'request_p50_ms': False,
+    'request_p99_ms': False,
+    'download_p50_ms': False,
+    'download_p99_ms': False,
+    'cpu_sec_per_page': False,
+    'peak_rss_mb': False,
+    'bytes_written': None,
+}
+
+
+def set_option(config, assignment):
+    """Applique une surcharge « section.clé=valeur » (valeur lue en YAML)"""
+    key, _, value = assignment.partition('=')
+    node = config
+    parts = key.split('.')
+    for part in parts[:-1]:
+        if not isinstance(node.get(part), dict):
+            node[part] = {}
+        node = node[part]
+    node[parts[-1]] = yaml.safe_load(value)
+
+
+def bench_config(base_config, base_url, pages, work_dir, overrides):
+    with open(base_config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['domain'] = {'name': '127.0.0.1', 'start_url': f"{base_url}/"}
+    config['crawler'].update({'max_pages': pages, 'delay_min': 0, 'delay_max': 0, 'stats_interval': 5})
+    config['crawler']['max_per_host'] = max(config['crawler'].get('max_per_host') or 0, config['crawler']['max_workers'])
+    config['crawler']['max_queue_size'] = max(config['crawler']['max_queue_size'], pages * 2)
+    config.setdefault('transport', {})['user_agent'] = 'crawler-benchmark'
+    config['sitemaps'] = dict(config.get('sitemaps') or {}, enabled=False)
+    config['files']['log_dir'] = os.path.join(work_dir, 'logs')
+    config['metrics'] = dict(config.get('metrics') or {}, enabled=True, port=None,
+                             export=os.path.join(work_dir, 'metrics.json'))
+    for assignment in overrides:
+        set_option(config, assignment)
+    path = os.path.join(work_dir, 'config.yaml')
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return path
+
+
+def directory_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+def load_metrics(work_dir):
+    """Mesures exportées par le crawler, ou fusion de celles des workers d'un crawl distribué
+
+    Les quantiles fusionnés sont la moyenne de ceux des workers pondérée par leur nombre
+    de mesures : une approximation, les histogrammes n'étant pas exportés.
+    """
+    paths = sorted(glob.glob(os.path.join(work_dir, 'metrics.worker-*.json'))) or [os.path.join(work_dir, 'metrics.json')]
+    snapshots = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshots.append(json.load(f))
+    if len(snapshots) == 1:
+        return snapshots[0]
+    stages = {}
+    for snapshot in snapshots:
+        for stage, values in snapshot['stages'].items():
+            merged = stages.setdefault(stage, {'count': 0, 'sum': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0})
+            merged['count'] += values['count']
+            merged['sum'] += values['sum']
+            for quantile in ('p50', 'p95', 'p99'):
+                merged[quantile] += values[quantile] * values['count']
+    for merged in stages.values():
+        for quantile in ('p50', 'p95', 'p99'):
+            merged[quantile] = merged[quantile] / merged['count'] if merged['count'] else 0.0
+    return {
+        'uptime': max(snapshot['uptime'] for snapshot in snapshots),
+        'stages': stages,
+        'counters': [counter for snapshot in snapshots for counter in snapshot['counters']],
+        'gauges': [],
+    }
+
+
+def run_once(site_options, server_options, pages, engine, base_config, overrides, keep, workers=None):
+    site = SyntheticSite(**site_options)
+    server = SiteServer(site, **server_options).start()
+    work_dir = tempfile.mkdtemp(prefix='bench-crawl-')
+    try:
+        config_path = bench_config(base_config, server.base_url, pages, work_dir, overrides)
+        output_dir = os.path.join(work_dir, 'out')
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        command = [sys.executable, 'run.py', '--config', config_path, '--output', output_dir, '--engine', engine]
+        if workers:
+            command += ['--workers', str(workers)]
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall = time.perf_counter() - started
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if completed.returncode != 0:
+            raise click.ClickException(f"Le crawler a échoué ({completed.returncode}): {completed.stderr[-2000:]}")
+        metrics = load_metrics(work_dir)
+    finally:
+        server.stop()
+
+    page_count = sum(c['value'] for c in metrics['counters'] if c['name'] == 'pages')
+    stages = metrics['stages']
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    result = {
+        'pages': page_count,
+        'wall_sec': wall,
+        'crawl_sec': metrics['uptime'],
+        'pages_per_sec': page_count / metrics['uptime'] if metrics['uptime'] else 0.0,
+        'request_p50_ms': stages.get('request', {}).get('p50', 0) * 1000,
+        'request_p99_ms': stages.get('request', {}).get('p99', 0) * 1000,
+        'download_p50_ms': stages.get('download', {}).get('p50', 0) * 1000,
+        'download_p99_ms': stages.get('download', {}).get('p99', 0) * 1000,
+        'cpu_sec_per_page': cpu / page_count if page_count else 0.0,
+        # ru_maxrss : pic du plus gros processus enfant attendu, en Ko sous Linux
+        'peak_rss_mb': after.ru_maxrss / 1024,
+        'bytes_written': directory_size(output_dir),
+        'server': server.stats(),
+        'stages': stages,
+    }
+    if keep:
+        result['work_dir'] = work_dir
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous, threshold):
+    """Écarts relatifs avec le résultat précédent ; retourne le nombre de régressions"""
+    regressions = 0
+    for field, higher_is_better in RESULT_FIELDS.items():
+        old, new = previous['summary'].get(field), current['summary'].get(field)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        marker = ''
+        if higher_is_better is not None:
+            worse = change < -threshold if higher_is_better else change > threshold
+            if worse:
+                marker = '  RÉGRESSION'
+                regressions += 1
+        click.echo(f"  {field:<18} {old:12.3f} -> {new:12.3f}  ({change:+.1%}){marker}")
+    return regressions
+
+
+@click.command()
+@click.option('--pages', default=1000, help="Pages du site et limite crawler.max_pages")
+@click.option('--fanout', default=10, help="Liens sortants par page")
+@click.option('--pdf-ratio', default=0.05, help="Proportion de pages liant un PDF texte")
+@click.option('--scanned-ratio', default=0.0, help="Proportion de pages liant un PDF numérisé (OCR)")
+@click.option('--image-ratio', default=0.1, help="Proportion de pages liant une image")
+@click.option('--latency-ms', default=0.0, help="Latence ajoutée par le serveur à chaque réponse")
+@click.option('--jitter-ms', default=0.0, help="Variation aléatoire de la latence")
+@click.option('--rate-429', default=0.0, help="Proportion d'URLs recevant un 429 à la première requête")
+@click.option('--slow-ratio', default=0.0, help="Proportion de corps envoyés lentement")
+@click.option('--slow-ms', default=500.0, help="Durée d'envoi d'un corps lent")
+@click.option('--engine', '-e', type=click.Choice(['threads', 'async']), default='threads')
+@click.option('--workers', default=None, type=int,
+              help="Crawl distribué sur N processus (run.py --workers) ; partition par URL par défaut, répartie même sur un seul site")
+@click.option('--config', 'base_config', default=os.path.join(ROOT, 'config', 'settings.yaml'),
+              help="Configuration de base du crawler")
+@click.option('--set', 'overrides', multiple=True, help="Surcharge section.clé=valeur (répétable)")
+@click.option('--runs', default=1, help="Nombre d'exécutions ; la médiane de chaque mesure est retenue")
+@click.option('--label', default=None, help="Nom du résultat (défaut : révision git)")
+@click.option('--results-dir', default=os.path.join(ROOT, 'benchmarks', 'results'),
+              help="Dossier des résultats JSON")
+@click.option('--compare', 'compare_path', default=None, type=click.Path(exists=True, dir_okay=False),
+              help="Résultat JSON précédent à comparer")
+@click.option('--threshold', default=0.1, help="Écart relatif au-delà duquel une mesure est une régression")
+@click.option('--keep', is_flag=True, help="Conserver le dossier de travail (sortie, logs, configuration)")
+def main(pages, fanout, pdf_ratio, scanned_ratio, image_ratio, latency_ms, jitter_ms, rate_429, slow_ratio,
+         slow_ms, engine, workers, base_config, overrides, runs, label, results_dir, compare_path, threshold, keep):
+    site_options = {
+        'pages': pages, 'fanout': fanout, 'pdf_ratio': pdf_ratio,
+        'scanned_ratio': scanned_ratio, 'image_ratio': image_ratio,
+    }
+    server_options = {
+        'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'rate_429': rate_429,
+        'slow_ratio': slow_ratio, 'slow_ms': slow_ms,
+    }
+    results = []
+    for run in range(runs):
+        result = run_once(site_options, server_options, pages, engine, base_config, overrides, keep, workers)
+        results.append(result)
+        click.echo(
+            f"exécution {run + 1}/{runs}: {result['pages']} pages en {result['crawl_sec']:.1f}s - "
+            f"{result['pages_per_sec']:.1f} pages/s - requête p50 {result['request_p50_ms']:.1f} ms "
+            f"p99 {result['request_p99_ms']:.1f} ms - {result['cpu_sec_per_page'] * 1000:.1f} ms CPU/page - "
+            f"RSS max {result['peak_rss_mb']:.0f} Mo - {result['bytes_written'] / 1048576:.1f} Mo écrits"
+        )
+
+    revision = git_revision()
+    report = {
+        'label': label or revision or 'local',
+        'revision': revision,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': engine,
+        'workers': workers,
+        'site': site_options,
+        'server': server_options,
+        'overrides': list(overrides),
+        'summary': {field: statistics.median(r[field] for r in results) for field in RESULT_FIELDS},
+        'runs': results,
+    }
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['label']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    click.echo(f"Résultat enregistré dans {path}")
+
+    if compare_path:
+        with open(compare_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        click.echo(f"Comparaison avec {previous['label']} ({previous['timestamp']}):")
+        if compare(report, previous, threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_frontier.py
+"""Compare les backends de frontière : octets par URL et débit des recherches
+
+La mémoire est mesurée avec tracemalloc (allocations Python uniquement) ; le cache de
+pages SQLite est borné séparément par frontier.cache_size_kb.
+
+Usage : python benchmarks/bench_frontier.py --urls 1000000
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import click
+from src.frontier import Frontier
+from src.frontier_store import MemoryFrontierStore, SQLiteFrontierStore
+from src.processors import URLProcessor
+
+CONFIG = {
+    'domain': {'name': 'www.example.com'},
+    'files': {'max_length': 100, 'max_url_length': 2000},
+    'excluded': {'patterns': [], 'extensions': []},
+}
+
+
+def synthetic_urls(count, offset=0):
+    for i in range(offset, offset + count):
+        yield f"https://www.example.com/section-{i % 97}/article/{i}/page-{i * 7919 % 100003}.html"
+
+
+def run_backend(name, store_factory, count):
+    url_processor = URLProcessor(CONFIG)
+    tracemalloc.start()
+    start_mem = tracemalloc.get_traced_memory()[0]
+    store, disk_path = store_factory()
+    frontier = Frontier(url_processor, store=store)
+
+    start = time.perf_counter()
+    for url in synthetic_urls(count):
+        frontier.push(url)
+    # La moitié des URLs est traitée, l'autre reste en file
+    for _ in range(count // 2):
+        frontier.mark_completed(frontier.pop())
+    frontier.flush()
+    insert_time = time.perf_counter() - start
+
+    mem_bytes = tracemalloc.get_traced_memory()[0] - start_mem
+    tracemalloc.stop()
+
+    # Recherches : 50 % de liens déjà vus, 50 % de liens nouveaux
+    lookups = min(count, 200000)
+    keys = [url_processor.normalize_url(u) for u in synthetic_urls(lookups // 2)]
+    keys += [url_processor.normalize_url(u) for u in synthetic_urls(lookups // 2, offset=count)]
+    start = time.perf_counter()
+    hits = sum(1 for key in keys if store.is_discovered(key))
+    lookup_time = time.perf_counter() - start
+
+    disk_bytes = os.path.getsize(disk_path) if disk_path and os.path.exists(disk_path) else 0
+    if disk_path and os.path.exists(disk_path + '-wal'):
+        disk_bytes += os.path.getsize(disk_path + '-wal')
+    frontier.close()
+
+    click.echo(
+        f"{name:<16} mémoire: {mem_bytes / count:8.1f} o/URL  disque: {disk_bytes / count:8.1f} o/URL  "
+        f"insertion: {count / insert_time:10.0f} URLs/s  recherche: {lookups / lookup_time:10.0f} /s  "
+        f"(succès {hits}/{lookups})"
+    )
+
+
+@click.command()
+@click.option('--urls', default=200000, help="Nombre d'URLs synthétiques")
+def main(urls):
+    with tempfile.TemporaryDirectory() as tmp:
+        run_backend('memory', lambda: (MemoryFrontierStore(), None), urls)
+        path = os.path.join(tmp, 'plain.sqlite3')
+        run_backend('sqlite', lambda: (SQLiteFrontierStore(path), path), urls)
+        path_bloom = os.path.join(tmp, 'bloom.sqlite3')
+        run_backend(
+            'sqlite+bloom',
+            lambda: (SQLiteFrontierStore(path_bloom, bloom_capacity=urls * 2), path_bloom),
+            urls
+        )
+
+
+if __name__ == '__main__':
+    main()
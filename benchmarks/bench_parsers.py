@@ -0,0 +1,115 @@
+# benchmarks/bench_parsers.py
+"""Compare les parseurs HTML : latence par page, pages/s et équivalence de la sortie
+
+Le corpus est généré de façon déterministe (pages de taille réaliste : navigation,
+scripts, styles, tableaux, entités) ou lu depuis un dossier de pages enregistrées.
+La sortie de chaque parseur est comparée à celle de html.parser.
+
+Usage : python benchmarks/bench_parsers.py --pages 300
+        python benchmarks/bench_parsers.py --corpus /chemin/vers/pages_html
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import click
+from src.extractors import ContentExtractor
+from src.parsers import PARSER_BACKENDS
+
+BASE_URL = 'https://www.example.com/section/page.html'
+WORDS = (
+    "crawler page contenu données analyse réseau lien texte rapport "
+    "année marché société résultats étude projet équipe service client"
+).split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def synthetic_page(rng, index):
+    nav = ''.join(
+        f'<li><a href="/section-{i}/index.html">Section {i}</a></li>' for i in range(rng.randint(15, 40))
+    )
+    paragraphs = ''.join(
+        f'<p>{sentence(rng, rng.randint(20, 60))} <a href="article-{rng.randint(0, 10000)}.html">lire</a> '
+        f'&amp; <em>{sentence(rng, 5)}</em></p>'
+        for _ in range(rng.randint(20, 60))
+    )
+    rows = ''.join(
+        f'<tr><td>{rng.randint(0, 999)}</td><td>{sentence(rng, 4)}</td>'
+        f'<td><a href="//cdn.example.com/doc-{i}.pdf">PDF</a></td></tr>'
+        for i in range(rng.randint(5, 30))
+    )
+    return (
+        f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>Page {index}</title>'
+        f'<style>body {{ margin: 0 }} .nav li {{ display: inline }}</style>'
+        f'<script>var page = {index}; function track() {{ return "<a href=\'/x\'>"; }}</script></head>'
+        f'<body><header><ul class="nav">{nav}</ul></header>'
+        f'<main><h1>Titre {index}</h1>{paragraphs}<table>{rows}</table></main>'
+        f'<script>track();</script>'
+        f'<footer><a href="https://www.example.com/contact">Contact</a> &copy; 2024</footer></body></html>'
+    ).encode('utf-8')
+
+
+def load_corpus(corpus, pages):
+    if corpus:
+        documents = []
+        for root, _, files in os.walk(corpus):
+            for name in sorted(files):
+                if name.endswith(('.html', '.htm')):
+                    with open(os.path.join(root, name), 'rb') as f:
+                        documents.append(f.read())
+        return documents[:pages] if pages else documents
+    rng = random.Random(42)
+    return [synthetic_page(rng, i) for i in range(pages)]
+
+
+def run_parser(name, documents, reference):
+    try:
+        extractor = ContentExtractor(name)
+    except ImportError as e:
+        click.echo(f"{name:<12} indisponible ({e})")
+        return None
+    extractor.parse_html(documents[0], BASE_URL)  # Chauffe
+    latencies, outputs = [], []
+    start = time.perf_counter()
+    for document in documents:
+        t0 = time.perf_counter()
+        outputs.append(extractor.parse_html(document, BASE_URL))
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    mismatches = sum(1 for a, b in zip(outputs, reference or outputs) if a != b)
+    click.echo(
+        f"{name:<12} {len(documents) / total:8.1f} pages/s  "
+        f"médiane: {statistics.median(latencies) * 1000:7.2f} ms  p95: {p95 * 1000:7.2f} ms  "
+        f"différences vs html.parser: {mismatches}/{len(documents)}"
+    )
+    return outputs
+
+
+@click.command()
+@click.option('--pages', default=300, help="Nombre de pages synthétiques (ou limite du corpus)")
+@click.option('--corpus', type=click.Path(exists=True, file_okay=False), help="Dossier de pages HTML enregistrées")
+def main(pages, corpus):
+    documents = load_corpus(corpus, pages)
+    if not documents:
+        raise click.ClickException("Corpus vide")
+    size = sum(len(d) for d in documents) / len(documents)
+    click.echo(f"{len(documents)} pages, {size / 1024:.1f} Ko en moyenne")
+    reference = None
+    for name in PARSER_BACKENDS:
+        outputs = run_parser(name, documents, reference)
+        if reference is None:
+            reference = outputs
+
+
+if __name__ == '__main__':
+    main()
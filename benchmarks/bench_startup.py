@@ -0,0 +1,94 @@
+# benchmarks/bench_startup.py
+"""Mesure le temps d'import de run.py et vérifie qu'il reste sous un budget
+
+Chaque mesure est faite dans un nouvel interpréteur (python -X importtime -c "import run").
+Le script échoue (code de sortie 1) si la médiane dépasse --budget-ms ou si l'import a
+chargé une des bibliothèques lourdes réservées au premier usage (PDF, OCR, bannière,
+User-Agent aléatoire, moteur async, HTTP/2, parseurs lxml/selectolax, compression zstd)
+ou un des modes chargés à la demande (rejeu, distribué, jobs).
+
+Usage : python benchmarks/bench_startup.py --runs 5 --budget-ms 500
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules qui ne doivent être importés qu'au premier PDF, au lancement d'un crawl, avec --engine async,
+# quand la configuration les active (transport.http2, extraction.parser, compression zstd)
+# ou dans la branche de main qui les utilise (--replay, --workers/--worker-index, --job)
+LAZY_MODULES = (
+    'pymupdf', 'fitz', 'pdfplumber', 'pytesseract', 'PIL', 'pyfiglet', 'fake_useragent', 'aiohttp',
+    'httpx', 'lxml', 'selectolax', 'zstandard', 'src.replay', 'src.distributed', 'src.jobs',
+)
+
+PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import run\n"
+    "elapsed = time.perf_counter() - started\n"
+    f"loaded = [name for name in {LAZY_MODULES!r} if name in sys.modules]\n"
+    "print(json.dumps([elapsed, loaded]))\n"
+)
+
+
+def measure():
+    """Durée de l'import de run (s), modules lourds chargés, et lignes -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    elapsed, loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return elapsed, loaded, completed.stderr.splitlines()
+
+
+def slowest_imports(lines, top):
+    """Modules de plus haut niveau (importés directement par run) triés par temps cumulé"""
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('   ') and not name.startswith('    '):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+@click.command()
+@click.option('--runs', default=5, help='Nombre de mesures (un interpréteur par mesure)')
+@click.option('--budget-ms', default=500.0, help="Budget de la médiane du temps d'import de run.py (ms)")
+@click.option('--top', default=10, help='Nombre de modules affichés parmi les plus lents à importer')
+def main(runs, budget_ms, top):
+    durations = []
+    loaded = set()
+    lines = []
+    for _ in range(runs):
+        elapsed, modules, lines = measure()
+        durations.append(elapsed * 1000)
+        loaded.update(modules)
+
+    median = statistics.median(durations)
+    click.echo(f"import run : médiane {median:.0f} ms, min {min(durations):.0f} ms, max {max(durations):.0f} ms ({runs} mesures)")
+    click.echo("Imports directs les plus lents (dernière mesure, temps cumulé) :")
+    for cumulative, name in slowest_imports(lines, top):
+        click.echo(f"  {cumulative:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        click.echo(f"ÉCHEC : modules chargés dès l'import au lieu du premier usage : {', '.join(sorted(loaded))}")
+        failed = True
+    if median > budget_ms:
+        click.echo(f"ÉCHEC : {median:.0f} ms dépasse le budget de {budget_ms:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    click.echo(f"OK : sous le budget de {budget_ms:.0f} ms, aucune bibliothèque lourde chargée")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_urls.py
+"""Compare le filtrage et la normalisation des liens : version historique et analyse unique
+
+La version historique (reproduite ci-dessous) abaisse la casse de l'URL, parcourt
+chaque motif et chaque extension exclus, puis analyse l'URL dans is_valid_url et de
+nouveau dans normalize_url. URLProcessor.process_link ne l'analyse qu'une fois.
+
+Usage : python benchmarks/bench_urls.py --links 1000000
+"""
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import click
+import yaml
+from src.processors import URLProcessor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_should_process_url(config, url):
+    lower_url = url.lower()
+    if any(pattern in lower_url for pattern in config['excluded']['patterns']):
+        return False
+    if any(lower_url.endswith(ext) for ext in config['excluded']['extensions']):
+        return False
+    if not url or len(url) > config['files']['max_url_length']:
+        return False
+    parsed = urlparse(url)
+    return all([
+        parsed.scheme,
+        parsed.netloc,
+        parsed.scheme in ['http', 'https'],
+        config['domain']['name'] in parsed.netloc
+    ])
+
+
+def legacy_normalize_url(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+
+def synthetic_links(count, domain, seed=42):
+    """Liens absolus variés : pages, variantes (casse, port, fragment, suivi), exclus et externes"""
+    rng = random.Random(seed)
+    suffixes = ['', '#haut', '?utm_source=news&utm_medium=mail', '?gclid=abc123', '?page=2', '?fbclid=x#a']
+    hosts = [domain, domain.upper(), f"{domain}:443", 'cdn.example.net', f"blog.{domain}"]
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            yield f"https://{domain}/assets/style-{rng.randrange(200)}.css"
+        elif roll < 0.08:
+            yield f"https://{domain}/login?next=/compte/{rng.randrange(500)}"
+        elif roll < 0.10:
+            yield f"mailto:contact-{rng.randrange(50)}@{domain}"
+        else:
+            host = rng.choice(hosts)
+            path = f"/fr-ca/produits/categorie-{rng.randrange(40)}/article-{rng.randrange(5000)}"
+            yield f"https://{host}{path}{rng.choice(suffixes)}"
+
+
+def run(name, links, handler):
+    start = time.perf_counter()
+    keys = set()
+    accepted = 0
+    for link in links:
+        key = handler(link)
+        if key is not None:
+            accepted += 1
+            keys.add(key)
+    elapsed = time.perf_counter() - start
+    click.echo(
+        f"{name:<14} {len(links) / elapsed:12.0f} liens/s  {elapsed * 1e6 / len(links):6.2f} µs/lien  "
+        f"acceptés: {accepted}  clés distinctes (requêtes): {len(keys)}"
+    )
+
+
+@click.command()
+@click.option('--links', default=1000000, help="Nombre de liens synthétiques")
+@click.option('--config', 'config_path', default=os.path.join(ROOT, 'config', 'settings.yaml'),
+              help="Configuration fournissant domain.name et les exclusions")
+def main(links, config_path):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    domain = config['domain']['name']
+    corpus = list(synthetic_links(links, domain))
+    click.echo(f"{len(corpus)} liens, domaine {domain}")
+
+    run('historique', corpus, lambda url: legacy_normalize_url(url) if legacy_should_process_url(config, url) else None)
+
+    url_processor = URLProcessor(config)
+
+    def single_pass(url):
+        processed = url_processor.process_link(url)
+        return processed[1] if processed is not None else None
+
+    run('analyse unique', corpus, single_pass)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+# benchmarks/synthetic_site.py
+"""Site synthétique servi localement pour les mesures de bout en bout, sans accès réseau
+
+Le site est déterminé par une graine : pages HTML reliées avec un nombre fixe de liens
+sortants, PDFs avec couche texte ou numérisés (une image, pas de texte), images PNG.
+Tout est généré à la demande, rien n'est écrit sur disque. Le serveur peut injecter de
+la latence, répondre 429 à la première requête d'une partie des URLs et envoyer
+lentement une partie des corps.
+
+Usage : python benchmarks/synthetic_site.py --pages 2000 --port 8800 --latency-ms 20
+"""
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+
+# Mots ASCII : le texte des PDFs est écrit sans encodage de police particulier
+WORDS = (
+    "crawler page content data analysis network link text report year market "
+    "company results study project team service customer product price order"
+).split()
+
+
+def _pdf(objects):
+    """Assemble un PDF minimal (objets numérotés à partir de 1, le premier étant le catalogue)"""
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _stream(dictionary, data):
+    return f"<< {dictionary} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream"
+
+
+def text_pdf(lines):
+    """PDF d'une page avec couche texte (Helvetica)"""
+    text = ''.join(
+        f"({line.replace(chr(92), '').replace('(', '').replace(')', '')}) '\n" for line in lines
+    )
+    content = f"BT /F1 11 Tf 14 TL 72 770 Td\n{text}ET".encode()
+    return _pdf([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        _stream("", content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ])
+
+
+def scanned_pdf(rng, size=300):
+    """PDF d'une page sans couche texte : une image en niveaux de gris, comme un document numérisé"""
+    pixels = bytes(255 if (x // 8 + y // 12) % 5 else rng.randrange(256) for y in range(size) for x in range(size))
+    image = zlib.compress(pixels, 6)
+    return _pdf([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /XObject << /Im1 5 0 R >> >> >>",
+        _stream("", b"q 450 0 0 450 80 200 cm /Im1 Do Q"),
+        _stream(
+            f"/Type /XObject /Subtype /Image /Width {size} /Height {size} /ColorSpace /DeviceGray "
+            f"/BitsPerComponent 8 /Filter /FlateDecode",
+            image
+        ),
+    ])
+
+
+def png_image(rng, width=160, height=120):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    color = bytes(rng.randrange(256) for _ in range(3))
+    rows = b''.join(b'\x00' + color * width for _ in range(height))
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(rows, 6))
+        + chunk(b'IEND', b'')
+    )
+
+
+class SyntheticSite:
+    """Contenu du site : /p<i>.html pour 0 <= i < pages, /doc<i>.pdf, /scan<i>.pdf et /img<i>.png
+
+    Chaque page a fanout liens vers d'autres pages ; la proportion de pages qui
+    référencent un PDF texte, un PDF numérisé ou une image est donnée par pdf_ratio,
+    scanned_ratio et image_ratio. La page 0 est la page d'accueil (/).
+    """
+
+    def __init__(self, pages=1000, fanout=10, pdf_ratio=0.05, scanned_ratio=0.01, image_ratio=0.1,
+                 paragraphs=12, seed=42):
+        self.pages = pages
+        self.fanout = fanout
+        self.pdf_ratio = pdf_ratio
+        self.scanned_ratio = scanned_ratio
+        self.image_ratio = image_ratio
+        self.paragraphs = paragraphs
+        self.seed = seed
+
+    def _rng(self, kind, index):
+        return random.Random(f"{self.seed}:{kind}:{index}")
+
+    def _sentence(self, rng, words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    def page(self, index):
+        rng = self._rng('page', index)
+        links = [f'<a href="/p{rng.randrange(self.pages)}.html">page</a>' for _ in range(self.fanout)]
+        # Liens vers les pages suivantes : tout le site est atteignable depuis l'accueil
+        links.append(f'<a href="/p{(index + 1) % self.pages}.html">suivante</a>')
+        links.append(f'<a href="p{(index * 7 + 3) % self.pages}.html#section">relative</a>')
+        if rng.random() < self.pdf_ratio:
+            links.append(f'<a href="/doc{index}.pdf">rapport PDF</a>')
+        if rng.random() < self.scanned_ratio:
+            links.append(f'<a href="/scan{index}.pdf">document numérisé</a>')
+        if rng.random() < self.image_ratio:
+            links.append(f'<img src="/img{index}.png"><a href="/img{index}.png">image</a>')
+        body = ''.join(f'<p>{self._sentence(rng, rng.randint(20, 60))}</p>' for _ in range(self.paragraphs))
+        nav = ''.join(f'<li><a href="/p{i}.html">Section {i}</a></li>' for i in range(min(self.pages, 15)))
+        return (
+            f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>Page {index}</title>'
+            f'<style>body {{ margin: 0 }}</style><script>var page = {index};</script></head>'
+            f'<body><nav><ul>{nav}</ul></nav><main><h1>Page {index}</h1>{body}'
+            f'<div class="links">{" ".join(links)}</div></main><footer>Pied de page</footer></body></html>'
+        ).encode('utf-8')
+
+    def text_pdf(self, index):
+        rng = self._rng('pdf', index)
+        return text_pdf([self._sentence(rng, 10) for _ in range(40)])
+
+    def scanned_pdf(self, index):
+        return scanned_pdf(self._rng('scan', index))
+
+    def image(self, index):
+        return png_image(self._rng('img', index))
+
+    def resolve(self, path):
+        """(Content-Type, corps) du chemin, ou None"""
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        if path in ('/', '/index.html'):
+            return 'text/html; charset=utf-8', self.page(0)
+        for prefix, suffix, content_type, build in (
+            ('/p', '.html', 'text/html; charset=utf-8', self.page),
+            ('/doc', '.pdf', 'application/pdf', self.text_pdf),
+            ('/scan', '.pdf', 'application/pdf', self.scanned_pdf),
+            ('/img', '.png', 'image/png', self.image),
+        ):
+            if path.startswith(prefix) and path.endswith(suffix):
+                number = path[len(prefix):-len(suffix)]
+                if number.isdigit() and int(number) < self.pages:
+                    return content_type, build(int(number))
+        return None
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Les connexions keep-alive fermées brutalement par le crawler à sa sortie ne sont pas des erreurs"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class SiteServer:
+    """Serveur HTTP du site synthétique sur un thread, avec injection de latence et d'erreurs
+
+    latency_ms (+/- jitter_ms) retarde chaque réponse ; rate_429 est la proportion d'URLs
+    dont la première requête reçoit un 429 (Retry-After: retry_after) ; slow_ratio est la
+    proportion de corps envoyés en 8 blocs étalés sur slow_ms.
+    """
+
+    def __init__(self, site, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0, rate_429=0.0,
+                 retry_after=1, slow_ratio=0.0, slow_ms=500):
+        self.site = site
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.slow_ratio = slow_ratio
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.attempts = {}
+        self.requests = 0
+        self.responses_429 = 0
+        self.bytes_sent = 0
+        self.server = QuietHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self, kind, path):
+        return random.Random(f"{self.site.seed}:{kind}:{path}").random()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request):
+        path = request.path
+        with self.lock:
+            self.requests += 1
+            attempt = self.attempts.get(path, 0) + 1
+            self.attempts[path] = attempt
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+            time.sleep(max(delay, 0) / 1000)
+        if attempt == 1 and self.rate_429 and path not in ('/', '/robots.txt') and self._draw('429', path) < self.rate_429:
+            with self.lock:
+                self.responses_429 += 1
+            self._send(request, 429, 'text/plain', b'Too Many Requests', {'Retry-After': str(self.retry_after)})
+            return
+        if path == '/robots.txt':
+            self._send(request, 200, 'text/plain', b'User-agent: *\nAllow: /\n')
+            return
+        resolved = self.site.resolve(path)
+        if resolved is None:
+            self._send(request, 404, 'text/plain', b'Not Found')
+            return
+        content_type, body = resolved
+        slow = self.slow_ratio and self._draw('slow', path) < self.slow_ratio
+        self._send(request, 200, content_type, body, slow=slow)
+
+    def _send(self, request, status, content_type, body, headers=None, slow=False):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        if slow:
+            step = max(len(body) // 8, 1)
+            for start in range(0, len(body), step):
+                request.wfile.write(body[start:start + step])
+                request.wfile.flush()
+                time.sleep(self.slow_ms / 8000)
+        else:
+            request.wfile.write(body)
+        with self.lock:
+            self.bytes_sent += len(body)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='SyntheticSite', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests, 'responses_429': self.responses_429, 'bytes_sent': self.bytes_sent}
+
+
+@click.command()
+@click.option('--pages', default=1000, help="Nombre de pages HTML")
+@click.option('--fanout', default=10, help="Liens sortants par page")
+@click.option('--pdf-ratio', default=0.05, help="Proportion de pages liant un PDF texte")
+@click.option('--scanned-ratio', default=0.01, help="Proportion de pages liant un PDF numérisé")
+@click.option('--image-ratio', default=0.1, help="Proportion de pages liant une image")
+@click.option('--latency-ms', default=0.0, help="Latence ajoutée à chaque réponse")
+@click.option('--jitter-ms', default=0.0, help="Variation aléatoire de la latence")
+@click.option('--rate-429', default=0.0, help="Proportion d'URLs dont la première requête reçoit un 429")
+@click.option('--slow-ratio', default=0.0, help="Proportion de corps envoyés lentement")
+@click.option('--slow-ms', default=500.0, help="Durée d'envoi d'un corps lent")
+@click.option('--port', default=8800, help="Port d'écoute")
+@click.option('--seed', default=42, help="Graine du site")
+def main(pages, fanout, pdf_ratio, scanned_ratio, image_ratio, latency_ms, jitter_ms, rate_429,
+         slow_ratio, slow_ms, port, seed):
+    site = SyntheticSite(pages, fanout, pdf_ratio, scanned_ratio, image_ratio, seed=seed)
+    server = SiteServer(site, port=port, latency_ms=latency_ms, jitter_ms=jitter_ms, rate_429=rate_429,
+                        slow_ratio=slow_ratio, slow_ms=slow_ms)
+    click.echo(f"Site synthétique de {pages} pages sur {server.base_url}/ (Ctrl+C pour arrêter)")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+        click.echo(f"Requêtes servies: {server.stats()}")
+
+
+if __name__ == '__main__':
+    main()
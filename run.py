@@ -5,25 +5,66 @@ from src.session import SafeSession
 from src.extractors import ContentExtractor
 from src.processors import URLProcessor
 from src.crawler import SafeCrawler
+from src.metrics import StackSampler
+import cProfile
 import os
 import logging
 import sys
-import pyfiglet  # Import de pyfiglet
 
-# Affichage de l'ASCII art au début du script
-ascii_art = pyfiglet.figlet_format("M-LAI")
-print(ascii_art)
+
+def print_banner():
+    """ASCII art affiché au lancement d'un crawl ; pyfiglet n'est pas chargé pour --help"""
+    import pyfiglet
+    print(pyfiglet.figlet_format("M-LAI"))
+
 
 @click.command()
 @click.option('--config', '-c', default='config/settings.yaml', help='Chemin du fichier de configuration')
 @click.option('--output', '-o', default='output', help='Dossier de sortie')
 @click.option('--resume', '-r', is_flag=True, help='Reprendre un crawl précédent')
-def main(config, output, resume):
+@click.option('--engine', '-e', type=click.Choice(['threads', 'async']), default='threads',
+              help='Moteur de crawl : pool de threads ou boucle asyncio')
+@click.option('--incremental', '-i', is_flag=True,
+              help='Crawl incrémental : requêtes conditionnelles et contenus inchangés ignorés')
+@click.option('--profile', 'profile_path', type=click.Path(dir_okay=False), default=None,
+              help='Profil cProfile du thread principal écrit dans ce fichier (pstats, snakeviz)')
+@click.option('--sample-stacks', 'stacks_path', type=click.Path(dir_okay=False), default=None,
+              help='Piles de tous les threads échantillonnées et écrites dans ce fichier (format collapsed)')
+@click.option('--sample-interval', default=0.01, show_default=True,
+              help="Intervalle (s) d'échantillonnage des piles")
+@click.option('--replay', is_flag=True,
+              help="Ré-extraction hors ligne des réponses archivées (section archive), sans requête réseau")
+@click.option('--workers', 'worker_total', type=click.IntRange(min=1), default=None,
+              help='Crawl distribué : nombre total de workers partageant la frontière (lance ceux de ce nœud)')
+@click.option('--worker-index', type=int, default=None,
+              help="Worker d'un crawl distribué : numéro de sa partition (avec --worker-count)")
+@click.option('--worker-count', type=click.IntRange(min=1), default=None,
+              help="Worker d'un crawl distribué : nombre total de partitions")
+@click.option('--job', 'job_path', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Fichier de job : plusieurs domaines crawlés ensemble dans ce processus')
+def main(config, output, resume, engine, incremental, profile_path, stacks_path, sample_interval, replay,
+         worker_total, worker_index, worker_count, job_path):
     """Programme principal du crawler web"""
+    print_banner()
     try:
         # Charge la configuration
         config_data = load_config(config)
         
+        if incremental:
+            config_data.setdefault('incremental', {})['enabled'] = True
+
+        if job_path is not None and (engine != 'threads' or worker_total is not None or worker_index is not None or replay):
+            raise click.BadParameter("--job s'utilise avec le moteur threads, sans --workers, --worker-index ni --replay")
+        output_dir = None
+        if job_path is None:
+            output_dir = os.path.join(output, config_data['files']['output_dir'], config_data['domain']['name'])
+        if worker_index is not None:
+            if worker_count is None or not 0 <= worker_index < worker_count:
+                raise click.BadParameter("--worker-index doit être compris entre 0 et --worker-count - 1")
+            # Import à la demande : le mode distribué n'est chargé que pour les workers
+            from src.distributed import configure_worker
+            output_dir = configure_worker(config_data, output_dir, worker_index, worker_count)
+
         # Configure le logging
         setup_logging(config_data)
         
@@ -31,19 +72,42 @@ def main(config, output, resume):
         logging.info(f"Démarrage du crawler avec config: {config}")
         logging.info(f"Dossier de sortie: {output}")
         logging.info(f"Mode reprise: {resume}")
+        logging.info(f"Moteur de crawl: {engine}")
+        logging.info(f"Mode incrémental: {bool((config_data.get('incremental') or {}).get('enabled'))}")
         
+        if job_path is not None:
+            # Domaines, filtres et dossiers de sortie viennent du fichier de job
+            from src.jobs import JobCrawler
+            JobCrawler(config_data, job_path, output, resume).crawl()
+            click.echo("Job terminé avec succès")
+            return
+
         # Crée le dossier de sortie
-        output_dir = os.path.join(output, config_data['files']['output_dir'], config_data['domain']['name'])
         os.makedirs(output_dir, exist_ok=True)
         logging.info(f"Dossier de sortie créé: {output_dir}")
         
+        if replay:
+            # Import à la demande : le rejeu n'est chargé qu'avec --replay
+            from src.replay import Replayer
+            Replayer(config_data, output_dir, URLProcessor(config_data)).run()
+            click.echo("Rejeu terminé avec succès")
+            return
+
+        if worker_total is not None:
+            # Import à la demande : le coordinateur n'est chargé qu'avec --workers
+            from src.distributed import Coordinator
+            Coordinator(config_data, config, output, output_dir, worker_total, engine, resume, incremental).run()
+            click.echo("Crawl distribué terminé")
+            return
+        
         # Initialise les composants
         try:
             session = SafeSession.create(config_data)
             logging.info("Session HTTP initialisée")
             
-            content_extractor = ContentExtractor()
-            logging.info("Extracteur de contenu initialisé")
+            parser = (config_data.get('extraction') or {}).get('parser', 'html.parser')
+            content_extractor = ContentExtractor(parser)
+            logging.info(f"Extracteur de contenu initialisé (parseur {parser})")
             
             url_processor = URLProcessor(config_data)
             logging.info("Processeur d'URL initialisé")
@@ -54,10 +118,29 @@ def main(config, output, resume):
         
         # Initialise et lance le crawler
         try:
-            crawler = SafeCrawler(config_data, session, content_extractor, url_processor, output_dir, resume)
+            if engine == 'async':
+                # Import à la demande : aiohttp n'est requis que pour ce moteur
+                from src.async_crawler import AsyncCrawler
+                crawler_class = AsyncCrawler
+            else:
+                crawler_class = SafeCrawler
+            crawler = crawler_class(config_data, session, content_extractor, url_processor, output_dir, resume)
             logging.info("Crawler initialisé")
             
-            crawler.crawl()
+            sampler = StackSampler(stacks_path, sample_interval) if stacks_path else None
+            profiler = cProfile.Profile() if profile_path else None
+            try:
+                if profiler is not None:
+                    # Thread principal seulement : la boucle du moteur async, l'ordonnanceur du moteur threads
+                    profiler.runcall(crawler.crawl)
+                else:
+                    crawler.crawl()
+            finally:
+                if profiler is not None:
+                    profiler.dump_stats(profile_path)
+                    logging.info(f"Profil cProfile écrit dans {profile_path}")
+                if sampler is not None:
+                    sampler.stop()
             logging.info("Crawling terminé avec succès")
             
         except Exception as e:
@@ -76,6 +159,7 @@ def main(config, output, resume):
             try:
                 crawler.save_state()
                 logging.info("État final sauvegardé")
+                crawler.frontier.close()
             except Exception as e:
                 logging.error(f"Erreur lors de la sauvegarde de l'état final: {str(e)}")
 
@@ -8,6 +8,11 @@ setup(
         line.strip()
         for line in open("requirements.txt").readlines()
     ],
+    extras_require={
+        'fast-parsers': ['lxml>=4.9', 'selectolax>=0.3.21'],
+        'compression': ['urllib3[brotli,zstd]'],
+        'http2': ['httpx[http2]'],
+    },
     entry_points={
         'console_scripts': [
             'crawler=run:main',
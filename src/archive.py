@@ -0,0 +1,158 @@
+# src/archive.py
+from src.constants import *
+import base64
+import logging
+import os
+import sqlite3
+import zlib
+from src.output import OutputWriter, RollingOutput, WARCOutput
+
+# En-têtes qui décrivent le transfert et non le corps archivé (déjà décompressé)
+TRANSFER_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+class ResponseArchive(WARCOutput):
+    """Archive des réponses brutes (section archive) pour la ré-extraction hors ligne
+
+    Chaque réponse est un enregistrement WARC « response » (ligne de statut, en-têtes et
+    corps décodé) dans archive/responses-NNNNN.warc.gz, un membre gzip par
+    enregistrement. Un corps déjà archivé sous une autre URL donne un enregistrement
+    « revisit » sans corps. L'index SQLite archive/index.sqlite3 associe chaque URL à la
+    partition et au décalage du membre qui porte son corps : --replay relit ainsi
+    n'importe quelle réponse sans parcourir les partitions.
+    """
+
+    def __init__(self, output_dir, shard_size, kinds=('html', 'pdf'), level=6):
+        self.level = level
+        self.kinds = tuple(kinds)
+        RollingOutput.__init__(self, os.path.join(output_dir, 'archive'), 'responses', '.warc.gz', shard_size)
+        self.conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "url TEXT PRIMARY KEY, kind TEXT, status INTEGER, content_type TEXT, final_url TEXT, "
+            "digest TEXT, shard TEXT, offset INTEGER, path TEXT, fetched_at TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_digest ON records (digest)")
+        self.responses = 0
+        self.revisits = 0
+
+    @staticmethod
+    def http_header_block(status, reason, headers, length, version='HTTP/1.1'):
+        lines = [f"{version} {status} {reason or ''}".rstrip()]
+        lines += [f"{name}: {value}" for name, value in headers if name.lower() not in TRANSFER_HEADERS]
+        lines.append(f"Content-Length: {length}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', errors='replace')
+
+    def write_record(self, record):
+        url, metadata = record['url'], record['metadata']
+        digest = metadata.get('digest')
+        previous = self.conn.execute("SELECT digest FROM records WHERE url = ?", (url,)).fetchone()
+        if previous is not None and digest and previous[0] == digest:
+            # Même corps qu'à la dernière visite : l'archive le contient déjà
+            return 0
+        if self.file is None:
+            self._open_shard()
+
+        warc_headers = [('WARC-Target-URI', url), ('Content-Type', 'application/http; msgtype=response')]
+        if digest:
+            warc_headers.append(('WARC-Payload-Digest', f"sha256:{base64.b32encode(bytes.fromhex(digest)).decode()}"))
+        original = None
+        if digest:
+            original = self.conn.execute(
+                "SELECT url, shard, offset, fetched_at FROM records WHERE digest = ? AND url != ? LIMIT 1", (digest, url)
+            ).fetchone()
+
+        shard = os.path.basename(self.current_path())
+        offset = self.shard_bytes
+        raw, path = record.get('raw'), record.get('path')
+        if original is not None:
+            header_block = self.http_header_block(record['status'], record.get('reason'), record['headers'], 0)
+            self._record('revisit', warc_headers + [
+                ('WARC-Profile', 'http://netpreserve.org/warc/1.1/revisit/identical-payload-digest'),
+                ('WARC-Refers-To-Target-URI', original[0]),
+                ('WARC-Refers-To-Date', original[3]),
+            ], [header_block], len(header_block))
+            # L'index pointe vers l'enregistrement qui porte le corps
+            shard, offset = original[1], original[2]
+            self.revisits += 1
+            written = len(header_block)
+        else:
+            if raw is not None:
+                size, chunks = len(raw), [raw]
+            elif path and os.path.exists(path):
+                size, chunks = os.path.getsize(path), self._file_chunks(path)
+            else:
+                return 0
+            header_block = self.http_header_block(record['status'], record.get('reason'), record['headers'], size)
+            self._record('response', warc_headers, self._prefixed(header_block, chunks), len(header_block) + size)
+            self.responses += 1
+            written = len(header_block) + size
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO records "
+            "(url, kind, status, content_type, final_url, digest, shard, offset, path, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, record['kind'], record['status'], metadata.get('content_type'), metadata.get('final_url'),
+             digest, shard, offset, path, self._warc_date())
+        )
+        return written
+
+    @staticmethod
+    def _prefixed(first, chunks):
+        yield first
+        yield from chunks
+
+    def flush(self):
+        # Les lignes d'index ne sont validées qu'une fois leurs membres gzip sur disque
+        super().flush()
+        self.conn.commit()
+
+    def close(self):
+        super().close()
+        self.conn.commit()
+        self.conn.close()
+        logging.info(f"Archive: {self.responses} réponses, {self.revisits} corps déjà archivés (revisit)")
+
+
+def read_member(f):
+    """Décompresse le membre gzip qui commence à la position courante du fichier, et lui seul"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    parts = []
+    while not decompressor.eof:
+        chunk = f.read(65536)
+        if not chunk:
+            break
+        parts.append(decompressor.decompress(chunk))
+    return b''.join(parts)
+
+
+def read_response(shard_path, offset):
+    """Corps et en-têtes HTTP (dict en minuscules) de l'enregistrement « response » situé à offset"""
+    with open(shard_path, 'rb') as f:
+        f.seek(offset)
+        data = read_member(f)
+    warc_headers, _, block = data.partition(b'\r\n\r\n')
+    http_headers, _, body = block.partition(b'\r\n\r\n')
+    headers = {}
+    for line in http_headers.decode('latin-1').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', len(body)))
+    return body[:length], headers
+
+
+def create_archive(config, output_dir):
+    """Écrivain différé de l'archive des réponses brutes, ou None si archive.enabled est faux"""
+    archive_config = config.get('archive') or {}
+    if not archive_config.get('enabled'):
+        return None
+    backend = ResponseArchive(
+        output_dir,
+        int(archive_config.get('shard_size_mb', 1024) * 1048576),
+        archive_config.get('kinds') or ('html', 'pdf'),
+    )
+    logging.info(f"Archive des réponses brutes activée ({', '.join(backend.kinds)})")
+    return OutputWriter(backend, name='ArchiveWriter', label='Archive (écrivain)', max_pending=archive_config.get('max_pending', 1000))
+
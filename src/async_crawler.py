@@ -0,0 +1,341 @@
+# src/async_crawler.py
+from src.constants import *
+import asyncio
+import hashlib
+import concurrent.futures
+import functools
+import logging
+import os
+import time
+from urllib.parse import urlparse
+import aiohttp
+from src.crawler import SafeCrawler, ResponseTooLarge
+from src.results import CrawlResult
+from src.retry import TransientFetchError, parse_retry_after
+from src.transport import SafeTransport
+from src.metrics import METRICS
+
+
+class AsyncCrawler(SafeCrawler):
+    """Moteur de crawl asyncio : des centaines de connexions pilotées par une seule boucle d'événements
+
+    Le filtrage (URLProcessor), l'extraction (ContentExtractor, PDFProcessor) et la
+    sauvegarde (save_content) sont ceux de SafeCrawler ; seule la couche réseau change.
+    L'analyse HTML et le traitement des PDFs sont déportés dans un exécuteur ; les
+    écritures disque (fichiers téléchargés, dépôt dans l'archive) et la comptabilité des
+    résultats (frontière, caches de recrawl et de déduplication, dépôt dans la sortie)
+    dans un second, pour que la boucle d'événements ne serve que le réseau. Tant que
+    l'écrivain de sortie ou d'archive est plein, aucun téléchargement n'est lancé. Les
+    robots.txt sont récupérés par le client aiohttp.
+    """
+
+    # Octets accumulés avant chaque écriture d'un fichier téléchargé par l'exécuteur disque
+    WRITE_BATCH = 1048576
+
+    def __init__(self, config, session, content_extractor, url_processor, output_dir, resume=False):
+        super().__init__(config, session, content_extractor, url_processor, output_dir, resume)
+        self.concurrency = self.config['crawler'].get('async_concurrency', 100)
+        self.cpu_workers = self.config['crawler'].get('cpu_workers') or os.cpu_count() or 1
+        self.io_workers = self.config['crawler'].get('io_workers', 4)
+        self.io_executor = None
+        self.client = None
+        self.robots_tasks = set()
+        self.pending_results = set()  # comptabilité des résultats en cours dans l'exécuteur disque
+        # Le moniteur mesure l'utilisation par rapport au nombre de connexions simultanées
+        self.monitor.max_workers = self.concurrency
+
+    def crawl(self):
+        asyncio.run(self._crawl())
+
+    async def _crawl(self):
+        timeouts = self.config['timeouts']
+        transport = getattr(self.session, 'transport', None) or SafeTransport(self.config)
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.host_scheduler.max_per_host,
+            ttl_dns_cache=transport.dns_cache_ttl or None,
+            use_dns_cache=bool(transport.dns_cache_ttl),
+            keepalive_timeout=transport.keepalive_timeout,
+            ssl=False
+        )
+        client_timeout = aiohttp.ClientTimeout(sock_connect=timeouts['connect'], sock_read=timeouts['read'])
+        headers = dict(self.session.headers) if self.session is not None else {}
+        if transport.compression:
+            # aiohttp annonce lui-même les encodages qu'il sait décoder (gzip, deflate, br, zstd)
+            headers.pop('Accept-Encoding', None)
+        else:
+            headers['Accept-Encoding'] = 'identity'
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix='Extract') as cpu_executor, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='Disk') as io_executor:
+            self.io_executor = io_executor
+            async with aiohttp.ClientSession(
+                connector=connector,
+                timeout=client_timeout,
+                headers=headers,
+                trace_configs=self._trace_configs()
+            ) as client:
+                self.client = client
+                await self._run_scheduler(client, cpu_executor)
+
+    def _trace_configs(self):
+        """Requêtes et connexions comptées dans les statistiques de transport ; durées DNS et
+        d'ouverture de connexion (TLS compris) dans les mesures par étape"""
+        stats = self.transport_stats
+
+        async def on_request_start(session, context, params):
+            if stats is not None:
+                stats.record_request()
+
+        async def on_dns_resolvehost_start(session, context, params):
+            context.dns_started = time.perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params):
+            METRICS.observe('dns', time.perf_counter() - context.dns_started)
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_started = time.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            if stats is not None:
+                stats.record_connection()
+            METRICS.observe('connect', time.perf_counter() - context.connect_started)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return [trace_config]
+
+    def _record_body(self, resp, decoded_size):
+        """Octets réseau : Content-Length d'une réponse compressée, sinon la taille décodée"""
+        if self.transport_stats is None:
+            return
+        declared = resp.headers.get('Content-Length')
+        wire_size = decoded_size
+        if resp.headers.get('Content-Encoding') and declared and declared.isdigit():
+            wire_size = int(declared)
+        self.transport_stats.record_body(wire_size, decoded_size)
+
+    async def _run_scheduler(self, client, cpu_executor):
+        in_flight = {}  # tâche -> (url, hôte)
+        while self.has_pending_work(in_flight) and not self.page_limit_reached():
+            try:
+                self.monitor.sample(len(in_flight))
+                self.dispatch_ready_urls(
+                    lambda url: asyncio.ensure_future(self._process_url_async(client, cpu_executor, url)),
+                    in_flight,
+                    self.concurrency
+                )
+
+                wait_time = self.time_until_work()
+                if not in_flight and not self.pending_parses and not self.pending_results:
+                    await asyncio.sleep(wait_time if wait_time is not None else 0.1)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    list(in_flight) + list(self.pending_parses) + list(self.pending_results),
+                    timeout=min(wait_time, 1.0) if wait_time is not None else 1.0,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                self.monitor.sample(len(in_flight))
+
+                for task in done:
+                    if task in in_flight:
+                        url, host = in_flight.pop(task)
+                        self.complete_fetch(url, host, task)
+                    elif task in self.pending_parses:
+                        self.complete_parse(task)
+
+                self.after_iteration(len(in_flight))
+
+            except Exception as e:
+                logging.error(f"Erreur boucle principale async: {str(e)}")
+                continue
+
+        if self.pending_results:
+            # Les pages déjà téléchargées sont enregistrées avant l'arrêt
+            await asyncio.wait(list(self.pending_results))
+        self.abandon_in_flight(in_flight)
+        self.finish_crawl()
+
+    def has_pending_work(self, in_flight):
+        return bool(self.pending_results) or super().has_pending_work(in_flight)
+
+    def dispatch_ready_urls(self, submit, in_flight, max_slots):
+        if self.output.saturated() or (self.archive is not None and self.archive.saturated()):
+            # Contre-pression : écrivain plein, un dépôt bloquerait l'exécuteur disque
+            return
+        super().dispatch_ready_urls(submit, in_flight, max_slots)
+
+    def handle_result(self, result):
+        """Comptabilité du résultat (frontière, caches, dépôt dans la sortie) par l'exécuteur disque"""
+        future = asyncio.get_running_loop().run_in_executor(self.io_executor, super().handle_result, result)
+        self.pending_results.add(future)
+        future.add_done_callback(self.pending_results.discard)
+
+    def request_robots(self, url):
+        """robots.txt d'un nouvel hôte récupéré par le client aiohttp, sans bloquer la boucle"""
+        robots_url = self.robots.start_fetch(url)
+        if robots_url is None:
+            return
+        task = asyncio.ensure_future(self._fetch_robots_async(robots_url))
+        self.robots_tasks.add(task)
+        task.add_done_callback(self.robots_tasks.discard)
+
+    async def _fetch_robots_async(self, robots_url):
+        try:
+            async with self.client.get(robots_url, max_redirects=self.config['timeouts']['max_redirects']) as resp:
+                text = await resp.text(errors='replace')
+                rules = self.robots.response_rules(robots_url, resp.status, text)
+        except Exception as e:
+            rules = self.robots.unreachable_rules(robots_url, str(e) or type(e).__name__)
+        self.robots.store(urlparse(robots_url).netloc.lower(), rules)
+
+    def submit_parse(self, result):
+        # Les futures du pool sont enveloppées pour être attendues par la boucle asyncio
+        future = asyncio.wrap_future(
+            self.extraction_pool.submit(result.content, result.metadata.get('final_url') or result.url)
+        )
+        self.pending_parses[future] = result
+        return future
+
+    async def _process_url_async(self, client, cpu_executor, url):
+        try:
+            if not self.url_processor.should_process_url(url):
+                return None
+
+            fetched = await self._safe_request_async(client, url)
+            if fetched is None:
+                return None
+
+            kind, metadata, body, path = fetched
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(cpu_executor, self.build_result, url, kind, metadata, body, path)
+        except TransientFetchError as e:
+            return CrawlResult('retry', url, e)
+        except Exception as e:
+            METRICS.error('process', type(e).__name__)
+            logging.error(f"Erreur traitement {url}: {str(e)}")
+            return None
+
+    async def _safe_request_async(self, client, url):
+        """Une seule tentative ; les échecs temporaires sont reprogrammés par le RetryScheduler"""
+        try:
+            started = time.monotonic()
+            async with client.get(
+                url,
+                max_redirects=self.config['timeouts']['max_redirects'],
+                headers=self.conditional_headers(url)
+            ) as resp:
+                latency = time.monotonic() - started
+                METRICS.observe('request', latency)
+                METRICS.inc('responses', status=f"{resp.status // 100}xx")
+                if self.retry_scheduler.is_retryable_status(resp.status):
+                    METRICS.error('request', f"HTTP {resp.status}")
+                    retry_after = None
+                    if resp.status in (429, 503):
+                        retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                    raise TransientFetchError(f"HTTP {resp.status}", resp.status, retry_after)
+                if resp.status == 404:
+                    METRICS.error('request', 'HTTP 404')
+                    logging.error(f"Page non trouvée: {url}")
+                    return None
+                resp.raise_for_status()
+                body_started = time.perf_counter()
+                fetched = await self._read_response_async(url, resp, latency)
+                METRICS.observe('download', time.perf_counter() - body_started)
+                return fetched
+        except ResponseTooLarge as e:
+            METRICS.error('download', 'ResponseTooLarge')
+            logging.warning(f"Téléchargement interrompu {url}: {str(e)}")
+            return None
+        except aiohttp.ClientResponseError as e:
+            METRICS.error('request', f"HTTP {e.status}")
+            logging.error(f"Erreur HTTP pour {url}: {str(e)}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            METRICS.error('request', type(e).__name__)
+            raise TransientFetchError(str(e) or type(e).__name__) from e
+
+    async def _read_response_async(self, url, resp, latency=None):
+        """Lit le corps en flux : en mémoire pour le HTML, dans un fichier pour les autres types"""
+        if resp.status == 304:
+            return 'not_modified', self.response_metadata(resp.status, resp.url, resp.headers, latency), None, None
+
+        content_type = resp.headers.get('Content-Type', '').lower()
+        kind = self.classify_content(content_type)
+        if kind is None:
+            logging.info(f"Type de contenu non supporté pour {url}: {content_type}")
+            return None
+
+        self.check_declared_size(kind, resp.headers)
+        metadata = self.response_metadata(resp.status, resp.url, resp.headers, latency)
+        max_size = self.max_size_for(kind)
+        chunks = resp.content.iter_chunked(self.config['crawler']['chunk_size'])
+        digest = hashlib.sha256()
+
+        if kind == 'html':
+            parts = []
+            size = 0
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise ResponseTooLarge(f"{kind} dépasse {max_size} octets")
+                digest.update(chunk)
+                parts.append(chunk)
+            metadata['content_length'] = size
+            metadata['digest'] = digest.hexdigest()
+            self._record_body(resp, size)
+            body = b''.join(parts)
+            await self._archive_response_async(url, kind, metadata, resp, body=body)
+            return kind, metadata, body, None
+
+        loop = asyncio.get_running_loop()
+        final_path = self.download_path(url, kind, content_type)
+        tmp_path = f"{final_path}.part"
+        await loop.run_in_executor(self.io_executor, functools.partial(os.makedirs, os.path.dirname(final_path), exist_ok=True))
+        size = 0
+        try:
+            f = await loop.run_in_executor(self.io_executor, open, tmp_path, 'wb')
+            try:
+                # Écritures regroupées par blocs de WRITE_BATCH octets, hors de la boucle
+                batch, batch_size = [], 0
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise ResponseTooLarge(f"{kind} dépasse {max_size} octets")
+                    digest.update(chunk)
+                    batch.append(chunk)
+                    batch_size += len(chunk)
+                    if batch_size >= self.WRITE_BATCH:
+                        await loop.run_in_executor(self.io_executor, f.writelines, batch)
+                        batch, batch_size = [], 0
+                if batch:
+                    await loop.run_in_executor(self.io_executor, f.writelines, batch)
+            finally:
+                await loop.run_in_executor(self.io_executor, f.close)
+            final_path = await loop.run_in_executor(
+                self.io_executor, self.finalize_download, url, tmp_path, final_path, digest.hexdigest()
+            )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        metadata['content_length'] = size
+        metadata['digest'] = digest.hexdigest()
+        self._record_body(resp, size)
+        await self._archive_response_async(url, kind, metadata, resp, path=final_path)
+        return kind, metadata, None, final_path
+
+    async def _archive_response_async(self, url, kind, metadata, resp, body=None, path=None):
+        """Dépôt dans l'archive par l'exécuteur disque : l'écrivain différé peut bloquer quand sa file est pleine"""
+        if self.archive is None or kind not in self.archive.backend.kinds:
+            return
+        await asyncio.get_running_loop().run_in_executor(
+            self.io_executor,
+            functools.partial(self.archive_response, url, kind, metadata, resp.status, resp.reason, resp.headers,
+                              body=body, path=path)
+        )
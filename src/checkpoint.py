@@ -0,0 +1,127 @@
+# src/checkpoint.py
+from src.constants import *
+import logging
+import os
+import time
+
+
+class CrawlJournal:
+    """Journal append-only des événements de la frontière, compacté périodiquement
+
+    Chaque ligne est un événement :
+      E<TAB>profondeur<TAB>url  URL mise en file (E<TAB>url dans les journaux antérieurs)
+      C<TAB>clé  URL traitée avec succès (clé normalisée)
+      D<TAB>clé  URL abandonnée (erreur, type non supporté)
+
+    Le coût d'un point de sauvegarde est proportionnel au travail nouveau. Le journal est
+    réécrit (compacté) lorsqu'il dépasse deux fois la taille de l'état vivant, ce qui
+    garde un coût amorti constant par événement. En cas d'arrêt brutal, seules les
+    dernières lignes non écrites sont perdues ; une ligne tronquée est ignorée au rejeu.
+    """
+
+    ENQUEUE = 'E'
+    COMPLETE = 'C'
+    DONE = 'D'
+
+    def __init__(self, path, fsync_interval=5.0, compact_min_events=100000):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.compact_min_events = compact_min_events
+        self.buffer = []
+        self.events_since_compaction = 0
+        self.last_fsync = time.monotonic()
+        self.file = None
+
+    def open(self, reset=False):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, 'w' if reset else 'a', encoding='utf-8')
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def _record(self, kind, value):
+        if '\n' in value or '\r' in value:
+            return
+        self.buffer.append(f"{kind}\t{value}\n")
+        self.events_since_compaction += 1
+
+    def record_enqueue(self, url, depth=0):
+        self._record(self.ENQUEUE, f"{depth}\t{url}")
+
+    def record_complete(self, key):
+        self._record(self.COMPLETE, key)
+
+    def record_done(self, key):
+        self._record(self.DONE, key)
+
+    def flush(self):
+        """Écrit les événements en attente ; fsync au plus toutes les fsync_interval secondes"""
+        if self.file is None:
+            return
+        if self.buffer:
+            self.file.write(''.join(self.buffer))
+            self.buffer.clear()
+            self.file.flush()
+        now = time.monotonic()
+        if now - self.last_fsync >= self.fsync_interval:
+            os.fsync(self.file.fileno())
+            self.last_fsync = now
+
+    def needs_compaction(self, live_entries):
+        return self.events_since_compaction >= max(self.compact_min_events, 2 * live_entries)
+
+    def compact(self, completed_keys, done_keys, queued_urls):
+        """Réécrit le journal avec le seul état vivant, de façon atomique
+
+        queued_urls : couples (url, profondeur).
+        """
+        self.flush()
+        tmp_path = f"{self.path}.tmp"
+        entries = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key in completed_keys:
+                f.write(f"{self.COMPLETE}\t{key}\n")
+                entries += 1
+            for key in done_keys:
+                f.write(f"{self.DONE}\t{key}\n")
+                entries += 1
+            for url, depth in queued_urls:
+                f.write(f"{self.ENQUEUE}\t{depth}\t{url}\n")
+                entries += 1
+            f.flush()
+            os.fsync(f.fileno())
+        if self.file is not None:
+            self.file.close()
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.events_since_compaction = 0
+        self.last_fsync = time.monotonic()
+        logging.info(f"Journal compacté: {entries} entrées")
+
+    def replay(self):
+        """Relit le journal : retourne (clés traitées, clés abandonnées, (URL, profondeur) mises en file dans l'ordre)"""
+        completed, done, enqueued = set(), set(), []
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line.endswith('\n') or len(line) < 3 or line[1] != '\t':
+                    continue  # Ligne tronquée par un arrêt brutal
+                kind, value = line[0], line[2:-1]
+                if kind == self.ENQUEUE:
+                    depth, _, url = value.partition('\t')
+                    if url and depth.isdigit():
+                        enqueued.append((url, int(depth)))
+                    else:
+                        enqueued.append((value, 0))
+                elif kind == self.COMPLETE:
+                    completed.add(value)
+                elif kind == self.DONE:
+                    done.add(value)
+        self.events_since_compaction = len(completed) + len(done) + len(enqueued)
+        return completed, done, enqueued
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
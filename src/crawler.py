@@ -14,23 +14,76 @@ from src.pdf_processor import PDFProcessor
 from urllib.parse import urlparse
 from src.extractors import ContentExtractor
 from src.processors import URLProcessor
+from src.results import CrawlResult
+from src.scheduler import HostScheduler, ThroughputMonitor
+from src.frontier import Frontier
+from src.frontier_store import create_frontier_store
+from src.frontier_policy import FrontierPolicy
+from src.checkpoint import CrawlJournal
+from src.recrawl import RecrawlCache
+from src.extraction_pool import ExtractionPool
+from src.retry import RetryScheduler, TransientFetchError, parse_retry_after
+from src.output import create_output_writer
+from src.archive import create_archive
+from src.dedup import Deduplicator
+from src.robots import RobotsCache
+from src.sitemaps import SitemapReader
+from src.metrics import METRICS, configure_metrics
+import hashlib
 import requests
 import signal
-import pyfiglet  # Import pour l'ASCII art
+
+class ResponseTooLarge(Exception):
+    """Corps de réponse dépassant la taille maximale configurée pour son type"""
+
+
+# Erreurs réseau pendant la requête ou la lecture du corps, traitées comme temporaires
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
 
 class SafeCrawler:
     """Classe principale du crawler"""
+
+    # Nombre maximal d'URLs examinées en tête de file pour trouver un hôte disponible
+    SCHEDULER_SCAN_WINDOW = 200
+    # Attente (s) entre deux examens des URLs d'un hôte dont le robots.txt est en cours de récupération
+    ROBOTS_WAIT = 0.1
     
-    def __init__(self, config, session, content_extractor, url_processor, output_dir, resume=False):
+    def __init__(self, config, session, content_extractor, url_processor, output_dir, resume=False,
+                 pdf_processor=None, extraction_pool=None):
         self.config = config
         self.session = session
+        self.transport_stats = getattr(session, 'transport_stats', None)
         self.content_extractor = content_extractor
         self.url_processor = url_processor
         self.output_dir = output_dir
         self.resume = resume
+        # Mesures par étape ; point d'accès /metrics si metrics.port est défini
+        self.metrics_server = configure_metrics(self.config)
+        # Écriture différée de la sortie (fichiers texte, partitions JSONL ou WARC)
+        self.output = create_output_writer(self.config, self.output_dir, self.url_processor)
+        # Réponses brutes conservées pour une ré-extraction hors ligne (--replay)
+        self.archive = create_archive(self.config, self.output_dir)
+        self.robots = None
+        self.robots_executor = None  # threads de récupération des robots.txt, créés au premier nouvel hôte
+        if (self.config.get('robots') or {}).get('enabled', True):
+            self.robots = RobotsCache(self.config, self.session)
         
-        self.seen_urls = set()
-        self.queue = deque()
+        store = create_frontier_store(self.config, self.output_dir, self.resume)
+        self.frontier = Frontier(
+            self.url_processor,
+            self.config['crawler']['max_queue_size'],
+            store,
+            self.create_journal(store),
+            FrontierPolicy(self.config, self.robots)
+        )
+        self.checkpoint_interval = (self.config.get('checkpoint') or {}).get('interval', 1.0)
+        self.last_checkpoint = time.monotonic()
+        self.max_pages = self.config['crawler'].get('max_pages')
         self.start_time = time.time()
         
         self.setup_signal_handlers()
@@ -43,9 +96,31 @@ class SafeCrawler:
         self.file_handler = FileHandler(self.output_dir)
         logging.info("FileHandler initialisé")
         
-        self.pdf_processor = PDFProcessor()
+        # Pools fournis par un job multi-domaines (src/jobs.py) : partagés, fermés par leur propriétaire
+        self.owns_pools = pdf_processor is None
+        self.pdf_processor = pdf_processor if pdf_processor is not None else PDFProcessor(self.config)
         logging.info("PDFProcessor initialisé")
 
+        self.extraction_pool = extraction_pool if extraction_pool is not None else ExtractionPool(self.config)
+        self.pending_parses = {}  # future d'analyse -> CrawlResult en attente
+
+        self.recrawl_cache = None
+        if (self.config.get('incremental') or {}).get('enabled'):
+            self.recrawl_cache = RecrawlCache(os.path.join(self.output_dir, 'recrawl_cache.sqlite3'))
+            logging.info("Mode incrémental activé (requêtes conditionnelles)")
+
+        self.dedup = None
+        dedup_config = self.config.get('dedup') or {}
+        if dedup_config.get('content_addressed') or dedup_config.get('near_duplicates'):
+            self.dedup = Deduplicator(self.config, self.output_dir)
+
+        self.host_scheduler = HostScheduler(self.config, self.robots)
+        self.retry_scheduler = RetryScheduler(self.config, self.host_scheduler)
+        self.monitor = ThroughputMonitor(
+            self.config['crawler']['max_workers'],
+            self.config['crawler'].get('stats_interval', 10)
+        )
+
         self.step_counter = 0  # Compteur de pas pour l'affichage ASCII art
     
     def setup_signal_handlers(self):
@@ -55,22 +130,74 @@ class SafeCrawler:
     def signal_handler(self, signum, frame):
         logging.info("Arrêt gracieux du crawler...")
         self.save_state()
+        self.close_outputs()
         sys.exit(0)
 
+    def create_journal(self, store):
+        """Journal d'événements pour les frontières en mémoire (une frontière SQLite est déjà durable)"""
+        checkpoint_config = self.config.get('checkpoint') or {}
+        if store.persistent or not checkpoint_config.get('enabled', True):
+            return None
+        return CrawlJournal(
+            os.path.join(self.output_dir, 'crawler_journal.log'),
+            fsync_interval=checkpoint_config.get('fsync_interval', 5.0),
+            compact_min_events=checkpoint_config.get('compact_min_events', 100000)
+        )
+
     def save_initial_state(self):
         """Initialise l'état si ce n'est pas une reprise."""
-        self.seen_urls = set()
-        self.queue = deque()
-        self.queue.append(self.config['domain']['start_url'])
+        if self.frontier.journal is not None and self.frontier.journal.file is None:
+            self.frontier.journal.open(reset=True)
+        start_url = self.config['domain']['start_url']
+        if self.robots is not None:
+            # robots.txt de l'hôte de départ chargé pendant l'amorçage, avant la première URL
+            self.robots.rules_for(start_url)
+        if not self.frontier.push(start_url):
+            logging.warning(f"URL de départ refusée (robots.txt ou politique de la frontière): {start_url}")
+        # Crawl distribué : les sitemaps ne sont lus que par le worker 0
+        seeder = not self.frontier.store.shared or self.frontier.store.worker_index == 0
+        if seeder and (self.config.get('sitemaps') or {}).get('enabled', True):
+            self.seed_from_sitemaps(start_url)
         logging.info("État initialisé")
 
+    def seed_from_sitemaps(self, start_url):
+        """Amorce la frontière avec les URLs des sitemaps (déclarés dans robots.txt, sinon /sitemap.xml)"""
+        reader = SitemapReader(self.config, self.session)
+        sitemap_urls = (self.robots.sitemaps(start_url) if self.robots is not None else []) \
+            or [reader.default_sitemap(start_url)]
+        seeded = 0
+        for url, _ in reader.read(sitemap_urls):
+            link = self.url_processor.process_link(url)
+            if link is not None and self.frontier.push(link[0], 0, link[1]):
+                seeded += 1
+        reader.log_stats()
+        logging.info(f"Frontière amorcée: {seeded} URLs issues des sitemaps")
+
+
     def save_state(self):
         try:
-            state = {
-                'seen_urls': list(self.seen_urls),
-                'queue': list(self.queue),
-                'timestamp': datetime.now().isoformat()
-            }
+            # Les pages marquées terminées doivent être sur disque avant le point de sauvegarde
+            self.output.flush()
+            if self.archive is not None:
+                self.archive.flush()
+            if self.recrawl_cache is not None:
+                self.recrawl_cache.flush()
+            if self.dedup is not None:
+                self.dedup.flush()
+            if self.frontier.store.persistent or self.frontier.journal is not None:
+                # La frontière sur disque ou le journal compacté font foi : inutile de les sérialiser
+                self.frontier.checkpoint(force=True)
+                state = {
+                    'frontier': 'persistent' if self.frontier.store.persistent else 'journal',
+                    'stats': self.frontier.stats(),
+                    'timestamp': datetime.now().isoformat()
+                }
+            else:
+                state = {
+                    'seen_urls': list(self.frontier.completed_urls()),
+                    'queue': list(self.frontier.queued_urls()),
+                    'timestamp': datetime.now().isoformat()
+                }
             with open(os.path.join(self.output_dir, 'crawler_state.json'), 'w', encoding='utf-8') as f:
                 json.dump(state, f, indent=2)
             logging.info("État sauvegardé")
@@ -79,12 +206,29 @@ class SafeCrawler:
 
     def load_state(self):
         try:
+            if self.frontier.store.persistent:
+                if self.frontier or self.frontier.completed_count():
+                    logging.info(f"État chargé depuis la frontière persistante ({len(self.frontier)} URLs en file)")
+                else:
+                    self.save_initial_state()
+                return
+            journal = self.frontier.journal
+            if journal is not None and journal.exists():
+                self.frontier.restore_from_journal()
+                journal.open()
+                logging.info(f"État rejoué depuis le journal ({len(self.frontier)} URLs en file)")
+                return
             state_path = os.path.join(self.output_dir, 'crawler_state.json')
+            state = {}
             if os.path.exists(state_path):
                 with open(state_path, 'r', encoding='utf-8') as f:
                     state = json.load(f)
-                self.seen_urls = set(state.get('seen_urls', []))
-                self.queue.extend(state.get('queue', []))
+            if 'queue' in state:
+                # Ancien format : état complet sérialisé en JSON
+                if journal is not None:
+                    journal.open(reset=True)
+                self.frontier.restore(state.get('seen_urls', []), state.get('queue', []))
+                self.frontier.checkpoint(force=True)
                 logging.info("État chargé")
             else:
                 self.save_initial_state()
@@ -93,8 +237,11 @@ class SafeCrawler:
             self.save_initial_state()
 
     def safe_request(self, url, method='GET', **kwargs):
-        for attempt in range(self.config['timeouts']['max_retries']):
-            try:
+        """Une seule tentative : un échec temporaire lève TransientFetchError et l'URL est
+        reprogrammée par le RetryScheduler au lieu de bloquer le worker"""
+        try:
+            # Temps jusqu'aux en-têtes de réponse (le corps est lu en flux par process_response)
+            with METRICS.time('request'):
                 response = self.session.request(
                     method,
                     url,
@@ -105,189 +252,565 @@ class SafeCrawler:
                     verify=False,
                     **kwargs
                 )
-                response.raise_for_status()
-                return response
-            except requests.exceptions.HTTPError as http_err:
-                if http_err.response and http_err.response.status_code == 404:
-                    logging.error(f"Page non trouvée: {url}")
-                    break  # Ne pas réessayer pour les erreurs 404
-                elif attempt == self.config['timeouts']['max_retries'] - 1:
-                    logging.error(f"Max retries atteints pour {url}: {str(http_err)}")
-                    raise
-                else:
-                    logging.warning(f"Retrying {url} ({attempt + 1}/{self.config['timeouts']['max_retries']}) due to error: {str(http_err)}")
-                    time.sleep(2 ** attempt)
-            except Exception as e:
-                if attempt == self.config['timeouts']['max_retries'] - 1:
-                    logging.error(f"Max retries atteints pour {url}: {str(e)}")
-                    raise
-                logging.warning(f"Retrying {url} ({attempt + 1}/{self.config['timeouts']['max_retries']}) due to error: {str(e)}")
-                time.sleep(2 ** attempt)
+        except TRANSIENT_ERRORS as e:
+            METRICS.error('request', type(e).__name__)
+            raise TransientFetchError(str(e)) from e
+        METRICS.inc('responses', status=f"{response.status_code // 100}xx")
+
+        if self.retry_scheduler.is_retryable_status(response.status_code):
+            METRICS.error('request', f"HTTP {response.status_code}")
+            retry_after = None
+            if response.status_code in (429, 503):
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            response.close()
+            raise TransientFetchError(f"HTTP {response.status_code}", response.status_code, retry_after)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as http_err:
+            METRICS.error('request', f"HTTP {response.status_code}")
+            if response.status_code == 404:
+                logging.error(f"Page non trouvée: {url}")
+            else:
+                logging.error(f"Erreur HTTP pour {url}: {str(http_err)}")
+            response.close()
+            return None
+        return response
 
     def process_url(self, url):
         try:
             if not self.url_processor.should_process_url(url):
                 return None
 
-            response = self.safe_request(url)
-            
-            content_type = response.headers.get('Content-Type', '').lower()
-            content_main_type = content_type.split(';')[0]  # Pour gérer les paramètres comme charset
-
-            if 'application/pdf' in content_main_type:
-                pdf_content = response.content  # Le contenu binaire du PDF
-                text = self.pdf_processor.extract_text_from_pdf(pdf_content)
-                return ('pdf', url, (text, pdf_content))
-            elif 'text/html' in content_main_type:
-                text = self.content_extractor.extract_text_from_html(response.content)
-                return ('html', url, text)
-            elif content_main_type.startswith('image/'):
-                return ('image', url, (response.content, content_type))
-            elif 'application/msword' in content_main_type or \
-                 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_main_type:
-                return ('document', url, response.content)
-            else:
-                logging.info(f"Type de contenu non supporté pour {url}: {content_type}")
+            response = self.safe_request(url, stream=True, headers=self.conditional_headers(url))
+            if response is None:
                 return None
+            try:
+                return self.process_response(url, response)
+            finally:
+                response.close()
 
+        except TransientFetchError as e:
+            return CrawlResult('retry', url, e)
+        except TRANSIENT_ERRORS as e:
+            # Connexion interrompue pendant la lecture du corps
+            METRICS.error('download', type(e).__name__)
+            return CrawlResult('retry', url, TransientFetchError(str(e)))
+        except ResponseTooLarge as e:
+            METRICS.error('download', 'ResponseTooLarge')
+            logging.warning(f"Téléchargement interrompu {url}: {str(e)}")
+            return None
         except Exception as e:
+            METRICS.error('process', type(e).__name__)
             logging.error(f"Erreur traitement {url}: {str(e)}")
             return None
 
-    def save_content(self, url, content_type, content):
-        """Sauvegarde le contenu extrait avec métadonnées"""
+    def process_response(self, url, response):
+        """Construit le CrawlResult d'une réponse en flux : une seule lecture du corps, une seule analyse"""
+        # Temps jusqu'aux en-têtes de réponse : signal de charge du serveur pour la concurrence adaptative
+        latency = response.elapsed.total_seconds()
+        if response.status_code == 304:
+            metadata = self.response_metadata(response.status_code, response.url, response.headers, latency)
+            return self.build_result(url, 'not_modified', metadata)
+
+        content_type = response.headers.get('Content-Type', '').lower()
+        kind = self.classify_content(content_type)
+        if kind is None:
+            logging.info(f"Type de contenu non supporté pour {url}: {content_type}")
+            return None
+
+        self.check_declared_size(kind, response.headers)
+        metadata = self.response_metadata(response.status_code, response.url, response.headers, latency)
+        chunk_size = self.config['crawler']['chunk_size']
+        if kind == 'html':
+            with METRICS.time('download'):
+                body, metadata['digest'] = self.read_body(kind, response.iter_content(chunk_size))
+            metadata['content_length'] = len(body)
+            self.archive_response(url, kind, metadata, response.status_code, response.reason, response.headers, body=body)
+            return self.build_result(url, kind, metadata, body=body)
+
+        with METRICS.time('download'):
+            path, metadata['content_length'], metadata['digest'] = self.stream_to_file(
+                url, kind, content_type, response.iter_content(chunk_size)
+            )
+        self.archive_response(url, kind, metadata, response.status_code, response.reason, response.headers, path=path)
+        return self.build_result(url, kind, metadata, path=path)
+
+    @staticmethod
+    def classify_content(content_type):
+        """Catégorie de traitement d'un Content-Type, ou None s'il n'est pas pris en charge"""
+        content_main_type = content_type.split(';')[0].strip()  # Pour gérer les paramètres comme charset
+        if 'application/pdf' in content_main_type:
+            return 'pdf'
+        elif 'text/html' in content_main_type:
+            return 'html'
+        elif content_main_type.startswith('image/'):
+            return 'image'
+        elif 'application/msword' in content_main_type or \
+             'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_main_type:
+            return 'document'
+        return None
+
+    @staticmethod
+    def response_metadata(status_code, final_url, headers, latency=None):
+        return {
+            'status_code': status_code,
+            'final_url': str(final_url),
+            'content_type': headers.get('Content-Type', '').lower(),
+            'content_length': 0,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'latency': latency,
+        }
+
+    def max_size_for(self, kind):
+        return (self.config['crawler'].get('max_sizes') or {}).get(kind)
+
+    def check_declared_size(self, kind, headers):
+        """Interrompt avant toute lecture si le Content-Length annoncé dépasse la limite du type"""
+        max_size = self.max_size_for(kind)
+        declared = headers.get('Content-Length')
+        if max_size and declared and declared.isdigit() and int(declared) > max_size:
+            raise ResponseTooLarge(f"{kind} de {declared} octets annoncé (limite {max_size})")
+
+    def read_body(self, kind, chunks):
+        """Lit un corps en mémoire en appliquant la limite de taille du type ; retourne (corps, empreinte)"""
+        max_size = self.max_size_for(kind)
+        digest = hashlib.sha256()
+        parts = []
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise ResponseTooLarge(f"{kind} dépasse {max_size} octets")
+            digest.update(chunk)
+            parts.append(chunk)
+        return b''.join(parts), digest.hexdigest()
+
+    def download_path(self, url, kind, content_type):
+        """Chemin définitif d'un fichier téléchargé dans files/<catégorie>/"""
+        filename = self.url_processor.sanitize_filename(url)
+        if kind == 'pdf':
+            category, extension = 'document', 'pdf'
+        elif kind == 'image':
+            # Déterminer l'extension à partir du Content-Type
+            category, extension = 'image', content_type.split(';')[0].split('/')[-1].strip()
+        elif 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_type:
+            category, extension = 'document', 'docx'
+        else:
+            category, extension = 'document', 'doc'
+        return os.path.join(self.file_handler.files_dir, category, f"{filename}.{extension}")
+
+    def stream_to_file(self, url, kind, content_type, chunks):
+        """Écrit le corps par blocs dans un fichier temporaire, renommé atomiquement une fois complet
+
+        Retourne (chemin, taille, empreinte). Un fichier identique à celui du crawl précédent
+        n'est pas réécrit.
+        """
+        final_path = self.download_path(url, kind, content_type)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        tmp_path = f"{final_path}.part"
+        max_size = self.max_size_for(kind)
+        digest = hashlib.sha256()
+        size = 0
         try:
-            filename = self.url_processor.sanitize_filename(url)
-            
-            if content_type == 'html':
-                filepath = os.path.join(self.output_dir, 'text', f"{filename}.txt")
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                formatted_content = f"""URL: {url}
-Timestamp: {timestamp}
-Content Type: {content_type}
-{'=' * 100}
-
-{content}
-
-{'=' * 100}
-Fin du contenu de : {url}"""
-                with open(filepath, "w", encoding='utf-8') as f:
-                    f.write(formatted_content)
-                logging.info(f"Contenu sauvegardé: {url} -> {filepath}")
-            elif content_type == 'pdf':
-                text, pdf_content = content  # Déballer le tuple
-                # Sauvegarder le texte extrait
-                txt_filepath = os.path.join(self.output_dir, 'text', f"{filename}.txt")
-                os.makedirs(os.path.dirname(txt_filepath), exist_ok=True)
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                formatted_content = f"""URL: {url}
-Timestamp: {timestamp}
-Content Type: {content_type}
-{'=' * 100}
-
-{text}
-
-{'=' * 100}
-Fin du contenu de : {url}"""
-                with open(txt_filepath, "w", encoding='utf-8') as f:
-                    f.write(formatted_content)
-                logging.info(f"Texte extrait sauvegardé : {url} -> {txt_filepath}")
-                
-                # Sauvegarder le PDF original
-                pdf_filepath = os.path.join(self.file_handler.files_dir, 'document', f"{filename}.pdf")
-                os.makedirs(os.path.dirname(pdf_filepath), exist_ok=True)
-                with open(pdf_filepath, "wb") as f:
-                    f.write(pdf_content)
-                logging.info(f"PDF original sauvegardé : {url} -> {pdf_filepath}")
-            elif content_type == 'image':
-                image_content, content_type_header = content  # Déballer le tuple
-                # Déterminer l'extension à partir du Content-Type
-                extension = content_type_header.split('/')[-1]
-                filepath = os.path.join(self.file_handler.files_dir, 'image', f"{filename}.{extension}")
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                with open(filepath, "wb") as f:
-                    f.write(image_content)
-                logging.info(f"Image sauvegardée: {url} -> {filepath}")
-            elif content_type == 'document':
-                # Déterminer l'extension à partir du Content-Type
-                if 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_type:
-                    extension = 'docx'
-                else:
-                    extension = 'doc'
-                filepath = os.path.join(self.file_handler.files_dir, 'document', f"{filename}.{extension}")
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                with open(filepath, "wb") as f:
-                    f.write(content)
-                logging.info(f"Document sauvegardé: {url} -> {filepath}")
-            else:
-                filepath = os.path.join(self.output_dir, 'text', f"{filename}.txt")
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                with open(filepath, "w", encoding='utf-8') as f:
-                    f.write(content)
-                logging.info(f"Contenu texte sauvegardé: {url} -> {filepath}")
-        except Exception as e:
-            logging.error(f"Erreur sauvegarde {url}: {str(e)}")
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise ResponseTooLarge(f"{kind} dépasse {max_size} octets")
+                    digest.update(chunk)
+                    f.write(chunk)
+            final_path = self.finalize_download(url, tmp_path, final_path, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return final_path, size, digest.hexdigest()
+
+    def finalize_download(self, url, tmp_path, final_path, digest):
+        """Donne son nom définitif au fichier temporaire ; retourne le chemin du fichier conservé"""
+        if self.dedup is not None and self.dedup.content_addressed:
+            return self.dedup.store_file(tmp_path, digest, os.path.splitext(final_path)[1])
+        if os.path.exists(final_path) and self.previous_digest(url) == digest:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+        return final_path
 
-    def handle_result(self, content_type, url, content):
+    def archive_response(self, url, kind, metadata, status, reason, headers, body=None, path=None):
+        """Dépose la réponse brute (en-têtes et corps décodé) dans l'archive, si elle est activée pour ce type"""
+        if self.archive is None or kind not in self.archive.backend.kinds:
+            return
+        self.archive.submit({
+            'url': url,
+            'kind': kind,
+            'status': status,
+            'reason': reason,
+            'headers': list(headers.items()),
+            'metadata': dict(metadata),
+            'raw': body,
+            'path': path,
+        })
+
+    def conditional_headers(self, url):
+        if self.recrawl_cache is None:
+            return {}
+        return self.recrawl_cache.conditional_headers(self.url_processor.normalize_url(url))
+
+    def previous_digest(self, url):
+        if self.recrawl_cache is None:
+            return None
+        entry = self.recrawl_cache.get(self.url_processor.normalize_url(url))
+        return entry['digest'] if entry else None
+
+    def build_result(self, url, kind, metadata, body=None, path=None):
+        """Extraction à partir du corps HTML en mémoire ou du fichier téléchargé"""
+        if self.recrawl_cache is not None:
+            unchanged = self.unchanged_result(url, kind, metadata)
+            if unchanged is not None:
+                return unchanged
+        if self.dedup is not None:
+            metadata['duplicate_of'] = self.dedup.register(url, metadata.get('digest'), path, metadata.get('content_length', 0))
+            if metadata['duplicate_of'] and (kind != 'html' or self.dedup.skip_links):
+                # Contenu identique à une page déjà traitée : ni extraction ni sauvegarde
+                return CrawlResult('duplicate', url, None, metadata=metadata)
+        if kind == 'html':
+            if self.extraction_pool.enabled:
+                # L'analyse est confiée au pool de processus par la boucle principale
+                return CrawlResult('raw_html', url, body, metadata=metadata)
+            # Les liens sont résolus par rapport à l'URL finale (après redirections)
+            text, links = self.content_extractor.parse_html(body, metadata.get('final_url') or url)
+            raw = body if self.output.wants_raw else None
+            return CrawlResult('html', url, text, links=links, metadata=metadata, raw=raw)
+        elif kind == 'pdf':
+            with METRICS.time('pdf'):
+                text = self.pdf_processor.extract_text_from_pdf(path)
+            return CrawlResult('pdf', url, (text, path), metadata=metadata)
+        elif kind == 'image':
+            return CrawlResult('image', url, (path, metadata['content_type']), metadata=metadata)
+        return CrawlResult('document', url, path, metadata=metadata)
+
+    def unchanged_result(self, url, kind, metadata):
+        """Résultat sans extraction pour une réponse 304 ou un corps identique au crawl précédent"""
+        entry = self.recrawl_cache.get(self.url_processor.normalize_url(url))
+        if kind == 'not_modified':
+            self.recrawl_cache.record_not_modified(entry)
+        elif entry is not None and entry['digest'] and entry['digest'] == metadata.get('digest'):
+            self.recrawl_cache.record_unchanged()
+        else:
+            return None
+        if entry is not None:
+            # Les validateurs non renvoyés par le serveur sont conservés
+            for field in ('etag', 'last_modified', 'digest', 'content_length'):
+                metadata[field] = metadata.get(field) or entry[field]
+        return CrawlResult('unchanged', url, None, links=entry['links'] if entry else [], metadata=metadata)
+
+    def save_content(self, url, content_type, content, metadata=None, raw=None):
+        """Confie le contenu extrait et ses métadonnées à l'écrivain de sortie (src/output.py)"""
+        # Attente éventuelle sur la file bornée de l'écrivain : mesure de la contre-pression du disque
+        with METRICS.time('save'):
+            self.output.submit({
+                'url': url,
+                'content_type': content_type,
+                'content': content,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'metadata': metadata or {},
+                'raw': raw,
+            })
+
+    def handle_result(self, result):
+        url = result.url
         try:
-            normalized_url = self.url_processor.normalize_url(url)
-            if normalized_url not in self.seen_urls:
-                self.seen_urls.add(normalized_url)
-                self.save_content(url, content_type, content)
+            depth = self.frontier.depth_of(url)
+            if self.frontier.mark_completed(url):
+                METRICS.inc('pages', type=result.content_type)
+                if self.dedup is not None:
+                    self.check_duplicate(result)
+                if result.content_type not in ('unchanged', 'duplicate'):
+                    self.save_content(url, result.content_type, result.content, result.metadata, result.raw)
+                if self.recrawl_cache is not None:
+                    self.recrawl_cache.update(self.url_processor.normalize_url(url), result.metadata, result.links)
                 
-                if content_type == 'html':
-                    self.queue_new_links(url)
+                if result.links:
+                    self.queue_new_links(result.links, depth + 1)
+
+                self.step_counter += 1
+                # Tous les 60 pas, afficher l'ASCII art
+                if self.step_counter % 60 == 0:
+                    self.display_ascii_art()
         except Exception as e:
+            METRICS.error('result', type(e).__name__)
             logging.error(f"Erreur traitement résultat {url}: {str(e)}")
 
-    def queue_new_links(self, url):
+    def check_duplicate(self, result):
+        """Doublons exacts et quasi-doublons : sauvegarde et liens sortants selon la section dedup"""
+        metadata = result.metadata
+        if metadata.get('duplicate_of'):
+            logging.info(f"Doublon de {metadata['duplicate_of']}: {result.url}")
+            result.content_type = 'duplicate'
+        elif self.dedup.near_duplicates and result.content_type == 'html':
+            metadata['near_duplicate_of'] = self.dedup.check_near_duplicate(result.url, result.content)
+            if not metadata['near_duplicate_of']:
+                return
+            logging.info(f"Quasi-doublon de {metadata['near_duplicate_of']}: {result.url}")
+            if not self.dedup.save_near_duplicates:
+                result.content_type = 'duplicate'
+        else:
+            return
+        if self.dedup.skip_links:
+            result.links = []
+
+    def queue_new_links(self, links, depth=1):
+        """Ajoute à la frontière les liens extraits lors du traitement de la page"""
         try:
-            response = self.safe_request(url)
-            links = self.content_extractor.extract_links(response.content, url)
-            
             for link in links:
-                normalized_link = self.url_processor.normalize_url(link)
-                if normalized_link not in self.seen_urls and self.url_processor.should_process_url(link):
-                    self.queue.append(link)
+                # Une seule analyse par lien : URL canonique (sans paramètres de suivi) et clé
+                processed = self.url_processor.process_link(link)
+                if processed is not None:
+                    # Les URLs interdites par robots.txt sont écartées par la politique, avant toute requête
+                    self.frontier.push(processed[0], depth, processed[1])
         except Exception as e:
-            logging.error(f"Erreur extraction liens {url}: {str(e)}")
+            logging.error(f"Erreur ajout des liens à la file: {str(e)}")
 
     def crawl(self):
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.config['crawler']['max_workers']
-        ) as executor:
-            while self.queue and len(self.seen_urls) < self.config['crawler']['max_queue_size']:
+        """Ordonnanceur continu : garde max_workers requêtes en vol et remplit chaque créneau libéré"""
+        max_workers = self.config['crawler']['max_workers']
+        in_flight = {}  # future -> (url, hôte)
+        # Threads nommés : reconnaissables dans py-spy dump/top et dans les piles échantillonnées
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='Fetch') as executor:
+            while self.has_pending_work(in_flight) and not self.page_limit_reached():
                 try:
-                    urls_batch = []
-                    for _ in range(min(self.config['crawler']['max_workers'], len(self.queue))):
-                        if self.queue:
-                            urls_batch.append(self.queue.popleft())
-
-                    futures = {executor.submit(self.process_url, url): url for url in urls_batch}
-                    
-                    for future in concurrent.futures.as_completed(futures):
-                        url = futures[future]
-                        try:
-                            result = future.result()
-                            if result:
-                                self.handle_result(*result)
-                                self.step_counter += 1
-                                # Tous les 5 pas, afficher l'ASCII art
-                                if self.step_counter % 60 == 0:
-                                    self.display_ascii_art()
-                        except Exception as e:
-                            logging.error(f"Erreur traitement {url}: {str(e)}")
-
-                    time.sleep(random.uniform(
-                        self.config['crawler']['delay_min'],
-                        self.config['crawler']['delay_max']
-                    ))
+                    self.monitor.sample(len(in_flight))
+                    self.dispatch_ready_urls(
+                        lambda url: executor.submit(self.process_url, url), in_flight, max_workers
+                    )
+
+                    if not in_flight and not self.pending_parses:
+                        # Tous les hôtes en file sont en période de politesse, ou les URLs attendent un nouvel essai
+                        wait_time = self.time_until_work()
+                        time.sleep(wait_time if wait_time is not None else 0.1)
+                        continue
+
+                    wait_time = self.time_until_work()
+                    done, _ = concurrent.futures.wait(
+                        list(in_flight) + list(self.pending_parses),
+                        timeout=min(wait_time, 1.0) if wait_time is not None else 1.0,
+                        return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    self.monitor.sample(len(in_flight))
+
+                    for future in done:
+                        if future in in_flight:
+                            url, host = in_flight.pop(future)
+                            self.complete_fetch(url, host, future)
+                        else:
+                            self.complete_parse(future)
+
+                    self.after_iteration(len(in_flight))
 
                 except Exception as e:
                     logging.error(f"Erreur boucle principale: {str(e)}")
                     continue
 
+            self.abandon_in_flight(in_flight)
+
+        self.finish_crawl()
+
+    def finish_crawl(self):
+        """Fin de crawl commune aux moteurs : statistiques et arrêt des pools auxiliaires"""
+        self.log_crawl_stats()
+        if self.transport_stats is not None:
+            self.transport_stats.log_stats()
+        if METRICS.enabled:
+            logging.info(METRICS.summary())
+            export_path = (self.config.get('metrics') or {}).get('export')
+            if export_path:
+                METRICS.export(export_path)
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        if self.owns_pools:
+            self.pdf_processor.close()
+            self.extraction_pool.close()
+        self.close_outputs()
+
+    def log_crawl_stats(self):
+        """Statistiques propres au domaine crawlé : frontière, nouveaux essais, cache, doublons, robots.txt"""
+        self.frontier.log_stats()
+        self.retry_scheduler.log_stats()
+        if self.host_scheduler.adaptive is not None:
+            self.host_scheduler.adaptive.log_stats()
+        if self.recrawl_cache is not None:
+            self.recrawl_cache.log_stats()
+        if self.dedup is not None:
+            self.dedup.log_stats()
+        if self.robots is not None:
+            self.robots.log_stats()
+
+    def close_outputs(self):
+        if self.robots_executor is not None:
+            self.robots_executor.shutdown(wait=False, cancel_futures=True)
+        self.output.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def complete_fetch(self, url, host, future):
+        """Intègre une requête terminée (future ou tâche asyncio) et libère le créneau de l'hôte"""
+        self.host_scheduler.release(host)
+        self.monitor.record_completed()
+        try:
+            result = future.result()
+            if not result:
+                self.retry_scheduler.forget(url)
+                self.frontier.mark_failed(url)
+            elif result.content_type == 'retry':
+                self.host_scheduler.record_failure(host, result.content.status)
+                # L'URL reste en vol dans la frontière jusqu'à son nouvel essai
+                if not self.retry_scheduler.schedule(url, result.content):
+                    self.frontier.mark_failed(url)
+            else:
+                self.host_scheduler.record_success(host, (result.metadata or {}).get('latency'))
+                self.retry_scheduler.record_success(url)
+                if result.content_type == 'raw_html':
+                    self.submit_parse(result)
+                else:
+                    self.handle_result(result)
+        except Exception as e:
+            logging.error(f"Erreur traitement {url}: {str(e)}")
+            self.frontier.mark_failed(url)
+
+    def submit_parse(self, result):
+        """Confie l'analyse d'une page brute au pool d'extraction"""
+        future = self.extraction_pool.submit(result.content, result.metadata.get('final_url') or result.url)
+        self.pending_parses[future] = result
+        return future
+
+    def complete_parse(self, future):
+        """Intègre une analyse terminée par le pool d'extraction"""
+        result = self.pending_parses.pop(future)
+        try:
+            if self.output.wants_raw:
+                result.raw = result.content
+            # Durée mesurée dans le processus d'analyse : son registre de mesures n'est pas celui-ci
+            result.content, result.links, elapsed = future.result()
+            METRICS.observe('parse', elapsed)
+            result.content_type = 'html'
+            self.handle_result(result)
+        except Exception as e:
+            METRICS.error('parse', type(e).__name__)
+            logging.error(f"Erreur analyse {result.url}: {str(e)}")
+            self.frontier.mark_failed(result.url)
+
+    def after_iteration(self, in_flight_count):
+        """Travail périodique de la boucle : statistiques et point de sauvegarde incrémental"""
+        self.record_queue_depths(in_flight_count)
+        if self.monitor.maybe_log(len(self.frontier), in_flight_count, len(self.pending_parses)):
+            if METRICS.enabled:
+                logging.info(METRICS.summary())
+            self.frontier.log_stats()
+            if self.retry_scheduler.retries_scheduled:
+                self.retry_scheduler.log_stats()
+        self.maybe_checkpoint()
+
+    def maybe_checkpoint(self):
+        """Point de sauvegarde incrémental de la frontière toutes les checkpoint.interval secondes"""
+        now = time.monotonic()
+        if now - self.last_checkpoint >= self.checkpoint_interval:
+            self.frontier.checkpoint()
+            self.last_checkpoint = now
+
+    def record_queue_depths(self, in_flight_count):
+        METRICS.set_gauge('queue_depth', len(self.frontier), queue='frontier')
+        METRICS.set_gauge('queue_depth', in_flight_count, queue='in_flight')
+        METRICS.set_gauge('queue_depth', len(self.pending_parses), queue='parse')
+        METRICS.set_gauge('queue_depth', len(self.retry_scheduler), queue='retry')
+        METRICS.set_gauge('queue_depth', self.output.queue.qsize(), queue='output')
+        METRICS.set_gauge('pages_completed', self.frontier.completed_count())
+
+    def abandon_in_flight(self, in_flight):
+        """Limite atteinte : les URLs encore en vol sont remises en file pour une reprise"""
+        for future in list(in_flight) + list(self.pending_parses):
+            future.cancel()
+        self.frontier.requeue(
+            [url for url, _ in in_flight.values()] + [result.url for result in self.pending_parses.values()]
+            + self.retry_scheduler.drain()
+        )
+        self.pending_parses.clear()
+
+    def has_pending_work(self, in_flight):
+        return bool(
+            self.frontier or in_flight or self.pending_parses or self.retry_scheduler
+            or self.frontier.awaiting_peers()
+        )
+
+    def time_until_work(self):
+        """Attente avant qu'une URL en file ou en attente de nouvel essai puisse partir"""
+        waits = [
+            wait for wait in (
+                self.host_scheduler.time_until_ready(self.queued_hosts()),
+                self.retry_scheduler.time_until_due()
+            )
+            if wait is not None
+        ]
+        return min(waits) if waits else None
+
+    def dispatch_ready_urls(self, submit, in_flight, max_slots):
+        """Soumet les URLs dont l'hôte est disponible, sans dépasser le nombre de créneaux"""
+        postponed = []
+        scanned = 0
+        now = time.monotonic()
+        due = self.retry_scheduler.pop_due(now)
+        if due:
+            # Les URLs arrivées à échéance repassent en tête de file, sous la politesse habituelle
+            self.frontier.requeue(due)
+        if self.extraction_pool.saturated(len(self.pending_parses)):
+            # Contre-pression : l'étage d'analyse est plein
+            return
+        if self.max_pages is not None:
+            # Les URLs en cours (téléchargement, analyse, nouvel essai) comptent dans la limite de pages
+            remaining = self.max_pages - self.frontier.completed_count() - len(self.frontier.in_flight)
+            max_slots = min(max_slots, len(in_flight) + max(remaining, 0))
+        while self.frontier and len(in_flight) < max_slots and scanned < self.SCHEDULER_SCAN_WINDOW:
+            url = self.frontier.pop()
+            scanned += 1
+            host = self.host_scheduler.host_of(url)
+            if not self.host_scheduler.is_ready(host, now):
+                postponed.append(url)
+                continue
+            if self.robots is not None:
+                allowed = self.robots.allowed(url)
+                if allowed is None:
+                    # Hôte sans robots.txt chargé : requête lancée hors de la boucle, ses URLs attendent
+                    self.request_robots(url)
+                    self.host_scheduler.defer(host, now + self.ROBOTS_WAIT)
+                    postponed.append(url)
+                    continue
+                if not allowed:
+                    self.frontier.mark_failed(url)
+                    continue
+            self.host_scheduler.acquire(host)
+            in_flight[submit(url)] = (url, host)
+        # Les URLs reportées reprennent leur place en tête de file
+        self.frontier.requeue(postponed)
+
+    def request_robots(self, url):
+        """Récupère le robots.txt de l'hôte de url sur un thread dédié, s'il n'est pas déjà demandé"""
+        robots_url = self.robots.start_fetch(url)
+        if robots_url is None:
+            return
+        if self.robots_executor is None:
+            self.robots_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='Robots')
+        self.robots_executor.submit(self.robots.load, robots_url)
+
+    def queued_hosts(self):
+        return {
+            self.host_scheduler.host_of(url)
+            for url in self.frontier.peek(self.SCHEDULER_SCAN_WINDOW)
+        }
+
+    def page_limit_reached(self):
+        return self.max_pages is not None and self.frontier.completed_count() >= self.max_pages
+
     def display_ascii_art(self):
+        import pyfiglet
         ascii_art = pyfiglet.figlet_format("Your crawling is in process")
         print(ascii_art)
@@ -0,0 +1,206 @@
+# src/dedup.py
+from src.constants import *
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def simhash(text, shingle_size=3):
+    """Empreinte SimHash 64 bits du texte, calculée sur des séquences de shingle_size mots
+
+    Deux textes presque identiques ont des empreintes qui ne diffèrent que de quelques bits.
+    Retourne (empreinte, nombre de mots).
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return 0, 0
+    shingles = {
+        ' '.join(words[i:i + shingle_size])
+        for i in range(max(len(words) - shingle_size + 1, 1))
+    }
+    bits = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for shingle in shingles
+    ]
+    # Vote par position de bit : majorité de 1 parmi les empreintes des séquences
+    half = len(bits) / 2
+    fingerprint = 0
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count('1') > half)
+    return fingerprint, len(words)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """Index des empreintes SimHash permettant de retrouver une page à max_distance bits près
+
+    L'empreinte est découpée en max_distance + 1 bandes : deux empreintes distantes d'au
+    plus max_distance bits ont au moins une bande identique (principe des tiroirs), seules
+    les pages partageant une bande sont donc comparées.
+    """
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self.band_mask = (1 << self.band_bits) - 1
+        self.tables = [{} for _ in range(self.bands)]
+        self.size = 0
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> (i * self.band_bits)) & self.band_mask for i in range(self.bands)]
+
+    def find(self, fingerprint):
+        for table, key in zip(self.tables, self._keys(fingerprint)):
+            for other, url in table.get(key, ()):
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, fingerprint, url):
+        for table, key in zip(self.tables, self._keys(fingerprint)):
+            table.setdefault(key, []).append((fingerprint, url))
+        self.size += 1
+
+
+class Deduplicator:
+    """Stockage adressé par contenu et détection des doublons, décrits par la section dedup
+
+    Les fichiers téléchargés sont rangés sous blobs/<aa>/<sha256>.<ext> : un contenu servi
+    sous plusieurs URLs n'est écrit qu'une fois. Le manifeste SQLite (manifest.sqlite3)
+    associe chaque URL à son empreinte, à son blob et, le cas échéant, à l'URL dont elle
+    est le doublon exact ou quasi exact (SimHash du texte extrait). Il est relu à la
+    reprise d'un crawl.
+    """
+
+    def __init__(self, config, output_dir):
+        dedup_config = config.get('dedup') or {}
+        self.content_addressed = dedup_config.get('content_addressed', False)
+        self.near_duplicates = dedup_config.get('near_duplicates', False)
+        self.min_words = dedup_config.get('min_words', 50)
+        self.skip_links = dedup_config.get('skip_links', False)
+        self.save_near_duplicates = dedup_config.get('save_near_duplicates', True)
+        self.blobs_dir = os.path.join(output_dir, 'blobs')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(output_dir, 'manifest.sqlite3'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, path TEXT, size INTEGER, first_url TEXT, refs INTEGER)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "url TEXT PRIMARY KEY, digest TEXT, simhash INTEGER, duplicate_of TEXT, near_duplicate_of TEXT)"
+        )
+        self.pending_writes = 0
+        self.duplicates = 0
+        self.near_duplicate_count = 0
+        self.bytes_saved = 0
+        self.index = NearDuplicateIndex(dedup_config.get('max_distance', 3))
+        if self.near_duplicates:
+            for url, fingerprint in self.conn.execute(
+                "SELECT url, simhash FROM urls WHERE simhash IS NOT NULL AND near_duplicate_of IS NULL"
+            ):
+                self.index.add(fingerprint & 0xFFFFFFFFFFFFFFFF, url)
+            if self.index.size:
+                logging.info(f"Dédoublonnage: {self.index.size} empreintes SimHash rechargées")
+
+    def blob_path(self, digest, extension):
+        return os.path.join(self.blobs_dir, digest[:2], f"{digest}{extension}")
+
+    def store_file(self, tmp_path, digest, extension):
+        """Range un téléchargement terminé dans son blob ; un contenu déjà présent n'est pas réécrit"""
+        path = self.blob_path(digest, extension)
+        with self.lock:
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        return path
+
+    def register(self, url, digest, path=None, size=0):
+        """Associe l'URL à son contenu ; retourne l'URL dont elle est le doublon exact, ou None"""
+        if not digest:
+            return None
+        with self.lock:
+            row = self.conn.execute("SELECT digest, duplicate_of FROM urls WHERE url = ?", (url,)).fetchone()
+            if row is not None and row[0] == digest:
+                # Même contenu qu'au crawl précédent pour cette URL (reprise, crawl incrémental)
+                return row[1]
+            blob = self.conn.execute("SELECT first_url FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            duplicate_of = None
+            if blob is None:
+                self.conn.execute(
+                    "INSERT INTO blobs (digest, path, size, first_url, refs) VALUES (?, ?, ?, ?, 1)",
+                    (digest, path, size, url)
+                )
+            else:
+                self.conn.execute("UPDATE blobs SET refs = refs + 1 WHERE digest = ?", (digest,))
+                if self.content_addressed and blob[0] != url:
+                    duplicate_of = blob[0]
+                    self.duplicates += 1
+                    self.bytes_saved += size or 0
+            self.conn.execute(
+                "INSERT OR REPLACE INTO urls (url, digest, simhash, duplicate_of, near_duplicate_of) "
+                "VALUES (?, ?, NULL, ?, NULL)",
+                (url, digest, duplicate_of)
+            )
+            self._maybe_commit()
+        return duplicate_of
+
+    def check_near_duplicate(self, url, text):
+        """Retourne l'URL d'une page déjà vue au texte quasi identique, ou None (la page est alors indexée)"""
+        fingerprint, word_count = simhash(text)
+        if word_count < self.min_words:
+            return None
+        with self.lock:
+            near = self.index.find(fingerprint)
+            if near == url:
+                return None
+            if near is None:
+                self.index.add(fingerprint, url)
+            else:
+                self.near_duplicate_count += 1
+            # Stockage signé : SQLite ne connaît que les entiers 64 bits signés
+            signed = fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+            self.conn.execute(
+                "UPDATE urls SET simhash = ?, near_duplicate_of = ? WHERE url = ?", (signed, near, url)
+            )
+            self._maybe_commit()
+        return near
+
+    def _maybe_commit(self):
+        self.pending_writes += 1
+        if self.pending_writes >= 500:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def log_stats(self):
+        with self.lock:
+            urls, blobs, stored = self.conn.execute(
+                "SELECT (SELECT COUNT(*) FROM urls), COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        logging.info(
+            f"Dédoublonnage: {urls} URLs pour {blobs} contenus distincts ({stored / 1048576:.1f} Mo) - "
+            f"{self.duplicates} doublons exacts ({self.bytes_saved / 1048576:.1f} Mo non réécrits), "
+            f"{self.near_duplicate_count} quasi-doublons"
+        )
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
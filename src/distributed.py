@@ -0,0 +1,199 @@
+# src/distributed.py
+from src.constants import *
+import logging
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+RUN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'run.py')
+
+
+def shared_frontier_path(config, output_dir):
+    """Fichier de la frontière partagée : distributed.frontier_path, sinon dans le dossier de sortie du domaine"""
+    return (config.get('distributed') or {}).get('frontier_path') or os.path.join(output_dir, 'frontier.shared.sqlite3')
+
+
+def configure_worker(config, output_dir, worker_index, worker_count):
+    """Adapte la configuration d'un worker ; retourne son dossier de sortie
+
+    La frontière devient la frontière partagée. Sortie, état, journaux et fichier de
+    mesures sont propres au worker, et le port /metrics est décalé de son numéro. Avec
+    distributed.partition à 'url' (par défaut), chaque hôte est servi par tous les
+    workers : leurs délais sont multipliés et leurs limites par hôte (fixe et adaptative)
+    divisées par worker_count, pour que la charge totale imposée à un hôte reste celle
+    d'un crawl à un seul processus. Le Crawl-delay du robots.txt est multiplié de même
+    par le HostScheduler de chaque worker (distributed.worker_count).
+    """
+    distributed_config = dict(config.get('distributed') or {})
+    distributed_config.update({
+        'frontier_path': shared_frontier_path(config, output_dir),
+        'worker_index': worker_index,
+        'worker_count': worker_count,
+    })
+    config['distributed'] = distributed_config
+    config['frontier'] = dict(config.get('frontier') or {}, backend='shared')
+    if distributed_config.get('partition', 'url') == 'url':
+        crawler_config = config['crawler']
+        crawler_config['delay_min'] = crawler_config.get('delay_min', 0) * worker_count
+        crawler_config['delay_max'] = crawler_config.get('delay_max', 0) * worker_count
+        if crawler_config.get('max_per_host'):
+            crawler_config['max_per_host'] = max(1, crawler_config['max_per_host'] // worker_count)
+        adaptive_config = crawler_config.get('adaptive') or {}
+        if adaptive_config.get('max_per_host'):
+            crawler_config['adaptive'] = dict(
+                adaptive_config, max_per_host=max(1, adaptive_config['max_per_host'] // worker_count)
+            )
+    suffix = f"worker-{worker_index:02d}"
+    config['files']['log_dir'] = os.path.join(config['files'].get('log_dir', 'logs'), suffix)
+    metrics_config = dict(config.get('metrics') or {})
+    if metrics_config.get('port') is not None:
+        metrics_config['port'] += worker_index
+    if metrics_config.get('export'):
+        root, extension = os.path.splitext(metrics_config['export'])
+        metrics_config['export'] = f"{root}.{suffix}{extension}"
+    config['metrics'] = metrics_config
+    return os.path.join(output_dir, suffix)
+
+
+class Coordinator:
+    """Crawl distribué (--workers N) : lance les workers de ce nœud et suit leur progression
+
+    Chaque worker est un processus run.py (--worker-index i --worker-count N) relié à la
+    frontière partagée (src/frontier_store.py, SharedFrontierStore). Sans --resume, le
+    nœud qui porte le worker 0 réinitialise la frontière. Un worker qui se termine en
+    erreur est relancé (jusqu'à distributed.max_restarts fois) : il reprend sa partition
+    et les URLs dont le bail a expiré. Les workers listés dans distributed.local_workers
+    (par défaut tous) tournent sur ce nœud ; les autres peuvent être lancés sur d'autres
+    machines qui voient le même fichier de frontière.
+    """
+
+    def __init__(self, config, config_path, output, output_dir, worker_count, engine='threads', resume=False,
+                 incremental=False):
+        distributed_config = config.get('distributed') or {}
+        self.config_path = config_path
+        self.output = output
+        self.worker_count = worker_count
+        self.engine = engine
+        self.resume = resume
+        self.incremental = incremental
+        self.frontier_path = shared_frontier_path(config, output_dir)
+        local_workers = distributed_config.get('local_workers')
+        self.local_workers = sorted(local_workers) if local_workers is not None else list(range(worker_count))
+        self.max_restarts = distributed_config.get('max_restarts', 3)
+        self.lease_ttl = distributed_config.get('lease_ttl', 60)
+        self.stats_interval = config['crawler'].get('stats_interval', 10)
+        if distributed_config.get('partition', 'url') == 'host' and worker_count > 1:
+            # Crawl d'un seul domaine : seuls ses sous-domaines sont répartis entre les workers
+            logging.warning(
+                f"distributed.partition 'host' : les URLs de {config['domain']['name']} sont réparties par hôte ; "
+                f"un worker sans hôte à servir reste inactif (partition 'url' pour répartir un même site)"
+            )
+        self.processes = {}
+        self.restarts = {}
+        self.stopping = False
+        self.last_completed = 0
+        self.last_log = time.monotonic()
+
+    def reset_frontier(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.frontier_path + suffix):
+                os.remove(self.frontier_path + suffix)
+        logging.info(f"Frontière partagée réinitialisée: {self.frontier_path}")
+
+    def spawn(self, index, resume):
+        command = [
+            sys.executable, RUN_SCRIPT, '--config', self.config_path, '--output', self.output,
+            '--engine', self.engine, '--worker-index', str(index), '--worker-count', str(self.worker_count),
+        ]
+        if resume:
+            command.append('--resume')
+        if self.incremental:
+            command.append('--incremental')
+        # Les journaux de chaque worker sont dans son propre dossier de logs
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        logging.info(f"Worker {index} démarré (pid {process.pid})")
+        return process
+
+    def handle_signal(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        if not self.resume and 0 in self.local_workers:
+            self.reset_frontier()
+        previous_handlers = {sig: signal.signal(sig, self.handle_signal) for sig in (signal.SIGINT, signal.SIGTERM)}
+        started = time.monotonic()
+        try:
+            for index in self.local_workers:
+                self.processes[index] = self.spawn(index, self.resume)
+            while self.processes and not self.stopping:
+                time.sleep(0.5)
+                self.poll_workers()
+                if time.monotonic() - self.last_log >= self.stats_interval:
+                    self.log_progress()
+            if self.stopping:
+                self.stop_workers()
+        finally:
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+        self.log_progress()
+        logging.info(f"Crawl distribué terminé en {time.monotonic() - started:.1f}s")
+
+    def poll_workers(self):
+        for index, process in list(self.processes.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            del self.processes[index]
+            if code == 0:
+                logging.info(f"Worker {index} terminé")
+            elif self.restarts.get(index, 0) < self.max_restarts:
+                self.restarts[index] = self.restarts.get(index, 0) + 1
+                logging.warning(f"Worker {index} arrêté (code {code}), relance {self.restarts[index]}/{self.max_restarts}")
+                self.processes[index] = self.spawn(index, True)
+            else:
+                logging.error(f"Worker {index} arrêté (code {code}) : relances épuisées, sa partition sera reprise")
+
+    def stop_workers(self):
+        """Arrêt demandé : chaque worker sauvegarde son état et rend ses baux avant de quitter"""
+        logging.info("Arrêt des workers...")
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        for index, process in self.processes.items():
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                logging.warning(f"Worker {index} ne répond pas, arrêt forcé")
+                process.kill()
+        self.processes.clear()
+
+    def log_progress(self):
+        """Progression globale lue dans la frontière partagée"""
+        if not os.path.exists(self.frontier_path):
+            return
+        now = time.time()
+        try:
+            conn = sqlite3.connect(f"file:{self.frontier_path}?mode=ro", uri=True, timeout=5)
+            try:
+                counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+                queued, leased = conn.execute("SELECT COUNT(*), COUNT(owner) FROM queue").fetchone()
+                workers = conn.execute("SELECT idx, heartbeat, completed FROM workers ORDER BY idx").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Frontière partagée illisible: {str(e)}")
+            return
+        completed = counters.get('completed', 0)
+        elapsed = time.monotonic() - self.last_log
+        rate = (completed - self.last_completed) / elapsed if elapsed else 0.0
+        self.last_completed = completed
+        self.last_log = time.monotonic()
+        live = [idx for idx, heartbeat, _ in workers if heartbeat and now - heartbeat < self.lease_ttl]
+        per_worker = ', '.join(f"{idx}: {count}" for idx, _, count in workers)
+        logging.info(
+            f"Crawl distribué: {completed} pages traitées ({rate:.1f}/s), {queued} URLs en file dont {leased} louées - "
+            f"workers vivants: {len(live)}/{self.worker_count} - pages par worker: {per_worker or 'aucune'}"
+        )
@@ -0,0 +1,58 @@
+# src/extraction_pool.py
+from src.constants import *
+import concurrent.futures
+import logging
+import multiprocessing
+import time
+from src.extractors import ContentExtractor
+
+# Extracteur construit une fois par processus du pool, pour le parseur demandé
+_worker_extractor = {'parser': None, 'extractor': None}
+
+
+def parse_html_job(parser, html_content, base_url):
+    """Analyse d'une page dans un processus du pool : retourne (texte, liens, durée en secondes)"""
+    if _worker_extractor['parser'] != parser:
+        _worker_extractor['extractor'] = ContentExtractor(parser)
+        _worker_extractor['parser'] = parser
+    started = time.perf_counter()
+    text, links = _worker_extractor['extractor'].parse_html(html_content, base_url)
+    return text, links, time.perf_counter() - started
+
+
+class ExtractionPool:
+    """Étage d'analyse HTML sur un pool de processus, distinct des workers d'I/O
+
+    Les fetchers transmettent le corps brut ; l'analyse HTML (backend extraction.parser)
+    s'exécute dans extraction.workers processus, hors du GIL des threads de
+    téléchargement. Le nombre d'analyses en attente est borné par extraction.max_pending :
+    au-delà, le crawler cesse de lancer de nouveaux téléchargements.
+    """
+
+    def __init__(self, config):
+        extraction_config = config.get('extraction') or {}
+        self.workers = extraction_config.get('workers', 0)
+        self.parser = extraction_config.get('parser', 'html.parser')
+        self.max_pending = extraction_config.get('max_pending') or max(self.workers * 4, 1)
+        self.executor = None
+        if self.workers:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logging.info(f"Pool d'extraction HTML initialisé ({self.workers} processus, parseur {self.parser})")
+
+    @property
+    def enabled(self):
+        return self.executor is not None
+
+    def saturated(self, pending):
+        return self.enabled and pending >= self.max_pending
+
+    def submit(self, html_content, base_url):
+        return self.executor.submit(parse_html_job, self.parser, html_content, base_url)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
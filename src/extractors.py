@@ -1,45 +1,75 @@
 # src/extractors.py
 from src.constants import *
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+from urllib.parse import urljoin
 import logging
+from src.parsers import get_parser_backend
+from src.metrics import METRICS
 
 class ContentExtractor:
-    """Classe gérant l'extraction de contenu"""
-    
-    @staticmethod
-    def extract_text_from_html(html_content):
+    """Classe gérant l'extraction de contenu
+
+    L'analyse HTML est déléguée à un backend (src/parsers.py) choisi par
+    extraction.parser : "html.parser" (par défaut), "lxml" ou "selectolax". Le
+    nettoyage du texte et la normalisation des liens sont communs à tous les backends.
+    """
+
+    def __init__(self, parser='html.parser'):
+        self.parser = parser
+        self.backend = get_parser_backend(parser)
+
+    def parse_html(self, html_content, base_url):
+        """Extrait le texte et les liens d'une page à partir d'un seul arbre HTML"""
+        try:
+            with METRICS.time('parse'):
+                text, hrefs = self.backend.extract(html_content)
+                return self._clean_text(text), self._normalize_links(hrefs, base_url)
+        except Exception as e:
+            METRICS.error('parse', type(e).__name__)
+            logging.error(f"Erreur analyse HTML: {str(e)}")
+            return "", []
+
+    def extract_text_from_html(self, html_content):
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-            for element in soup(['script', 'style', 'head', 'title', 'meta', '[document]']):
-                element.decompose()
-            
-            text = soup.get_text(separator='\n', strip=True)
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            return '\n'.join(chunk for chunk in chunks if chunk)
+            with METRICS.time('parse'):
+                text, _ = self.backend.extract(html_content)
+                return self._clean_text(text)
         except Exception as e:
+            METRICS.error('parse', type(e).__name__)
             logging.error(f"Erreur extraction HTML: {str(e)}")
             return ""
-    
-    @staticmethod
-    def extract_links(html_content, base_url):
+
+    def extract_links(self, html_content, base_url):
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            links = []
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                if href:
-                    # Normalise les URLs relatives
-                    if not href.startswith(('http://', 'https://')):
-                        if href.startswith('//'):
-                            href = f"https:{href}"
-                        elif href.startswith('/'):
-                            href = f"https://{urlparse(base_url).netloc}{href}"
-                        else:
-                            href = f"https://{urlparse(base_url).netloc}/{href}"
-                    links.append(href)
-            return links
+            with METRICS.time('parse'):
+                _, hrefs = self.backend.extract(html_content)
+                return self._normalize_links(hrefs, base_url)
         except Exception as e:
+            METRICS.error('parse', type(e).__name__)
             logging.error(f"Erreur extraction liens: {str(e)}")
             return []
+
+    @staticmethod
+    def _clean_text(text):
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return '\n'.join(chunk for chunk in chunks if chunk)
+
+    @staticmethod
+    def _normalize_links(hrefs, base_url):
+        """Résout les liens relatifs par rapport à l'URL de la page (schéma et répertoire compris)"""
+        links = []
+        for href in hrefs:
+            if not href:
+                continue
+            href = href.strip()
+            # Ancre interne à la page : même URL une fois le fragment retiré
+            if not href or href.startswith('#'):
+                continue
+            if href.startswith(('http://', 'https://')):
+                links.append(href)
+            else:
+                try:
+                    links.append(urljoin(base_url, href))
+                except ValueError:
+                    continue
+        return links
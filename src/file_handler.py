@@ -26,14 +26,7 @@ class FileHandler:
             'ebook': ['.epub', '.mobi', '.azw'],
             'other': []
         }
-        self._setup_directories()
-    
-    def _setup_directories(self):
-        """Crée les sous-répertoires pour chaque catégorie de fichiers"""
-        for category in self.downloadable_extensions.keys():
-            category_dir = os.path.join(self.files_dir, category)
-            os.makedirs(category_dir, exist_ok=True)
-            logging.info(f"Répertoire pour la catégorie '{category}' créé: {category_dir}")
+        # Les sous-répertoires de catégorie sont créés au premier fichier téléchargé dans chacun
     
     def get_file_category(self, url):
         """Détermine la catégorie d'un fichier basé sur son extension"""
@@ -0,0 +1,212 @@
+# src/frontier.py
+from src.constants import *
+import logging
+import threading
+from src.frontier_store import MemoryFrontierStore
+
+
+class Frontier:
+    """File des URLs à visiter, dédupliquée dès la mise en file
+
+    Une URL est marquée comme découverte au moment où elle est ajoutée, avec la même
+    clé que URLProcessor.normalize_url : chaque URL canonique est donc récupérée au
+    plus une fois, même si elle est liée depuis des centaines de pages. Le stockage
+    de la file et des URLs vues est délégué à un backend (src/frontier_store.py) ; les
+    événements sont consignés dans un journal optionnel (src/checkpoint.py). Une
+    politique optionnelle (src/frontier_policy.py) fixe la priorité de chaque URL et
+    refuse les URLs trop profondes ou piégées.
+
+    Les opérations sur la file sont protégées par un verrou : le moteur async
+    (src/async_crawler.py) traite les résultats hors de la boucle d'événements, pendant
+    que la boucle retire les URLs suivantes.
+    """
+
+    def __init__(self, url_processor, max_size=None, store=None, journal=None, policy=None):
+        self.url_processor = url_processor
+        self.max_size = max_size
+        self.store = store if store is not None else MemoryFrontierStore()
+        self.journal = journal
+        self.policy = policy
+        self.in_flight = {}  # url -> (priorité, profondeur)
+        self.lock = threading.RLock()
+        self.links_discovered = 0
+        self.links_deduplicated = 0
+        self.fetches_avoided = 0
+        self.links_dropped = 0
+
+    def __len__(self):
+        return self.store.queue_size()
+
+    def __bool__(self):
+        return self.store.queue_size() > 0
+
+    def push(self, url, depth=0, key=None):
+        """Ajoute une URL si elle n'a jamais été découverte ; retourne True si elle est mise en file
+
+        key est la clé normalisée si l'appelant l'a déjà calculée (URLProcessor.process_link).
+        """
+        with self.lock:
+            self.links_discovered += 1
+            if key is None:
+                key = self.url_processor.normalize_url(url)
+            # La plupart des liens d'une page sont déjà connus : test d'appartenance avant la politique
+            if self.store.is_discovered(key):
+                self._count_duplicate(key)
+                return False
+            priority = 0
+            if self.policy is not None:
+                priority = self.policy.evaluate(url, depth)
+                if priority is None:
+                    return False
+            if self.max_size is not None and self.store.queue_size() >= self.max_size:
+                self.links_dropped += 1
+                return False
+            if not self.store.add_discovered(key):
+                self._count_duplicate(key)
+                return False
+            if self.policy is not None:
+                self.policy.record_admitted(url)
+            self.store.enqueue(url, priority, depth, key)
+            if self.journal is not None:
+                self.journal.record_enqueue(url, depth)
+            return True
+
+    def _count_duplicate(self, key):
+        self.links_deduplicated += 1
+        if not self.store.is_completed(key):
+            # Sans déduplication à l'ajout, ce lien aurait été récupéré une seconde fois
+            self.fetches_avoided += 1
+
+    def pop(self):
+        with self.lock:
+            url, priority, depth = self.store.dequeue()
+            self.in_flight[url] = (priority, depth)
+            return url
+
+    def awaiting_peers(self):
+        """Crawl distribué : vrai tant que d'autres workers peuvent encore alimenter cette file"""
+        return self.store.shared and self.store.awaiting_peers()
+
+    def requeue(self, urls):
+        """Remet en tête de leur niveau des URLs déjà découvertes (report par l'ordonnanceur)"""
+        with self.lock:
+            entries = []
+            for url in urls:
+                priority, depth = self.in_flight.pop(url, (0, 0))
+                entries.append((url, priority, depth))
+            self.store.requeue(entries)
+
+    def depth_of(self, url):
+        """Profondeur d'une URL en cours de traitement (nombre de liens depuis une URL de départ)"""
+        return self.in_flight.get(url, (0, 0))[1]
+
+    def peek(self, count):
+        with self.lock:
+            return self.store.peek(count)
+
+    def mark_completed(self, url):
+        """Marque une URL comme traitée ; retourne False si elle l'était déjà"""
+        with self.lock:
+            self.in_flight.pop(url, None)
+            key = self.url_processor.normalize_url(url)
+            if not self.store.mark_completed(key):
+                return False
+            if self.journal is not None:
+                self.journal.record_complete(key)
+            return True
+
+    def mark_failed(self, url):
+        """Marque une URL comme abandonnée : elle ne sera pas récupérée à nouveau après une reprise"""
+        with self.lock:
+            self.in_flight.pop(url, None)
+            key = self.url_processor.normalize_url(url)
+            self.store.mark_failed(key)
+            if self.journal is not None:
+                self.journal.record_done(key)
+
+    def completed_count(self):
+        return self.store.completed_count()
+
+    def completed_urls(self):
+        return self.store.iter_completed()
+
+    def queued_urls(self):
+        return self.store.iter_queue()
+
+    def restore(self, completed, queued):
+        """Recharge l'état d'un crawl précédent"""
+        for key in completed:
+            self.store.mark_completed(key)
+        for url in queued:
+            self._restore_queued(url, 0)
+
+    def _restore_queued(self, url, depth):
+        key = self.url_processor.normalize_url(url)
+        if self.store.add_discovered(key):
+            priority = 0
+            if self.policy is not None:
+                priority = self.policy.priority(url, depth)
+                self.policy.record_admitted(url)
+            self.store.enqueue(url, priority, depth, key)
+
+    def restore_from_journal(self):
+        """Rejoue le journal : les URLs en vol lors de l'arrêt sont remises en file"""
+        completed, done, enqueued = self.journal.replay()
+        for key in completed:
+            self.store.mark_completed(key)
+        for key in done:
+            self.store.add_discovered(key)
+        for url, depth in enqueued:
+            self._restore_queued(url, depth)
+
+    def checkpoint(self, force=False):
+        """Écrit les événements en attente et compacte le journal si nécessaire (ou si force)"""
+        with self.lock:
+            if self.journal is None:
+                self.store.flush()
+                return
+            live_entries = self.store.discovered_count()
+            if force or self.journal.needs_compaction(live_entries):
+                pending = [(url, depth) for url, (_, depth) in self.in_flight.items()] + [
+                    (url, depth) for url, _, depth in self.store.iter_queue_entries()
+                ]
+                pending_keys = {self.url_processor.normalize_url(url) for url, _ in pending}
+                done_keys = (
+                    key for key in self.store.iter_discovered()
+                    if key not in pending_keys and not self.store.is_completed(key)
+                )
+                self.journal.compact(self.store.iter_completed(), done_keys, pending)
+            else:
+                self.journal.flush()
+
+    def flush(self):
+        with self.lock:
+            self.store.flush()
+            if self.journal is not None:
+                self.journal.flush()
+
+    def close(self):
+        self.store.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def stats(self):
+        return {
+            'queued': self.store.queue_size(),
+            'discovered': self.store.discovered_count(),
+            'completed': self.store.completed_count(),
+            'links_discovered': self.links_discovered,
+            'links_deduplicated': self.links_deduplicated,
+            'fetches_avoided': self.fetches_avoided,
+            'links_dropped': self.links_dropped,
+            'rejected': sum(self.policy.rejected.values()) if self.policy is not None else 0,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logging.info(
+            f"Frontière: {stats['queued']} en file, {stats['completed']} traitées - "
+            f"liens découverts: {stats['links_discovered']}, dédupliqués: {stats['links_deduplicated']}, "
+            f"requêtes évitées: {stats['fetches_avoided']}, rejetés (file pleine): {stats['links_dropped']}"
+            + (f", écartés par la politique: {self.policy.rejected_summary()}" if self.policy is not None else "")
+        )
@@ -0,0 +1,138 @@
+# src/frontier_policy.py
+from src.constants import *
+import logging
+import re
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlparse, parse_qsl
+
+YEAR_PATTERN = re.compile(r'^(19|20|21)\d\d$')
+
+
+class FrontierPolicy:
+    """Admission et priorité des URLs de la frontière (section frontier de la configuration)
+
+    La priorité est un niveau entier, le plus petit étant servi en premier :
+    profondeur x depth_weight, plus les ajustements des extensions (indice du type de
+    contenu, par exemple .pdf) et des motifs de chemin. Une URL est refusée au-delà de
+    max_depth, lorsque son préfixe de chemin a déjà admis max_per_prefix URLs, lorsque
+    robots.txt l'interdit, ou lorsqu'elle ressemble à un piège à robots (segments
+    répétés, chemin démesuré, identifiant de session, calendrier sans fin vers le
+    futur, combinaisons de paramètres). Les compteurs par préfixe et par chemin sont
+    indexés par empreinte et bornés à tracked_paths entrées.
+    """
+
+    SESSION_PARAMS = ('jsessionid', 'phpsessid', 'sessionid', 'sid', 'aspsessionid', 'cfid', 'cftoken')
+
+    def __init__(self, config, robots=None):
+        self.robots = robots
+        frontier_config = config.get('frontier') or {}
+        priority_config = frontier_config.get('priority') or {}
+        trap_config = frontier_config.get('traps') or {}
+        self.max_depth = frontier_config.get('max_depth')
+        self.max_per_prefix = frontier_config.get('max_per_prefix')
+        self.prefix_segments = frontier_config.get('prefix_segments', 2)
+        self.tracked_paths = frontier_config.get('tracked_paths', 100000)
+        self.depth_weight = priority_config.get('depth_weight', 1)
+        self.extension_scores = {
+            ext.lower(): score for ext, score in (priority_config.get('extensions') or {}).items()
+        }
+        self.pattern_scores = [
+            (re.compile(pattern), score) for pattern, score in (priority_config.get('patterns') or {}).items()
+        ]
+        self.traps_enabled = trap_config.get('enabled', True)
+        self.max_repeated_segments = trap_config.get('max_repeated_segments', 3)
+        self.max_path_segments = trap_config.get('max_path_segments', 20)
+        self.max_query_params = trap_config.get('max_query_params', 8)
+        self.max_query_variants = trap_config.get('max_query_variants', 100)
+        self.max_year_offset = trap_config.get('max_year_offset', 5)
+        self.session_params = tuple(trap_config.get('session_params') or self.SESSION_PARAMS)
+        self.current_year = datetime.now().year
+        self.prefix_counts = Counter()
+        self.query_variants = Counter()
+        self.rejected = Counter()
+
+    def priority(self, url, depth):
+        """Niveau de priorité d'une URL (plus petit = plus tôt)"""
+        path = urlparse(url).path
+        level = depth * self.depth_weight
+        lower_path = path.lower()
+        for ext, score in self.extension_scores.items():
+            if lower_path.endswith(ext):
+                level += score
+                break
+        for regex, score in self.pattern_scores:
+            if regex.search(url):
+                level += score
+        return level
+
+    def prefix_of(self, parsed):
+        segments = [segment for segment in parsed.path.split('/') if segment][:self.prefix_segments]
+        return f"{parsed.netloc}/{'/'.join(segments)}"
+
+    def evaluate(self, url, depth):
+        """Retourne le niveau de priorité de l'URL, ou None si elle est refusée"""
+        if self.max_depth is not None and depth > self.max_depth:
+            self.rejected['profondeur'] += 1
+            return None
+        parsed = urlparse(url)
+        if self.traps_enabled:
+            trap = self.detect_trap(parsed)
+            if trap is not None:
+                self.rejected[trap] += 1
+                logging.debug(f"Piège à robots ({trap}): {url}")
+                return None
+        if self.max_per_prefix is not None and self.prefix_counts[hash(self.prefix_of(parsed))] >= self.max_per_prefix:
+            self.rejected['préfixe'] += 1
+            return None
+        # robots.txt pas encore chargé : l'URL est admise et vérifiée au départ de la requête
+        if self.robots is not None and self.robots.allowed(url) is False:
+            self.rejected['robots.txt'] += 1
+            return None
+        return self.priority(url, depth)
+
+    def detect_trap(self, parsed):
+        """Nom du piège reconnu dans l'URL, ou None"""
+        path = parsed.path
+        lower_path = path.lower()
+        if ';' in path and any(f";{name}=" in lower_path for name in self.session_params):
+            return 'session'
+        segments = [segment for segment in path.split('/') if segment]
+        if len(segments) > self.max_path_segments:
+            return 'chemin'
+        if segments and Counter(segments).most_common(1)[0][1] > self.max_repeated_segments:
+            return 'répétition'
+        if self.max_year_offset is not None:
+            for segment in segments:
+                # Seules les années lointaines dans le futur : les archives (/2012/...) restent admises
+                if YEAR_PATTERN.match(segment) and int(segment) - self.current_year > self.max_year_offset:
+                    return 'calendrier'
+        if parsed.query:
+            params = parse_qsl(parsed.query, keep_blank_values=True)
+            if any(name.lower() in self.session_params for name, _ in params):
+                return 'session'
+            if len(params) > self.max_query_params:
+                return 'paramètres'
+            if self.query_variants[hash(f"{parsed.netloc}{path}")] >= self.max_query_variants:
+                return 'paramètres'
+        return None
+
+    def record_admitted(self, url):
+        """Compte une URL admise dans la frontière (limites par préfixe et par chemin)"""
+        parsed = urlparse(url)
+        if self.max_per_prefix is not None:
+            self._count(self.prefix_counts, self.prefix_of(parsed))
+        if parsed.query:
+            self._count(self.query_variants, f"{parsed.netloc}{parsed.path}")
+
+    def _count(self, counter, key):
+        """Incrémente le compteur de key (indexé par empreinte), en bornant le nombre d'entrées"""
+        counter[hash(key)] += 1
+        if len(counter) > self.tracked_paths:
+            # Seules les entrées les plus fréquentes, proches de leur limite, sont conservées
+            kept = counter.most_common(self.tracked_paths // 2)
+            counter.clear()
+            counter.update(dict(kept))
+
+    def rejected_summary(self):
+        return ', '.join(f"{reason}: {count}" for reason, count in self.rejected.most_common()) or 'aucun'
@@ -0,0 +1,663 @@
+# src/frontier_store.py
+from src.constants import *
+import bisect
+import hashlib
+import itertools
+import logging
+import math
+import os
+import socket
+import sqlite3
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+def url_fingerprint(key):
+    """Empreinte 64 bits signée d'une URL normalisée (compatible INTEGER SQLite)"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class BloomFilter:
+    """Filtre de Bloom à double hachage : test d'appartenance compact, sans faux négatif"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def size_bytes(self):
+        return len(self.bits)
+
+
+class MemoryFrontierStore:
+    """Stockage en mémoire : ensembles de chaînes et une deque par niveau de priorité
+
+    Chaque entrée de la file est (url, priorité, profondeur) ; le niveau le plus petit est
+    servi en premier, dans l'ordre d'arrivée au sein d'un même niveau.
+    """
+
+    persistent = False
+    shared = False
+
+    def __init__(self):
+        self.buckets = {}  # priorité -> deque de (url, profondeur)
+        self.levels = []  # priorités non vides, triées
+        self.size = 0
+        self.discovered = set()
+        self.completed = set()
+
+    def add_discovered(self, key):
+        if key in self.discovered:
+            return False
+        self.discovered.add(key)
+        return True
+
+    def is_discovered(self, key):
+        return key in self.discovered
+
+    def is_completed(self, key):
+        return key in self.completed
+
+    def mark_completed(self, key):
+        if key in self.completed:
+            return False
+        self.completed.add(key)
+        self.discovered.add(key)
+        return True
+
+    def _bucket(self, priority):
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = deque()
+            bisect.insort(self.levels, priority)
+        return bucket
+
+    def mark_failed(self, key):
+        # L'URL a quitté la file au retrait : rien à effacer
+        pass
+
+    def enqueue(self, url, priority=0, depth=0, key=None):
+        self._bucket(priority).append((url, depth))
+        self.size += 1
+
+    def dequeue(self):
+        """Retourne (url, priorité, profondeur) de l'entrée la plus prioritaire"""
+        if not self.levels:
+            raise IndexError("dequeue from an empty frontier")
+        priority = self.levels[0]
+        bucket = self.buckets[priority]
+        url, depth = bucket.popleft()
+        if not bucket:
+            del self.buckets[priority]
+            self.levels.pop(0)
+        self.size -= 1
+        return url, priority, depth
+
+    def requeue(self, entries):
+        """Remet des entrées (url, priorité, profondeur) en tête de leur niveau, dans l'ordre donné"""
+        for url, priority, depth in reversed(entries):
+            self._bucket(priority).appendleft((url, depth))
+            self.size += 1
+
+    def peek(self, count):
+        return [url for url, _, _ in itertools.islice(self.iter_queue_entries(), count)]
+
+    def queue_size(self):
+        return self.size
+
+    def discovered_count(self):
+        return len(self.discovered)
+
+    def completed_count(self):
+        return len(self.completed)
+
+    def iter_completed(self):
+        return iter(self.completed)
+
+    def iter_discovered(self):
+        return iter(self.discovered)
+
+    def iter_queue(self):
+        return (url for url, _, _ in self.iter_queue_entries())
+
+    def iter_queue_entries(self):
+        for priority in list(self.levels):
+            for url, depth in list(self.buckets.get(priority, ())):
+                yield url, priority, depth
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteFrontierStore:
+    """Stockage sur disque : empreintes 64 bits des URLs vues et file dans SQLite
+
+    Seules les URLs en attente sont conservées en texte ; les URLs vues sont réduites à
+    une empreinte entière, ce qui garde la mémoire résidente constante quelle que soit
+    la taille du crawl. Un filtre de Bloom optionnel évite les lectures disque pour les
+    URLs jamais vues.
+
+    Une URL retirée de la file y reste, marquée en cours (leased), jusqu'à ce qu'elle
+    soit traitée ou abandonnée : après un arrêt brutal, les URLs en vol ou en attente
+    d'un nouvel essai sont remises en file à la réouverture.
+    """
+
+    persistent = True
+    shared = False
+    COMMIT_EVERY = 1000
+
+    def __init__(self, path, bloom_capacity=None, bloom_error_rate=0.001, cache_size_kb=16384, reset=False):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if reset and os.path.exists(path):
+            os.remove(path)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (fp INTEGER PRIMARY KEY, completed INTEGER NOT NULL DEFAULT 0)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY, url TEXT NOT NULL, "
+            "priority INTEGER NOT NULL DEFAULT 0, depth INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(queue)")}
+        for column in ('priority', 'depth', 'leased'):
+            if column not in columns:
+                # Frontière créée par une version antérieure, sans priorités ni suivi des URLs en cours
+                self.conn.execute(f"ALTER TABLE queue ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        if 'fp' not in columns:
+            # Empreinte de la clé : les entrées antérieures n'en ont pas et quittent la file au retrait
+            self.conn.execute("ALTER TABLE queue ADD COLUMN fp INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS queue_order ON queue (priority, seq)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS queue_fp ON queue (fp)")
+        # URLs en cours lors du dernier arrêt : de nouveau à récupérer
+        recovered = self.conn.execute("UPDATE queue SET leased = 0 WHERE leased = 1").rowcount
+        self.conn.commit()
+        if recovered:
+            logging.info(f"Frontière SQLite: {recovered} URLs en cours lors de l'arrêt remises en file")
+        self.pending_writes = 0
+        self.leased = {}  # url -> seq des entrées retirées et pas encore traitées
+
+        head, tail = self.conn.execute("SELECT MIN(seq), MAX(seq) FROM queue").fetchone()
+        self.head_seq = head if head is not None else 0
+        self.tail_seq = tail if tail is not None else 0
+        self._queue_size = self.conn.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+        self._discovered_count = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self._completed_count = self.conn.execute("SELECT COUNT(*) FROM seen WHERE completed = 1").fetchone()[0]
+
+        self.bloom = None
+        if bloom_capacity:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            if self._discovered_count:
+                logging.warning("Filtre de Bloom désactivé : impossible de le reconstruire à partir des empreintes existantes")
+                self.bloom = None
+
+    def _write(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        self.pending_writes += 1
+        if self.pending_writes >= self.COMMIT_EVERY:
+            self.flush()
+        return cursor
+
+    def add_discovered(self, key):
+        if self.bloom is not None:
+            if key not in self.bloom:
+                # Réponse négative du filtre : l'URL est certainement nouvelle
+                self.bloom.add(key)
+                self._write("INSERT OR IGNORE INTO seen (fp) VALUES (?)", (url_fingerprint(key),))
+                self._discovered_count += 1
+                return True
+        if self._write("INSERT OR IGNORE INTO seen (fp) VALUES (?)", (url_fingerprint(key),)).rowcount:
+            self._discovered_count += 1
+            if self.bloom is not None:
+                self.bloom.add(key)
+            return True
+        return False
+
+    def is_discovered(self, key):
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        return self.conn.execute("SELECT 1 FROM seen WHERE fp = ?", (url_fingerprint(key),)).fetchone() is not None
+
+    def is_completed(self, key):
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        row = self.conn.execute("SELECT completed FROM seen WHERE fp = ?", (url_fingerprint(key),)).fetchone()
+        return bool(row and row[0])
+
+    def _mark_completed(self, key):
+        fp = url_fingerprint(key)
+        if self._write("UPDATE seen SET completed = 1 WHERE fp = ? AND completed = 0", (fp,)).rowcount:
+            self._completed_count += 1
+            return True
+        if self._write("INSERT OR IGNORE INTO seen (fp, completed) VALUES (?, 1)", (fp,)).rowcount:
+            self._discovered_count += 1
+            self._completed_count += 1
+            if self.bloom is not None:
+                self.bloom.add(key)
+            return True
+        return False
+
+    def _release(self, key):
+        """Efface l'entrée en cours d'une URL traitée ou abandonnée"""
+        row = self.conn.execute("SELECT seq, url FROM queue WHERE fp = ? AND leased = 1", (url_fingerprint(key),)).fetchone()
+        if row is not None:
+            self._write("DELETE FROM queue WHERE seq = ?", (row[0],))
+            self.leased.pop(row[1], None)
+
+    def mark_completed(self, key):
+        self._release(key)
+        return self._mark_completed(key)
+
+    def mark_failed(self, key):
+        self._release(key)
+
+    def enqueue(self, url, priority=0, depth=0, key=None):
+        self.tail_seq += 1
+        self._write(
+            "INSERT INTO queue (seq, url, priority, depth, fp) VALUES (?, ?, ?, ?, ?)",
+            (self.tail_seq, url, priority, depth, url_fingerprint(key) if key is not None else None)
+        )
+        self._queue_size += 1
+
+    def dequeue(self):
+        row = self.conn.execute(
+            "SELECT seq, url, priority, depth, fp FROM queue WHERE leased = 0 ORDER BY priority, seq LIMIT 1"
+        ).fetchone()
+        if row is None:
+            raise IndexError("dequeue from an empty frontier")
+        if row[4] is None:
+            self._write("DELETE FROM queue WHERE seq = ?", (row[0],))
+        else:
+            self._write("UPDATE queue SET leased = 1 WHERE seq = ?", (row[0],))
+            self.leased[row[1]] = row[0]
+        self._queue_size -= 1
+        return row[1], row[2], row[3]
+
+    def requeue(self, entries):
+        # Numéros décroissants sous le plus petit jamais attribué : tête de leur niveau, sans collision
+        for url, priority, depth in reversed(entries):
+            self.head_seq -= 1
+            seq = self.leased.pop(url, None)
+            if seq is not None:
+                self._write("UPDATE queue SET seq = ?, leased = 0 WHERE seq = ?", (self.head_seq, seq))
+            else:
+                self._write(
+                    "INSERT INTO queue (seq, url, priority, depth) VALUES (?, ?, ?, ?)",
+                    (self.head_seq, url, priority, depth)
+                )
+            self._queue_size += 1
+
+    def peek(self, count):
+        return [
+            row[0] for row in self.conn.execute(
+                "SELECT url FROM queue WHERE leased = 0 ORDER BY priority, seq LIMIT ?", (count,)
+            )
+        ]
+
+    def queue_size(self):
+        return self._queue_size
+
+    def discovered_count(self):
+        return self._discovered_count
+
+    def completed_count(self):
+        return self._completed_count
+
+    def iter_completed(self):
+        # Seules les empreintes sont conservées : les URLs traitées ne sont pas restituables
+        return iter(())
+
+    def iter_discovered(self):
+        return iter(())
+
+    def iter_queue(self):
+        return (row[0] for row in self.conn.execute("SELECT url FROM queue WHERE leased = 0 ORDER BY priority, seq"))
+
+    def iter_queue_entries(self):
+        return (
+            tuple(row) for row in self.conn.execute(
+                "SELECT url, priority, depth FROM queue WHERE leased = 0 ORDER BY priority, seq"
+            )
+        )
+
+    def flush(self):
+        self.conn.commit()
+        self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def host_shard(url, count):
+    """Partition d'une URL : hachage stable de son hôte, identique dans tous les processus"""
+    host = urlparse(url).netloc.lower().encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(host, digest_size=4).digest(), 'big') % count
+
+
+class SharedFrontierStore:
+    """Frontière commune aux workers d'un crawl distribué (src/distributed.py), dans un fichier SQLite
+
+    Les URLs sont réparties entre worker_count partitions par hachage de l'URL : le site
+    crawlé est réparti entre tous les workers (voir configure_worker pour le partage de
+    la politesse). Avec partition='host', le hachage porte sur l'hôte : tous les liens
+    d'un hôte sont servis par le même worker, qui applique seul sa politesse ; seuls les
+    sous-domaines sont alors répartis, et un worker sans hôte reste inactif.
+    Chaque worker loue par lots les URLs de sa partition (bail de lease_ttl secondes,
+    renouvelé tant qu'il est vivant) et les sert depuis un tampon local ; une URL ne quitte
+    la table qu'une fois traitée ou abandonnée. Le bail d'un worker arrêté expire et ses
+    URLs sont de nouveau distribuées ; la partition d'un worker sans battement de cœur
+    depuis lease_ttl est reprise par un worker vivant.
+
+    Les écritures (URLs découvertes, traitées, abandonnées) sont regroupées et appliquées
+    toutes les sync_interval secondes dans une transaction courte, avec les baux et le
+    battement de cœur. Deux workers qui découvrent la même URL entre deux synchronisations
+    sont départagés par la clé primaire des empreintes : une seule entrée est mise en file.
+    """
+
+    persistent = True
+    shared = True
+
+    def __init__(self, path, worker_index, worker_count, partition='url', lease_ttl=60, lease_batch=64,
+                 sync_interval=0.5, busy_timeout=30):
+        if partition not in ('host', 'url'):
+            raise ValueError(f"Partitionnement inconnu: {partition}")
+        self.path = path
+        self.partition = partition
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_ttl = lease_ttl
+        self.lease_batch = lease_batch
+        self.sync_interval = sync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Transactions explicites : chaque synchronisation prend le verrou d'écriture le moins longtemps possible
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            self.conn.execute("CREATE TABLE IF NOT EXISTS seen (fp INTEGER PRIMARY KEY, completed INTEGER NOT NULL DEFAULT 0)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY, fp INTEGER NOT NULL, url TEXT NOT NULL, "
+                "priority INTEGER NOT NULL DEFAULT 0, depth INTEGER NOT NULL DEFAULT 0, shard INTEGER NOT NULL, "
+                "owner TEXT, expires REAL NOT NULL DEFAULT 0)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS queue_shard ON queue (shard, priority, seq)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS queue_fp ON queue (fp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS queue_owner ON queue (owner)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers (idx INTEGER PRIMARY KEY, owner TEXT, heartbeat REAL, "
+                "completed INTEGER NOT NULL DEFAULT 0)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self.conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('discovered', 0), ('completed', 0)")
+
+        self.buffer = deque()  # (url, priorité, profondeur) louées et pas encore retirées
+        self.pending_discovered = set()
+        self.pending_enqueue = []  # (empreinte, url, priorité, profondeur)
+        self.pending_completed = set()
+        self.pending_failed = []
+        self.counters = {'discovered': 0, 'completed': 0}
+        self.completed_here = 0
+        self.queue_remaining = True
+        self.registered = 0
+        self.adopted = ()
+        self.started = time.time()
+        self.next_sync = 0.0
+        self.next_renew = 0.0
+        self.sync()
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _seen(self, fp):
+        return self.conn.execute("SELECT completed FROM seen WHERE fp = ?", (fp,)).fetchone()
+
+    def add_discovered(self, key):
+        fp = url_fingerprint(key)
+        if fp in self.pending_discovered or self._seen(fp) is not None:
+            return False
+        self.pending_discovered.add(fp)
+        return True
+
+    def is_discovered(self, key):
+        fp = url_fingerprint(key)
+        return fp in self.pending_discovered or self._seen(fp) is not None
+
+    def is_completed(self, key):
+        fp = url_fingerprint(key)
+        if fp in self.pending_completed:
+            return True
+        row = self._seen(fp)
+        return bool(row and row[0])
+
+    def mark_completed(self, key):
+        fp = url_fingerprint(key)
+        if fp in self.pending_completed:
+            return False
+        row = self._seen(fp)
+        if row and row[0]:
+            # Traitée ailleurs : bail expiré pendant un traitement trop long
+            return False
+        self.pending_completed.add(fp)
+        self.completed_here += 1
+        return True
+
+    def mark_failed(self, key):
+        self.pending_failed.append(url_fingerprint(key))
+
+    def enqueue(self, url, priority=0, depth=0, key=None):
+        self.pending_enqueue.append((url_fingerprint(key if key is not None else url), url, priority, depth))
+
+    def dequeue(self):
+        self._maybe_sync()
+        if not self.buffer:
+            raise IndexError("dequeue from an empty frontier")
+        url, priority, depth = self.buffer.popleft()
+        return url, priority, depth
+
+    def requeue(self, entries):
+        # URLs toujours louées par ce worker : elles reprennent leur place en tête du tampon
+        for entry in reversed(entries):
+            self.buffer.appendleft(entry)
+
+    def peek(self, count):
+        return [url for url, _, _ in itertools.islice(self.buffer, count)]
+
+    def queue_size(self):
+        self._maybe_sync()
+        return len(self.buffer)
+
+    def discovered_count(self):
+        return self.counters['discovered'] + len(self.pending_discovered)
+
+    def completed_count(self):
+        # Total de tous les workers : crawler.max_pages s'applique au crawl entier
+        return self.counters['completed'] + len(self.pending_completed)
+
+    def iter_completed(self):
+        return iter(())
+
+    def iter_discovered(self):
+        return iter(())
+
+    def iter_queue(self):
+        return (url for url, _, _ in self.buffer)
+
+    def iter_queue_entries(self):
+        return iter(list(self.buffer))
+
+    def awaiting_peers(self):
+        """Vrai tant que d'autres workers peuvent encore mettre des URLs en file
+
+        Il reste des URLs dans la table (louées ou non), des écritures locales en attente,
+        ou tous les workers ne se sont pas encore annoncés.
+        """
+        self._maybe_sync()
+        if self.pending_enqueue or self.pending_completed or self.pending_failed:
+            return True
+        if self.queue_remaining:
+            return True
+        return self.registered < self.worker_count and time.time() - self.started < self.lease_ttl
+
+    def _shard_of(self, fp, url):
+        if self.partition == 'url':
+            return fp % self.worker_count
+        return host_shard(url, self.worker_count)
+
+    def _maybe_sync(self):
+        if time.monotonic() >= self.next_sync:
+            self.sync()
+
+    def _live_workers(self, now):
+        rows = self.conn.execute("SELECT idx FROM workers WHERE heartbeat >= ?", (now - self.lease_ttl,)).fetchall()
+        return sorted({row[0] for row in rows} | {self.worker_index})
+
+    def _shards(self, now):
+        """Partition de ce worker, plus celles des workers sans battement de cœur qui lui reviennent"""
+        shards = [self.worker_index]
+        if now - self.started >= self.lease_ttl:
+            # Au démarrage, les autres workers ont lease_ttl secondes pour s'annoncer
+            live = self._live_workers(now)
+            shards += [
+                shard for shard in range(self.worker_count)
+                if shard not in live and live[shard % len(live)] == self.worker_index
+            ]
+        if tuple(shards[1:]) != self.adopted:
+            self.adopted = tuple(shards[1:])
+            if self.adopted:
+                logging.warning(f"Partitions sans worker vivant reprises par le worker {self.worker_index}: {list(self.adopted)}")
+        return shards
+
+    def _lease(self, now):
+        shards = self._shards(now)
+        placeholders = ', '.join('?' for _ in shards)
+        rows = self.conn.execute(
+            f"SELECT seq, url, priority, depth FROM queue WHERE shard IN ({placeholders}) "
+            f"AND (owner IS NULL OR expires < ?) ORDER BY priority, seq LIMIT ?",
+            (*shards, now, self.lease_batch)
+        ).fetchall()
+        if not rows:
+            return
+        self.conn.executemany(
+            "UPDATE queue SET owner = ?, expires = ? WHERE seq = ?",
+            [(self.owner, now + self.lease_ttl, row[0]) for row in rows]
+        )
+        # Tampon trié par niveau de priorité (tri stable : ordre d'arrivée conservé dans un niveau)
+        self.buffer = deque(sorted(list(self.buffer) + [row[1:] for row in rows], key=lambda entry: entry[1]))
+
+    def sync(self):
+        """Applique les écritures en attente, renouvelle les baux, signale ce worker et complète le tampon"""
+        now = time.time()
+        with self._transaction():
+            discovered = completed = 0
+            for fp, url, priority, depth in self.pending_enqueue:
+                if self.conn.execute("INSERT OR IGNORE INTO seen (fp) VALUES (?)", (fp,)).rowcount:
+                    discovered += 1
+                    self.conn.execute(
+                        "INSERT INTO queue (fp, url, priority, depth, shard) VALUES (?, ?, ?, ?, ?)",
+                        (fp, url, priority, depth, self._shard_of(fp, url))
+                    )
+            for fp in self.pending_completed:
+                if self.conn.execute("INSERT OR IGNORE INTO seen (fp, completed) VALUES (?, 1)", (fp,)).rowcount:
+                    discovered += 1
+                    completed += 1
+                elif self.conn.execute("UPDATE seen SET completed = 1 WHERE fp = ? AND completed = 0", (fp,)).rowcount:
+                    completed += 1
+            # Retrait de la file dans la même transaction que la mise en file des liens de la page :
+            # un autre worker ne voit jamais la file vide entre les deux
+            self.conn.executemany(
+                "DELETE FROM queue WHERE fp = ?", [(fp,) for fp in self.pending_completed] + [(fp,) for fp in self.pending_failed]
+            )
+            self.conn.execute("UPDATE counters SET value = value + ? WHERE name = 'discovered'", (discovered,))
+            self.conn.execute("UPDATE counters SET value = value + ? WHERE name = 'completed'", (completed,))
+            self.pending_discovered.clear()
+            self.pending_enqueue.clear()
+            self.pending_completed.clear()
+            self.pending_failed.clear()
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO workers (idx, owner, heartbeat, completed) VALUES (?, ?, ?, ?)",
+                (self.worker_index, self.owner, now, self.completed_here)
+            )
+            if now >= self.next_renew:
+                self.conn.execute("UPDATE queue SET expires = ? WHERE owner = ?", (now + self.lease_ttl, self.owner))
+                self.next_renew = now + self.lease_ttl / 3
+            if len(self.buffer) < self.lease_batch // 2:
+                self._lease(now)
+            self.counters.update(self.conn.execute("SELECT name, value FROM counters").fetchall())
+            self.queue_remaining = self.conn.execute("SELECT EXISTS (SELECT 1 FROM queue)").fetchone()[0] == 1
+            self.registered = self.conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+        self.next_sync = time.monotonic() + self.sync_interval
+
+    def flush(self):
+        self.sync()
+
+    def close(self):
+        # Baux rendus et battement de cœur effacé : les URLs restantes sont aussitôt disponibles
+        self.sync()
+        with self._transaction():
+            self.conn.execute("UPDATE queue SET owner = NULL, expires = 0 WHERE owner = ?", (self.owner,))
+            self.conn.execute("UPDATE workers SET heartbeat = 0 WHERE idx = ? AND owner = ?", (self.worker_index, self.owner))
+        self.buffer.clear()
+        self.conn.close()
+
+
+def create_frontier_store(config, output_dir, resume=False):
+    """Instancie le stockage de frontière choisi dans la section 'frontier' de la configuration"""
+    frontier_config = config.get('frontier') or {}
+    backend = frontier_config.get('backend', 'memory')
+    if backend == 'memory':
+        return MemoryFrontierStore()
+    if backend == 'sqlite':
+        path = frontier_config.get('path') or os.path.join(output_dir, 'frontier.sqlite3')
+        bloom_capacity = frontier_config.get('bloom_capacity') if frontier_config.get('bloom', True) else None
+        return SQLiteFrontierStore(
+            path,
+            bloom_capacity=bloom_capacity,
+            bloom_error_rate=frontier_config.get('bloom_error_rate', 0.001),
+            cache_size_kb=frontier_config.get('cache_size_kb', 16384),
+            reset=not resume
+        )
+    if backend == 'shared':
+        # Worker d'un crawl distribué : le coordinateur (ou l'opérateur) a réinitialisé le fichier
+        distributed_config = config.get('distributed') or {}
+        return SharedFrontierStore(
+            distributed_config['frontier_path'],
+            distributed_config['worker_index'],
+            distributed_config['worker_count'],
+            partition=distributed_config.get('partition', 'url'),
+            lease_ttl=distributed_config.get('lease_ttl', 60),
+            lease_batch=distributed_config.get('lease_batch', 64),
+            sync_interval=distributed_config.get('sync_interval', 0.5),
+        )
+    raise ValueError(f"Backend de frontière inconnu: {backend}")
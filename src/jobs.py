@@ -0,0 +1,255 @@
+# src/jobs.py
+from src.constants import *
+import concurrent.futures
+import copy
+import logging
+import os
+import signal
+import sys
+import time
+import yaml
+from src.crawler import SafeCrawler
+from src.extraction_pool import ExtractionPool
+from src.extractors import ContentExtractor
+from src.metrics import METRICS, configure_metrics
+from src.pdf_processor import PDFProcessor
+from src.processors import URLProcessor
+from src.scheduler import ThroughputMonitor
+from src.session import SafeSession
+
+
+def merge_config(base, overrides):
+    """Copie de base dans laquelle les clés de overrides remplacent les siennes, section par section"""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_job(path, base_config):
+    """Lit un fichier de job ; retourne [(domaine, configuration, dossier de sortie)]
+
+    Configuration d'un domaine : configuration de base, puis section defaults du job,
+    puis section config du domaine.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        job = yaml.safe_load(f) or {}
+    defaults = job.get('defaults') or {}
+    domains = []
+    names = set()
+    for entry in job.get('domains') or []:
+        name = entry['name'].lower()
+        if name in names:
+            raise ValueError(f"Domaine en double dans le fichier de job: {name}")
+        names.add(name)
+        config = merge_config(merge_config(base_config, defaults), entry.get('config'))
+        config['domain'] = {'name': name, 'start_url': entry.get('start_url') or f"https://{name}/"}
+        domains.append((name, config, entry.get('output') or name))
+    if not domains:
+        raise ValueError(f"Aucun domaine dans le fichier de job: {path}")
+    return domains
+
+
+class DomainCrawl:
+    """Un domaine d'un job : son crawler, ses requêtes en vol et sa progression"""
+
+    def __init__(self, name, crawler):
+        self.name = name
+        self.crawler = crawler
+        self.in_flight = {}  # future -> (url, hôte)
+        self.started = time.monotonic()
+        self.finished = None
+        self.last_completed = crawler.frontier.completed_count()
+
+    def done(self):
+        return self.crawler.page_limit_reached() or not self.crawler.has_pending_work(self.in_flight)
+
+
+class JobCrawler:
+    """Crawl de plusieurs domaines (--job) dans un seul processus
+
+    Chaque domaine a son SafeCrawler : filtres d'URL, limites, frontière, politesse par
+    hôte, état et dossier de sortie propres. La session HTTP (pools de connexions, cache
+    DNS), les threads de téléchargement (crawler.max_workers de la configuration de base),
+    le pool d'analyse HTML et le pool OCR sont partagés. À chaque tour, les créneaux libres
+    sont répartis à parts égales entre les domaines, en commençant par un domaine différent :
+    un domaine dont aucun hôte n'est prêt (politesse, nouvel essai, site lent) laisse ses
+    créneaux aux suivants.
+    """
+
+    def __init__(self, config, job_path, output, resume=False):
+        self.config = config
+        self.max_workers = config['crawler']['max_workers']
+        self.stats_interval = config['crawler'].get('stats_interval', 10)
+        self.metrics_server = configure_metrics(config)
+        domains = load_job(job_path, config)
+
+        # Une connexion keep-alive conservée par domaine au moins
+        transport_config = config.setdefault('transport', {})
+        transport_config['pool_connections'] = max(transport_config.get('pool_connections') or 10, len(domains))
+        self.session = SafeSession.create(config)
+        self.transport_stats = getattr(self.session, 'transport_stats', None)
+        content_extractor = ContentExtractor((config.get('extraction') or {}).get('parser', 'html.parser'))
+        self.pdf_processor = PDFProcessor(config)
+        self.extraction_pool = ExtractionPool(config)
+        self.monitor = ThroughputMonitor(self.max_workers, self.stats_interval)
+        self.last_log = time.monotonic()
+        self.rotation = 0
+
+        self.domains = []
+        for name, domain_config, output_name in domains:
+            # Un seul point d'accès /metrics, celui du job
+            domain_config['metrics'] = dict(domain_config.get('metrics') or {}, port=None)
+            output_dir = os.path.join(output, domain_config['files']['output_dir'], output_name)
+            os.makedirs(output_dir, exist_ok=True)
+            crawler = SafeCrawler(
+                domain_config, self.session, content_extractor, URLProcessor(domain_config), output_dir, resume,
+                pdf_processor=self.pdf_processor, extraction_pool=self.extraction_pool
+            )
+            self.domains.append(DomainCrawl(name, crawler))
+            logging.info(f"Domaine {name} prêt (sortie: {output_dir})")
+        # Chaque SafeCrawler a installé ses gestionnaires : celui du job les remplace
+        signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGTERM, self.signal_handler)
+        logging.info(f"Job de {len(self.domains)} domaines, {self.max_workers} téléchargements simultanés au total")
+
+    def signal_handler(self, signum, frame):
+        logging.info("Arrêt gracieux du job...")
+        for domain in self.domains:
+            # Comme stop_domain : les URLs en vol sont remises en file avant la sauvegarde
+            domain.crawler.abandon_in_flight(domain.in_flight)
+            domain.in_flight.clear()
+            domain.crawler.save_state()
+            domain.crawler.close_outputs()
+        sys.exit(0)
+
+    def crawl(self):
+        in_flight = {}  # future -> DomainCrawl
+        active = list(self.domains)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='Fetch') as executor:
+            while active:
+                try:
+                    for domain in [domain for domain in active if domain.done()]:
+                        self.stop_domain(domain, in_flight)
+                        active.remove(domain)
+                    if not active:
+                        break
+
+                    self.monitor.sample(len(in_flight))
+                    self.dispatch(active, executor, in_flight)
+                    parses = {future: domain for domain in active for future in domain.crawler.pending_parses}
+                    wait_time = self.time_until_work(active)
+                    if not in_flight and not parses:
+                        time.sleep(wait_time if wait_time is not None else 0.1)
+                        continue
+
+                    done, _ = concurrent.futures.wait(
+                        list(in_flight) + list(parses),
+                        timeout=min(wait_time, 1.0) if wait_time is not None else 1.0,
+                        return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    self.monitor.sample(len(in_flight))
+                    for future in done:
+                        if future in in_flight:
+                            domain = in_flight.pop(future)
+                            url, host = domain.in_flight.pop(future)
+                            self.monitor.record_completed()
+                            domain.crawler.complete_fetch(url, host, future)
+                        else:
+                            parses[future].crawler.complete_parse(future)
+
+                    for domain in active:
+                        domain.crawler.maybe_checkpoint()
+                    self.maybe_log(active, len(in_flight), len(parses))
+                except Exception as e:
+                    logging.error(f"Erreur boucle principale du job: {str(e)}")
+                    continue
+        self.finish()
+
+    def dispatch(self, active, executor, in_flight):
+        """Répartit les créneaux libres entre les domaines, à tour de rôle"""
+        free = self.max_workers - len(in_flight)
+        if free <= 0 or self.extraction_pool.saturated(sum(len(d.crawler.pending_parses) for d in active)):
+            return
+        self.rotation = (self.rotation + 1) % len(active)
+        order = active[self.rotation:] + active[:self.rotation]
+        for position, domain in enumerate(order):
+            if free <= 0:
+                break
+            # Part égale des créneaux restants ; celle d'un domaine sans URL prête revient aux suivants
+            share = max(free // (len(order) - position), 1)
+
+            def submit(url, domain=domain):
+                future = executor.submit(domain.crawler.process_url, url)
+                in_flight[future] = domain
+                return future
+
+            before = len(domain.in_flight)
+            domain.crawler.dispatch_ready_urls(submit, domain.in_flight, before + share)
+            free -= len(domain.in_flight) - before
+
+    @staticmethod
+    def time_until_work(active):
+        waits = [wait for wait in (domain.crawler.time_until_work() for domain in active) if wait is not None]
+        return min(waits) if waits else None
+
+    def stop_domain(self, domain, in_flight):
+        """Domaine terminé ou à sa limite de pages : ses URLs encore en vol sont remises en file"""
+        for future in domain.in_flight:
+            in_flight.pop(future, None)
+        domain.crawler.abandon_in_flight(domain.in_flight)
+        domain.in_flight.clear()
+        domain.finished = time.monotonic()
+        logging.info(
+            f"Domaine {domain.name} terminé: {domain.crawler.frontier.completed_count()} pages "
+            f"en {domain.finished - domain.started:.1f}s"
+        )
+
+    def maybe_log(self, active, in_flight_count, parse_count):
+        """Débit global, puis une ligne par domaine actif (pages traitées, débit, file, requêtes en cours)"""
+        for domain in self.domains:
+            METRICS.set_gauge('pages_completed', domain.crawler.frontier.completed_count(), domain=domain.name)
+            METRICS.set_gauge('queue_depth', len(domain.crawler.frontier), queue='frontier', domain=domain.name)
+        if not self.monitor.maybe_log(sum(len(d.crawler.frontier) for d in active), in_flight_count, parse_count):
+            return
+        now = time.monotonic()
+        elapsed = max(now - self.last_log, 1e-9)
+        self.last_log = now
+        for domain in active:
+            completed = domain.crawler.frontier.completed_count()
+            logging.info(
+                f"Domaine {domain.name}: {completed} pages ({(completed - domain.last_completed) / elapsed:.2f}/s) - "
+                f"file: {len(domain.crawler.frontier)} - téléchargements en cours: {len(domain.in_flight)}"
+            )
+            domain.last_completed = completed
+        if METRICS.enabled:
+            logging.info(METRICS.summary())
+
+    def finish(self):
+        """Statistiques et état de chaque domaine, puis arrêt des ressources partagées"""
+        for domain in self.domains:
+            logging.info(f"Domaine {domain.name}:")
+            domain.crawler.log_crawl_stats()
+            domain.crawler.save_state()
+            domain.crawler.close_outputs()
+            domain.crawler.frontier.close()
+        for domain in self.domains:
+            duration = (domain.finished or time.monotonic()) - domain.started
+            completed = domain.crawler.frontier.completed_count()
+            logging.info(
+                f"Domaine {domain.name}: {completed} pages en {duration:.1f}s ({completed / max(duration, 1e-9):.2f} pages/s)"
+            )
+        if self.transport_stats is not None:
+            self.transport_stats.log_stats()
+        if METRICS.enabled:
+            logging.info(METRICS.summary())
+            export_path = (self.config.get('metrics') or {}).get('export')
+            if export_path:
+                METRICS.export(export_path)
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        self.pdf_processor.close()
+        self.extraction_pool.close()
@@ -0,0 +1,296 @@
+# src/metrics.py
+from src.constants import *
+import bisect
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bornes (s) des histogrammes de latence : de la milliseconde (DNS en cache, analyse d'une
+# petite page) à la minute (gros PDF, OCR)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Étapes mesurées, dans l'ordre du traitement d'une URL, et leur nom dans la ligne de synthèse
+STAGES = {
+    'dns': 'DNS',
+    'connect': 'connexion',
+    'tls': 'TLS',
+    'request': 'requête',
+    'download': 'téléchargement',
+    'parse': 'analyse',
+    'pdf': 'PDF',
+    'ocr': 'OCR',
+    'save': 'dépôt',
+    'write': 'écriture',
+}
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (format Prometheus), sans conserver les valeurs"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimation du quantile par interpolation linéaire dans la classe qui le contient"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Registre des mesures du crawler, partagé par tous les threads du processus
+
+    Histogrammes de latence par étape (dns, connect, tls, request, download, parse, pdf,
+    ocr, save, write), compteurs étiquetés (octets, réponses, erreurs, pages) et jauges
+    (profondeur des files). Le coût d'une mesure est celui d'un verrou et d'une
+    recherche dichotomique ; metrics.enabled à false les rend sans effet.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = True
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+        self.gauges = {}
+        self.start_time = time.time()
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """Mesure la durée du bloc, y compris lorsqu'il lève une exception"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def error(self, stage, kind):
+        self.inc('errors', stage=stage, kind=kind)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ''
+        return '{' + ','.join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in items) + '}'
+
+    def render(self):
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        lines = [
+            '# HELP crawler_stage_seconds Durée de chaque étape du traitement d\'une URL',
+            '# TYPE crawler_stage_seconds histogram',
+        ]
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                labels = (('stage', stage),)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"crawler_stage_seconds_bucket{self._labels(labels, (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"crawler_stage_seconds_bucket{self._labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"crawler_stage_seconds_sum{self._labels(labels)} {histogram.sum}")
+                lines.append(f"crawler_stage_seconds_count{self._labels(labels)} {histogram.count}")
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE crawler_{name}_total counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"crawler_{name}_total{self._labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.gauges}):
+                lines.append(f"# TYPE crawler_{name} gauge")
+                for (gauge, labels), value in sorted(self.gauges.items()):
+                    if gauge == name:
+                        lines.append(f"crawler_{name}{self._labels(labels)} {value}")
+        lines.append('# TYPE crawler_uptime_seconds gauge')
+        lines.append(f"crawler_uptime_seconds {time.time() - self.start_time:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Instantané sérialisable en JSON : quantiles par étape, compteurs et jauges"""
+        with self.lock:
+            return {
+                'uptime': time.time() - self.start_time,
+                'stages': {
+                    stage: {
+                        'count': histogram.count,
+                        'sum': histogram.sum,
+                        'p50': histogram.quantile(0.5),
+                        'p95': histogram.quantile(0.95),
+                        'p99': histogram.quantile(0.99),
+                    }
+                    for stage, histogram in self.histograms.items()
+                },
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+            }
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        logging.info(f"Mesures exportées dans {path}")
+
+    def summary(self):
+        """Ligne de synthèse : latences p50/p95 par étape, octets téléchargés, erreurs"""
+        with self.lock:
+            stages = [
+                f"{label} {histogram.count}x p50 {histogram.quantile(0.5) * 1000:.0f} ms "
+                f"p95 {histogram.quantile(0.95) * 1000:.0f} ms"
+                for stage, label in STAGES.items()
+                for histogram in [self.histograms.get(stage)]
+                if histogram is not None and histogram.count
+            ]
+            wire = self.counters[('wire_bytes', ())]
+            decoded = self.counters[('decoded_bytes', ())]
+            errors = Counter()
+            for (name, labels), value in self.counters.items():
+                if name == 'errors':
+                    errors[dict(labels).get('stage', '?')] += value
+        error_info = ', '.join(f"{stage}: {count}" for stage, count in errors.most_common()) or 'aucune'
+        return (
+            f"Étapes: {' | '.join(stages) or 'aucune mesure'} - "
+            f"téléchargé: {decoded / 1048576:.1f} Mo ({wire / 1048576:.1f} Mo sur le réseau) - erreurs: {error_info}"
+        )
+
+
+# Registre du processus : les couches réseau, d'extraction et de sortie y écrivent sans
+# qu'il soit transmis à chaque constructeur
+METRICS = Metrics()
+
+
+class MetricsServer:
+    """Point d'accès HTTP local exposant METRICS au format Prometheus sur /metrics"""
+
+    def __init__(self, metrics, host='127.0.0.1', port=9100):
+        registry = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='MetricsServer', daemon=True)
+        self.thread.start()
+        logging.info(f"Mesures exposées sur http://{host}:{self.server.server_port}/metrics")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StackSampler:
+    """Échantillonneur des piles de tous les threads, à la manière de py-spy, sans dépendance
+
+    Toutes les interval secondes, la pile de chaque thread est relevée
+    (sys._current_frames) ; à l'arrêt, les piles sont écrites au format « collapsed »
+    (une pile par ligne, suivie de son nombre d'échantillons), lisible par flamegraph.pl
+    ou speedscope. Le nom du thread est la racine de chaque pile.
+    """
+
+    def __init__(self, output_path, interval=0.01):
+        self.output_path = output_path
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        logging.info(f"Piles échantillonnées: {self.sample_count} relevés écrits dans {self.output_path}")
+
+
+def configure_metrics(config):
+    """Applique la section metrics au registre du processus ; retourne le serveur /metrics ou None"""
+    metrics_config = config.get('metrics') or {}
+    METRICS.enabled = metrics_config.get('enabled', True)
+    port = metrics_config.get('port')
+    if not METRICS.enabled or port is None:
+        return None
+    try:
+        return MetricsServer(METRICS, metrics_config.get('host', '127.0.0.1'), port)
+    except OSError as e:
+        logging.warning(f"Point d'accès des mesures indisponible (port {port}): {str(e)}")
+        return None
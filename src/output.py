@@ -0,0 +1,422 @@
+# src/output.py
+from src.constants import *
+import base64
+import gzip
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from src.metrics import METRICS
+
+
+class FilesOutput:
+    """Un fichier texte par page dans text/, avec bandeaux (format historique)"""
+
+    wants_raw = False
+
+    def __init__(self, output_dir, url_processor):
+        self.output_dir = output_dir
+        self.url_processor = url_processor
+        self.text_dir = os.path.join(output_dir, 'text')
+        os.makedirs(self.text_dir, exist_ok=True)
+
+    def write_record(self, record):
+        url, content_type, content = record['url'], record['content_type'], record['content']
+        filename = self.url_processor.sanitize_filename(url)
+        if content_type in ('html', 'pdf'):
+            text = content[0] if content_type == 'pdf' else content
+            filepath = os.path.join(self.text_dir, f"{filename}.txt")
+            formatted_content = f"""URL: {url}
+Timestamp: {record['timestamp']}
+Content Type: {content_type}
+{'=' * 100}
+
+{text}
+
+{'=' * 100}
+Fin du contenu de : {url}"""
+            with open(filepath, "w", encoding='utf-8') as f:
+                f.write(formatted_content)
+            if content_type == 'html':
+                logging.info(f"Contenu sauvegardé: {url} -> {filepath}")
+            else:
+                logging.info(f"Texte extrait sauvegardé : {url} -> {filepath}")
+                # Le PDF original a été écrit en flux lors du téléchargement
+                logging.info(f"PDF original sauvegardé : {url} -> {content[1]}")
+            return len(formatted_content)
+        elif content_type == 'image':
+            logging.info(f"Image sauvegardée: {url} -> {content[0]}")
+        elif content_type == 'document':
+            logging.info(f"Document sauvegardé: {url} -> {content}")
+        else:
+            filepath = os.path.join(self.text_dir, f"{filename}.txt")
+            with open(filepath, "w", encoding='utf-8') as f:
+                f.write(content)
+            logging.info(f"Contenu texte sauvegardé: {url} -> {filepath}")
+            return len(content)
+        return 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RollingOutput:
+    """Fichiers de sortie numérotés, remplacés par un nouveau fichier au-delà de shard_size octets"""
+
+    def __init__(self, directory, prefix, extension, shard_size):
+        self.directory = directory
+        self.prefix = prefix
+        self.extension = extension
+        self.shard_size = shard_size
+        self.shard_index = self._next_index()
+        self.file = None
+        self.shard_bytes = 0
+        self.shards_written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _next_index(self):
+        # Reprise : on ne réécrit jamais une partition existante
+        if not os.path.isdir(self.directory):
+            return 0
+        indexes = [
+            int(name[len(self.prefix) + 1:].split('.')[0])
+            for name in os.listdir(self.directory)
+            if name.startswith(f"{self.prefix}-") and name[len(self.prefix) + 1:].split('.')[0].isdigit()
+        ]
+        return max(indexes) + 1 if indexes else 0
+
+    def current_path(self):
+        return os.path.join(self.directory, f"{self.prefix}-{self.shard_index:05d}{self.extension}")
+
+    def _open_shard(self):
+        self.file = open(self.current_path(), 'wb')
+        self.shard_bytes = 0
+        self.shards_written += 1
+        self.on_open()
+
+    def on_open(self):
+        pass
+
+    def write_bytes(self, data):
+        if self.file is None:
+            self._open_shard()
+        self.file.write(data)
+        self.shard_bytes += len(data)
+
+    def maybe_roll(self):
+        if self.file is not None and self.shard_bytes >= self.shard_size:
+            self.close_shard()
+            self.shard_index += 1
+
+    def close_shard(self):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        self.close_shard()
+
+
+class JSONLOutput(RollingOutput):
+    """Partitions JSONL : une ligne par page (texte et métadonnées), compression zstd optionnelle
+
+    Avec zstd, chaque lot est terminé par un bloc complet : une partition interrompue
+    reste lisible jusqu'au dernier lot écrit.
+    """
+
+    wants_raw = False
+
+    def __init__(self, output_dir, shard_size, compression=None, level=3):
+        self.zstandard = None
+        if compression == 'zstd':
+            # zstandard n'est importé que si la compression est demandée
+            try:
+                import zstandard
+                self.zstandard = zstandard
+            except ImportError:
+                logging.warning("zstandard n'est pas installé, partitions JSONL non compressées")
+                compression = None
+        self.compression = compression
+        self.level = level
+        self.compressor = None
+        extension = '.jsonl.zst' if compression == 'zstd' else '.jsonl'
+        super().__init__(os.path.join(output_dir, 'shards'), 'pages', extension, shard_size)
+
+    def on_open(self):
+        if self.compression == 'zstd':
+            self.compressor = self.zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    def write_record(self, record):
+        content_type, content = record['content_type'], record['content']
+        line = {
+            'url': record['url'],
+            'content_type': content_type,
+            'timestamp': record['timestamp'],
+            'metadata': record['metadata'],
+        }
+        if content_type == 'html':
+            line['text'] = content
+        elif content_type == 'pdf':
+            line['text'], line['file'] = content
+        elif content_type == 'image':
+            line['file'] = content[0]
+        elif content_type == 'document':
+            line['file'] = content
+        else:
+            line['text'] = content
+        data = (json.dumps(line, ensure_ascii=False) + '\n').encode('utf-8')
+        if self.file is None:
+            self._open_shard()
+        if self.compressor is not None:
+            self.write_bytes(self.compressor.compress(data))
+        else:
+            self.write_bytes(data)
+        return len(data)
+
+    def flush(self):
+        if self.compressor is not None and self.file is not None:
+            self.write_bytes(self.compressor.flush(self.zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+        super().flush()
+
+    def close_shard(self):
+        if self.compressor is not None and self.file is not None:
+            self.write_bytes(self.compressor.flush(self.zstandard.COMPRESSOBJ_FLUSH_FINISH))
+            self.compressor = None
+        super().close_shard()
+
+
+class WARCOutput(RollingOutput):
+    """Fichiers WARC 1.1 compressés (un membre gzip par enregistrement)
+
+    Chaque page donne un enregistrement « resource » avec le corps brut de la réponse et,
+    lorsqu'un texte a été extrait, un enregistrement « conversion » qui s'y réfère.
+    """
+
+    wants_raw = True
+    COPY_CHUNK = 1024 * 1024
+
+    def __init__(self, output_dir, shard_size, level=6):
+        self.level = level
+        super().__init__(os.path.join(output_dir, 'warc'), 'crawl', '.warc.gz', shard_size)
+
+    @staticmethod
+    def _warc_date():
+        return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def _record(self, warc_type, headers, payload_chunks, length):
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        lines = [
+            "WARC/1.1",
+            f"WARC-Type: {warc_type}",
+            f"WARC-Record-ID: {record_id}",
+            f"WARC-Date: {self._warc_date()}",
+        ] + [f"{name}: {value}" for name, value in headers if value] + [f"Content-Length: {length}"]
+        member = gzip.GzipFile(fileobj=self, mode='wb', compresslevel=self.level)
+        member.write(('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8'))
+        for chunk in payload_chunks:
+            member.write(chunk)
+        member.write(b'\r\n\r\n')
+        member.close()
+        return record_id
+
+    def on_open(self):
+        body = (
+            "software: web-crawler\r\n"
+            "format: WARC File Format 1.1\r\n"
+            f"hostname: {socket.gethostname()}\r\n"
+        ).encode('utf-8')
+        self._record('warcinfo', [('Content-Type', 'application/warc-fields'),
+                                  ('WARC-Filename', os.path.basename(self.current_path()))], [body], len(body))
+
+    def write(self, data):
+        # Les membres gzip de _record() écrivent ici, dans la partition courante
+        self.write_bytes(data)
+
+    def _file_chunks(self, path):
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(self.COPY_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+
+    def write_record(self, record):
+        url, content_type, content, metadata = record['url'], record['content_type'], record['content'], record['metadata']
+        if self.file is None:
+            self._open_shard()
+        raw, path = record.get('raw'), None
+        if content_type == 'pdf':
+            path = content[1]
+        elif content_type == 'image':
+            path = content[0]
+        elif content_type == 'document':
+            path = content
+
+        headers = [
+            ('WARC-Target-URI', url),
+            ('Content-Type', metadata.get('content_type') or 'application/octet-stream'),
+        ]
+        if metadata.get('digest'):
+            headers.append(('WARC-Payload-Digest', f"sha256:{base64.b32encode(bytes.fromhex(metadata['digest'])).decode()}"))
+        written = 0
+        resource_id = None
+        if raw is not None:
+            resource_id = self._record('resource', headers, [raw], len(raw))
+            written += len(raw)
+        elif path and os.path.exists(path):
+            size = os.path.getsize(path)
+            resource_id = self._record('resource', headers, self._file_chunks(path), size)
+            written += size
+
+        text = content if content_type == 'html' else content[0] if content_type == 'pdf' else None
+        if text:
+            data = text.encode('utf-8')
+            self._record('conversion', [
+                ('WARC-Target-URI', url),
+                ('WARC-Refers-To', resource_id),
+                ('Content-Type', 'text/plain; charset=utf-8'),
+            ], [data], len(data))
+            written += len(data)
+        return written
+
+
+class OutputWriter:
+    """Écriture différée de la sortie sur un thread dédié, par lots
+
+    Le crawler dépose des enregistrements dans une file bornée (output.max_pending) ; le
+    thread d'écriture les regroupe par lots de output.batch_size et vide les tampons au
+    moins toutes les output.flush_interval secondes. Les I/O de sortie ne bloquent donc
+    ni les téléchargements ni l'analyse, sauf si le disque ne suit plus (contre-pression).
+    """
+
+    _STOP = object()
+
+    def __init__(self, backend, batch_size=256, flush_interval=1.0, max_pending=10000, name='OutputWriter',
+                 label='Sortie'):
+        self.backend = backend
+        self.label = label
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.records_written = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    @property
+    def wants_raw(self):
+        return self.backend.wants_raw
+
+    def submit(self, record):
+        self.queue.put(record)
+
+    def saturated(self):
+        """Vrai quand la file est pleine : submit() bloquerait jusqu'à l'écriture d'un lot"""
+        return self.queue.full()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        stop = False
+        while not stop:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch and batch[-1] is self._STOP:
+                batch.pop()
+                stop = True
+            with self.lock:
+                for record in batch:
+                    self._write(record)
+                now = time.monotonic()
+                if batch or now - last_flush >= self.flush_interval:
+                    self._flush_backend()
+                    last_flush = now
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self.queue.task_done()
+
+    def _write(self, record):
+        try:
+            with METRICS.time('write'):
+                written = self.backend.write_record(record)
+            self.records_written += 1
+            self.bytes_written += written or 0
+            METRICS.inc('output_bytes', written or 0)
+        except Exception as e:
+            self.errors += 1
+            METRICS.error('write', type(e).__name__)
+            logging.error(f"Erreur sauvegarde {record['url']}: {str(e)}")
+
+    def _flush_backend(self):
+        try:
+            self.backend.flush()
+            if hasattr(self.backend, 'maybe_roll'):
+                self.backend.maybe_roll()
+        except Exception as e:
+            logging.error(f"Erreur écriture de la sortie: {str(e)}")
+
+    def flush(self):
+        """Attend que tous les enregistrements déposés soient écrits"""
+        if not self.closed:
+            self.queue.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self.backend.close()
+        self.log_stats()
+
+    def log_stats(self):
+        shards = getattr(self.backend, 'shards_written', None)
+        shard_info = f", {shards} partitions" if shards is not None else ""
+        logging.info(
+            f"{self.label}: {self.records_written} enregistrements, {self.bytes_written / 1048576:.1f} Mo{shard_info}, "
+            f"{self.errors} erreurs"
+        )
+
+
+def create_output_writer(config, output_dir, url_processor):
+    """Construit l'écrivain de sortie décrit par la section output de la configuration"""
+    output_config = config.get('output') or {}
+    backend_name = output_config.get('backend', 'files')
+    shard_size = int(output_config.get('shard_size_mb', 256) * 1048576)
+    if backend_name == 'files':
+        backend = FilesOutput(output_dir, url_processor)
+    elif backend_name == 'jsonl':
+        backend = JSONLOutput(output_dir, shard_size, output_config.get('compression'))
+    elif backend_name == 'warc':
+        backend = WARCOutput(output_dir, shard_size)
+    else:
+        raise ValueError(f"Backend de sortie inconnu: {backend_name}")
+    logging.info(f"Sortie: backend {backend_name}")
+    return OutputWriter(
+        backend,
+        batch_size=output_config.get('batch_size', 256),
+        flush_interval=output_config.get('flush_interval', 1.0),
+        max_pending=output_config.get('max_pending', 10000),
+    )
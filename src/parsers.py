@@ -0,0 +1,111 @@
+# src/parsers.py
+from src.constants import *
+
+
+# Balises dont le contenu n'est pas du texte de page
+NON_TEXT_TAGS = ['script', 'style', 'head', 'title', 'meta']
+
+
+def decode_html(html_content):
+    """Décode le HTML brut ; UTF-8 d'abord, puis détection à la manière de BeautifulSoup"""
+    if isinstance(html_content, str):
+        return html_content
+    try:
+        return html_content.decode('utf-8')
+    except UnicodeDecodeError:
+        from bs4.dammit import UnicodeDammit
+        return UnicodeDammit(html_content, is_html=True).unicode_markup or ''
+
+
+class HTMLParserBackend:
+    """BeautifulSoup avec le parseur "html.parser" de la bibliothèque standard (historique)"""
+
+    name = 'html.parser'
+
+    def __init__(self):
+        # bs4 enregistre le builder lxml dès son import : chargé avec le parseur seulement
+        from bs4 import BeautifulSoup
+        self.beautiful_soup = BeautifulSoup
+
+    def extract(self, html_content):
+        soup = self.beautiful_soup(html_content, "html.parser")
+        # Les liens sont collectés avant la suppression des balises non textuelles
+        hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+        for element in soup(NON_TEXT_TAGS):
+            element.decompose()
+        return soup.get_text(separator='\n', strip=True), hrefs
+
+
+class LxmlBackend:
+    """Arbre lxml.html (libxml2), sans passer par BeautifulSoup"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        # Importé seulement lorsque ce parseur est choisi
+        try:
+            import lxml.html
+        except ImportError:
+            raise ImportError("Le parseur 'lxml' nécessite le paquet lxml (pip install lxml)") from None
+        self.document_fromstring = lxml.html.document_fromstring
+
+    def extract(self, html_content):
+        markup = decode_html(html_content)
+        if not markup.strip():
+            return '', []
+        try:
+            root = self.document_fromstring(markup)
+        except ValueError:
+            # Déclaration d'encodage XML dans une chaîne unicode : lxml exige les octets
+            root = self.document_fromstring(markup.encode('utf-8'))
+        hrefs = [a.get('href') for a in root.iter('a') if a.get('href') is not None]
+        strings = (s.strip() for s in self._strings(root))
+        return '\n'.join(s for s in strings if s), hrefs
+
+    @classmethod
+    def _strings(cls, element):
+        """Nœuds texte dans l'ordre du document, comme BeautifulSoup : le contenu des
+        balises non textuelles et des commentaires est ignoré, le texte qui les suit est conservé"""
+        if isinstance(element.tag, str) and element.tag not in NON_TEXT_TAGS:
+            if element.text:
+                yield element.text
+            for child in element:
+                yield from cls._strings(child)
+                if child.tail:
+                    yield child.tail
+
+
+class SelectolaxBackend:
+    """Moteur lexbor via selectolax : analyse et parcours en C"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        # Importé seulement lorsque ce parseur est choisi
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError:
+            raise ImportError("Le parseur 'selectolax' nécessite le paquet selectolax (pip install selectolax)") from None
+        self.parser_class = LexborHTMLParser
+
+    def extract(self, html_content):
+        tree = self.parser_class(decode_html(html_content))
+        hrefs = [node.attributes.get('href') for node in tree.css('a[href]')]
+        tree.strip_tags(NON_TEXT_TAGS)
+        root = tree.root
+        text = root.text(separator='\n', strip=True) if root is not None else ''
+        return text, [href for href in hrefs if href is not None]
+
+
+PARSER_BACKENDS = {
+    HTMLParserBackend.name: HTMLParserBackend,
+    LxmlBackend.name: LxmlBackend,
+    SelectolaxBackend.name: SelectolaxBackend,
+}
+
+
+def get_parser_backend(name):
+    """Instancie le backend d'analyse HTML demandé (extraction.parser)"""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Parseur HTML inconnu: {name} (choix: {', '.join(PARSER_BACKENDS)})")
+    return PARSER_BACKENDS[name]()
@@ -1,58 +1,215 @@
 # src/pdf_processor.py
-from PyPDF2 import PdfReader
-import pdfplumber
-import pytesseract
-from PIL import Image
+import concurrent.futures
+import hashlib
+import multiprocessing
+import threading
 import io
+import os
 import logging
+from src.metrics import METRICS
+
+# PyMuPDF, pdfplumber, pytesseract et Pillow sont importés au premier PDF traité :
+# le démarrage et les crawls sans PDF ne les chargent pas
+_modules = {}
+
+
+def _pymupdf():
+    """Module PyMuPDF, importé au premier appel ; None s'il est absent"""
+    if 'pymupdf' not in _modules:
+        try:
+            import pymupdf
+        except ImportError:  # Versions de PyMuPDF antérieures à 1.24
+            try:
+                import fitz as pymupdf
+            except ImportError:
+                pymupdf = None
+        _modules['pymupdf'] = pymupdf
+    return _modules['pymupdf']
+
+
+TESSERACT_CONFIG = r'--oem 3 --psm 6'
+
+# Document ouvert en dernier dans un processus OCR : les pages d'un même PDF
+# envoyées au même worker ne rouvrent pas le document
+_worker_document = {'source': None, 'doc': None}
+
+
+def _source_key(source):
+    """Identifiant d'un PDF : son chemin, ou l'empreinte de son contenu s'il est passé en mémoire"""
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    return hashlib.blake2b(source, digest_size=16).digest()
+
+
+def _open_pymupdf(source):
+    if isinstance(source, (str, os.PathLike)):
+        return _pymupdf().open(source)
+    return _pymupdf().open(stream=source, filetype='pdf')
+
+
+def _render_page_pymupdf(source, page_index, dpi, use_cache):
+    from PIL import Image
+    if not use_cache:
+        with _open_pymupdf(source) as doc:
+            pixmap = doc[page_index].get_pixmap(dpi=dpi)
+        return Image.open(io.BytesIO(pixmap.tobytes('png')))
+    key = _source_key(source)
+    if _worker_document['source'] != key or _worker_document['doc'] is None:
+        if _worker_document['doc'] is not None:
+            _worker_document['doc'].close()
+        _worker_document['doc'] = _open_pymupdf(source)
+        _worker_document['source'] = key
+    pixmap = _worker_document['doc'][page_index].get_pixmap(dpi=dpi)
+    return Image.open(io.BytesIO(pixmap.tobytes('png')))
+
+
+def ocr_page(source, page_index, dpi, tesseract_config, lang, use_cache=True):
+    """OCR d'une page ; exécuté dans un processus du pool, hors du GIL des workers de crawl"""
+    import pytesseract
+    if _pymupdf() is not None:
+        image = _render_page_pymupdf(source, page_index, dpi, use_cache)
+    else:
+        import pdfplumber
+        with pdfplumber.open(source if isinstance(source, (str, os.PathLike)) else io.BytesIO(source)) as pdf:
+            image = pdf.pages[page_index].to_image(resolution=dpi).original
+    try:
+        return pytesseract.image_to_string(image, config=tesseract_config, lang=lang)
+    except Exception as e:
+        # Certaines exceptions pytesseract ne se désérialisent pas et casseraient le pool
+        raise RuntimeError(str(e)) from None
+
 
 class PDFProcessor:
-    """Gère l'extraction avancée de texte à partir de PDFs"""
-    
-    def __init__(self):
-        self.tesseract_config = r'--oem 3 --psm 6'
-        self.languages = ['fra']  # Ajoutez d'autres langues si nécessaire, par exemple ['fra', 'eng']
-    
+    """Gère l'extraction avancée de texte à partir de PDFs
+
+    Le document est ouvert une seule fois. La couche texte est lue avec PyMuPDF (ou
+    pdfplumber si PyMuPDF est absent ou si pdf.engine vaut "pdfplumber") ; seules les
+    pages sans texte passent par l'OCR, réparties sur un pool de processus.
+    """
+
+    def __init__(self, config=None):
+        pdf_config = (config or {}).get('pdf') or {}
+        self.tesseract_config = TESSERACT_CONFIG
+        self.languages = pdf_config.get('languages', ['fra'])  # Par exemple ['fra', 'eng']
+        self.engine = pdf_config.get('engine', 'pymupdf')
+        self._engine_checked = False
+        self.ocr_enabled = pdf_config.get('ocr', True)
+        self.ocr_dpi = pdf_config.get('ocr_dpi', 300)
+        self.ocr_workers = pdf_config.get('ocr_workers', 2)
+        self._ocr_pool = None
+        self._pool_lock = threading.Lock()
+
+    @staticmethod
+    def _open_source(pdf_content):
+        """Accepte un chemin de fichier (téléchargement en flux) ou le contenu binaire"""
+        if isinstance(pdf_content, (str, os.PathLike)):
+            return pdf_content
+        return io.BytesIO(pdf_content)
+
+    def _get_ocr_pool(self):
+        with self._pool_lock:
+            if self._ocr_pool is None and self.ocr_workers:
+                # "spawn" : les processus OCR ne héritent pas des threads du crawler
+                self._ocr_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.ocr_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._ocr_pool
+
+    def _check_engine(self):
+        """Au premier PDF : repli sur pdfplumber si PyMuPDF n'est pas installé"""
+        if not self._engine_checked:
+            if self.engine == 'pymupdf' and _pymupdf() is None:
+                logging.warning("PyMuPDF indisponible, utilisation de pdfplumber")
+                self.engine = 'pdfplumber'
+            self._engine_checked = True
+
     def extract_text_from_pdf(self, pdf_content):
-        """Extrait le texte d'un PDF en utilisant pdfplumber et OCR si nécessaire"""
-        text = ""
+        """Extrait le texte d'un PDF : couche texte, puis OCR des seules pages vides"""
         try:
-            # Première tentative avec pdfplumber
-            with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            if not text.strip():
-                # Si pdfplumber ne trouve pas de texte, utiliser OCR avec pytesseract
-                logging.info("pdfplumber n'a pas pu extraire de texte, tentative avec OCR")
-                text = self.extract_text_via_ocr(pdf_content)
-            
-            return text
+            self._check_engine()
+            if self.engine == 'pymupdf':
+                page_texts = self._text_layer_pymupdf(pdf_content)
+            else:
+                page_texts = self._text_layer_pdfplumber(pdf_content)
+
+            missing = [index for index, page_text in enumerate(page_texts) if not page_text.strip()]
+            if missing and self.ocr_enabled:
+                logging.info(f"Pas de couche texte pour {len(missing)}/{len(page_texts)} pages, tentative avec OCR")
+                with METRICS.time('ocr'):
+                    ocr_texts = self._ocr_pages(pdf_content, missing)
+                METRICS.inc('ocr_pages', len(missing))
+                for index, ocr_text in zip(missing, ocr_texts):
+                    page_texts[index] = ocr_text
+
+            return ''.join(page_text + "\n" for page_text in page_texts if page_text)
         except Exception as e:
+            METRICS.error('pdf', type(e).__name__)
             logging.error(f"Erreur extraction PDF: {str(e)}")
             return ""
-    
+
+    def _text_layer_pymupdf(self, pdf_content):
+        with _open_pymupdf(pdf_content) as doc:
+            return [page.get_text().rstrip('\n') for page in doc]
+
+    def _text_layer_pdfplumber(self, pdf_content):
+        import pdfplumber
+        with pdfplumber.open(self._open_source(pdf_content)) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+
+    def _ocr_pages(self, pdf_content, page_indexes):
+        """OCR des pages données, en parallèle dans le pool de processus si configuré
+
+        Le thread appelant attend la fin de toutes les pages : l'OCR ne prend pas le GIL
+        des autres workers, mais occupe le créneau de celui qui traite le PDF.
+        """
+        lang = '+'.join(self.languages)
+        pool = self._get_ocr_pool()
+        if pool is None:
+            return [self._ocr_page_safe(pdf_content, index, lang) for index in page_indexes]
+
+        futures = [
+            pool.submit(ocr_page, pdf_content, index, self.ocr_dpi, self.tesseract_config, lang)
+            for index in page_indexes
+        ]
+        texts = []
+        for index, future in zip(page_indexes, futures):
+            try:
+                texts.append(future.result())
+            except Exception as e:
+                METRICS.error('ocr', type(e).__name__)
+                logging.error(f"Erreur extraction OCR page {index + 1}: {str(e)}")
+                texts.append("")
+        return texts
+
+    def _ocr_page_safe(self, pdf_content, page_index, lang):
+        try:
+            logging.info(f"Extraction OCR pour la page {page_index + 1}")
+            return ocr_page(pdf_content, page_index, self.ocr_dpi, self.tesseract_config, lang, use_cache=False)
+        except Exception as e:
+            METRICS.error('ocr', type(e).__name__)
+            logging.error(f"Erreur extraction OCR page {page_index + 1}: {str(e)}")
+            return ""
+
     def extract_text_via_ocr(self, pdf_content):
-        """Extrait le texte d'un PDF en utilisant OCR (Tesseract)"""
-        text = ""
+        """Extrait le texte de toutes les pages d'un PDF en utilisant OCR (Tesseract)"""
         try:
-            with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
-                for page_number, page in enumerate(pdf.pages, start=1):
-                    if not page.extract_text():
-                        logging.info(f"Extraction OCR pour la page {page_number}")
-                        # Extraire l'image complète de la page
-                        pil_image = page.to_image(resolution=300).original
-                        
-                        # Utiliser pytesseract pour extraire le texte de l'image
-                        ocr_text = pytesseract.image_to_string(
-                            pil_image,
-                            config=self.tesseract_config,
-                            lang='+'.join(self.languages)
-                        )
-                        text += ocr_text + "\n"
-            return text
+            self._check_engine()
+            if self.engine == 'pymupdf':
+                with _open_pymupdf(pdf_content) as doc:
+                    page_count = doc.page_count
+            else:
+                import pdfplumber
+                with pdfplumber.open(self._open_source(pdf_content)) as pdf:
+                    page_count = len(pdf.pages)
+            texts = self._ocr_pages(pdf_content, list(range(page_count)))
+            return ''.join(text + "\n" for text in texts)
         except Exception as e:
             logging.error(f"Erreur extraction OCR PDF: {str(e)}")
             return ""
+
+    def close(self):
+        with self._pool_lock:
+            if self._ocr_pool is not None:
+                self._ocr_pool.shutdown(wait=True)
+                self._ocr_pool = None
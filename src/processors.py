@@ -4,14 +4,49 @@ import string
 import hashlib
 import unicodedata
 import os
+import re
 from urllib.parse import urlparse
 import logging
 
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Découpage d'une URL absolue (RFC 3986, annexe B) : schéma, autorité, chemin, requête ; fragment ignoré
+URL_PATTERN = re.compile(r'^([A-Za-z][A-Za-z0-9+.-]*)://([^/?#]*)([^?#]*)(?:\?([^#]*))?')
+
+# Paramètres de suivi retirés des URLs (un « * » final désigne un préfixe)
+TRACKING_PARAMS = [
+    'utm_*', 'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'igshid', 'ref_src', 'hsa_*', 'pk_*', 'mtm_*',
+]
+
+
 class URLProcessor:
-    """Classe gérant le traitement des URLs"""
+    """Classe gérant le traitement des URLs
+
+    process_link canonicalise et filtre une URL en une seule analyse : schéma et hôte en
+    minuscules, port par défaut, fragment et segments « . » / « .. » retirés, paramètres
+    de suivi supprimés. Les motifs exclus sont réunis en une seule expression compilée,
+    les extensions en un seul tuple, et l'hôte doit être domain.name ou l'un de ses
+    sous-domaines.
+    """
     
     def __init__(self, config):
         self.config = config
+        url_config = config.get('urls') or {}
+        excluded = config.get('excluded') or {}
+        self.domain = config['domain']['name'].lower()
+        self.domain_suffix = f".{self.domain}"
+        self.allow_subdomains = url_config.get('allow_subdomains', True)
+        self.keep_query = url_config.get('keep_query', False)
+        self.max_url_length = config['files']['max_url_length']
+        patterns = [pattern.lower() for pattern in excluded.get('patterns') or []]
+        self.excluded_regex = re.compile('|'.join(map(re.escape, patterns))) if patterns else None
+        self.excluded_extensions = tuple(ext.lower() for ext in excluded.get('extensions') or [])
+        strip_params = url_config.get('strip_params')
+        strip_params = TRACKING_PARAMS if strip_params is None else strip_params
+        self.strip_exact = frozenset(name.lower() for name in strip_params if not name.endswith('*'))
+        self.strip_prefixes = tuple(name[:-1].lower() for name in strip_params if name.endswith('*'))
+        self.host_cache = {}
     
     def sanitize_filename(self, url):
         try:
@@ -55,7 +90,104 @@ class URLProcessor:
             url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()[:8]
             return f"default_{url_hash}"
     
+    def host_allowed(self, host):
+        allowed = self.host_cache.get(host)
+        if allowed is None:
+            allowed = host == self.domain or (self.allow_subdomains and host.endswith(self.domain_suffix))
+            if len(self.host_cache) < 10000:
+                self.host_cache[host] = allowed
+        return allowed
+
+    @staticmethod
+    def normalize_path(path):
+        """Retire les segments « . » et « .. » (RFC 3986) ; un chemin vide devient « / »"""
+        if not path:
+            return '/'
+        if '/.' not in path:
+            return path
+        output = []
+        for segment in path.split('/')[1:]:
+            if segment == '..':
+                if output:
+                    output.pop()
+            elif segment != '.':
+                output.append(segment)
+        normalized = '/' + '/'.join(output)
+        if path.endswith(('/.', '/..')) and not normalized.endswith('/'):
+            normalized += '/'
+        return normalized
+
+    def clean_query(self, query):
+        """Retire les paramètres de suivi en conservant l'ordre et l'encodage des autres"""
+        kept = []
+        for pair in query.split('&'):
+            if not pair:
+                continue
+            name = pair.split('=', 1)[0].lower()
+            if name in self.strip_exact or (self.strip_prefixes and name.startswith(self.strip_prefixes)):
+                continue
+            kept.append(pair)
+        return kept
+
+    def canonicalize(self, url):
+        """Analyse unique de l'URL : retourne (url canonique, clé de déduplication, chemin) ou None
+
+        La clé omet la chaîne de requête, sauf si urls.keep_query est vrai (elle contient
+        alors les paramètres triés).
+        """
+        if not url or len(url) > self.max_url_length:
+            return None
+        match = URL_PATTERN.match(url.strip())
+        if match is None:
+            return None
+        scheme, authority, path, query = match.groups()
+        scheme = scheme.lower()
+        if scheme not in DEFAULT_PORTS:
+            return None
+        host = authority.rpartition('@')[2].lower()
+        port = None
+        if host.startswith('['):
+            # IPv6 : [::1]:8080
+            host, _, port = host.partition(']')
+            host += ']'
+            port = port[1:] or None
+        elif ':' in host:
+            host, _, port = host.partition(':')
+        if port is not None:
+            if port == '':
+                port = None
+            elif not port.isdigit():
+                return None
+            elif int(port) == DEFAULT_PORTS[scheme]:
+                port = None
+        if not host or not self.host_allowed(host.strip('[]')):
+            return None
+        netloc = f"{host}:{port}" if port else host
+        path = self.normalize_path(path)
+        base = f"{scheme}://{netloc}{path}"
+        if not query:
+            return base, base, path
+        params = self.clean_query(query)
+        canonical = f"{base}?{'&'.join(params)}" if params else base
+        key = f"{base}?{'&'.join(sorted(params))}" if self.keep_query and params else base
+        return canonical, key, path
+
+    def process_link(self, url):
+        """Canonicalise et filtre un lien ; retourne (url canonique, clé) ou None s'il est écarté"""
+        canonical = self.canonicalize(url)
+        if canonical is None:
+            return None
+        url, key, path = canonical
+        if self.excluded_extensions and path.lower().endswith(self.excluded_extensions):
+            return None
+        if self.excluded_regex is not None and self.excluded_regex.search(url.lower()):
+            return None
+        return url, key
+
     def normalize_url(self, url):
+        canonical = self.canonicalize(url)
+        if canonical is not None:
+            return canonical[1]
         try:
             parsed = urlparse(url)
             return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
@@ -64,37 +196,7 @@ class URLProcessor:
             return url
     
     def is_valid_url(self, url):
-        if not url or len(url) > self.config['files']['max_url_length']:
-            return False
-            
-        try:
-            parsed = urlparse(url)
-            return all([
-                parsed.scheme,
-                parsed.netloc,
-                parsed.scheme in ['http', 'https'],
-                self.config['domain']['name'] in parsed.netloc
-            ])
-        except Exception as e:
-            logging.error(f"Erreur lors de la validation de l'URL: {str(e)}")
-            return False
+        return self.canonicalize(url) is not None
     
     def should_process_url(self, url):
-        if not url:
-            return False
-            
-        try:
-            lower_url = url.lower()
-            
-            # Vérifie les patterns exclus
-            if any(pattern in lower_url for pattern in self.config['excluded']['patterns']):
-                return False
-                
-            # Vérifie les extensions exclues
-            if any(lower_url.endswith(ext) for ext in self.config['excluded']['extensions']):
-                return False
-                
-            return self.is_valid_url(url)
-        except Exception as e:
-            logging.error(f"Erreur lors de la vérification de l'URL: {str(e)}")
-            return False
+        return self.process_link(url) is not None
@@ -0,0 +1,100 @@
+# src/recrawl.py
+from src.constants import *
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+
+
+class RecrawlCache:
+    """Validateurs HTTP et empreintes de contenu conservés d'un crawl à l'autre
+
+    Pour chaque URL normalisée : ETag, Last-Modified, empreinte SHA-256 du corps, taille
+    et liens sortants (compressés). Au crawl suivant, les validateurs alimentent les
+    en-têtes If-None-Match / If-Modified-Since ; une réponse 304 ou un corps identique
+    évite l'extraction et la réécriture, et les liens mémorisés poursuivent le crawl.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, digest TEXT, "
+            "content_length INTEGER, links BLOB)"
+        )
+        self.not_modified = 0
+        self.unchanged = 0
+        self.bytes_saved = 0
+        self.pending_writes = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, digest, content_length, links FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, digest, content_length, links = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'digest': digest,
+            'content_length': content_length or 0,
+            'links': zlib.decompress(links).decode('utf-8').split('\n') if links else [],
+        }
+
+    def conditional_headers(self, key):
+        """En-têtes de requête conditionnelle pour une URL déjà vue lors d'un crawl précédent"""
+        entry = self.get(key)
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, key, metadata, links):
+        packed_links = zlib.compress('\n'.join(links).encode('utf-8')) if links else None
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, digest, content_length, links) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, metadata.get('etag'), metadata.get('last_modified'), metadata.get('digest'),
+                 metadata.get('content_length', 0), packed_links)
+            )
+            self.pending_writes += 1
+            if self.pending_writes >= 500:
+                self.conn.commit()
+                self.pending_writes = 0
+
+    def record_not_modified(self, entry):
+        with self.lock:
+            self.not_modified += 1
+            self.bytes_saved += entry['content_length'] if entry else 0
+
+    def record_unchanged(self):
+        with self.lock:
+            self.unchanged += 1
+
+    def log_stats(self):
+        logging.info(
+            f"Crawl incrémental: {self.not_modified} réponses 304, "
+            f"{self.bytes_saved / 1048576:.1f} Mo de téléchargement évités, "
+            f"{self.unchanged} contenus identiques (extraction et écriture évitées)"
+        )
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
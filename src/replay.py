@@ -0,0 +1,170 @@
+# src/replay.py
+from src.constants import *
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+from datetime import datetime
+from src.archive import read_response
+from src.extractors import ContentExtractor
+from src.output import create_output_writer
+from src.pdf_processor import PDFProcessor
+
+# Extracteurs construits une fois par processus de rejeu
+_worker_state = {'extractor': None, 'pdf_processor': None}
+
+
+def replay_job(parser, pdf_config, archive_dir, entries):
+    """Ré-extraction d'un lot d'entrées de l'index dans un processus du pool
+
+    Retourne, pour chaque entrée, (url, type, contenu) au format attendu par l'écrivain de sortie.
+    """
+    if _worker_state['extractor'] is None:
+        _worker_state['extractor'] = ContentExtractor(parser)
+        # L'OCR reste dans ce processus : le parallélisme est déjà celui du pool de rejeu
+        _worker_state['pdf_processor'] = PDFProcessor({'pdf': dict(pdf_config, ocr_workers=0)})
+    results = []
+    for url, kind, final_url, shard, offset, path in entries:
+        try:
+            body, _ = read_response(os.path.join(archive_dir, shard), offset)
+        except (OSError, ValueError) as e:
+            logging.error(f"Réponse archivée illisible {url}: {str(e)}")
+            results.append((url, None, None))
+            continue
+        if kind == 'html':
+            text, _ = _worker_state['extractor'].parse_html(body, final_url or url)
+            results.append((url, 'html', text))
+        elif kind == 'pdf':
+            text = _worker_state['pdf_processor'].extract_text_from_pdf(body)
+            results.append((url, 'pdf', (text, path)))
+        else:
+            results.append((url, None, None))
+    return results
+
+
+class Replayer:
+    """Ré-extraction hors ligne (--replay) des réponses de l'archive (src/archive.py)
+
+    Les entrées de l'index sont lues par lots de replay.batch_size et confiées à
+    replay.workers processus (par défaut un par CPU) qui relisent chaque corps à son
+    décalage dans les partitions WARC et y appliquent ContentExtractor et PDFProcessor.
+    Les textes sont écrits par l'écrivain de sortie habituel (section output). Aucune
+    requête réseau n'est émise.
+    """
+
+    def __init__(self, config, output_dir, url_processor):
+        replay_config = config.get('replay') or {}
+        self.config = config
+        self.output_dir = output_dir
+        self.archive_dir = os.path.join(output_dir, 'archive')
+        self.workers = replay_config.get('workers') or os.cpu_count() or 1
+        self.batch_size = replay_config.get('batch_size', 64)
+        self.kinds = tuple(replay_config.get('kinds') or ('html', 'pdf'))
+        self.parser = (config.get('extraction') or {}).get('parser', 'html.parser')
+        self.pdf_config = config.get('pdf') or {}
+        self.stats_interval = config['crawler'].get('stats_interval', 10)
+        self.url_processor = url_processor
+        self.replayed = 0
+        self.failed = 0
+
+    def open_index(self):
+        index_path = os.path.join(self.archive_dir, 'index.sqlite3')
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"Aucune archive à rejouer: {index_path} (activer archive.enabled pendant le crawl)")
+        return sqlite3.connect(index_path)
+
+    def batches(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self):
+        conn = self.open_index()
+        placeholders = ', '.join('?' for _ in self.kinds)
+        total = conn.execute(f"SELECT COUNT(*) FROM records WHERE kind IN ({placeholders})", self.kinds).fetchone()[0]
+        # Ordre des partitions : chaque processus relit des zones voisines du disque
+        rows = conn.execute(
+            f"SELECT url, kind, final_url, shard, offset, path, status, content_type, digest, fetched_at "
+            f"FROM records WHERE kind IN ({placeholders}) ORDER BY shard, offset",
+            self.kinds
+        )
+        logging.info(f"Rejeu de {total} réponses archivées sur {self.workers} processus")
+        output = create_output_writer(self.config, self.output_dir, self.url_processor)
+        started = last_log = time.monotonic()
+        batches = self.batches(rows)
+        pending = {}
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                while True:
+                    # Fenêtre bornée de lots en cours : la mémoire ne dépend pas de la taille de l'archive
+                    while len(pending) < self.workers * 2:
+                        batch = next(batches, None)
+                        if batch is None:
+                            break
+                        entries = [row[:6] for row in batch]
+                        pending[executor.submit(replay_job, self.parser, self.pdf_config, self.archive_dir, entries)] = batch
+                    if not pending:
+                        break
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        self.collect(output, pending.pop(future), future)
+                    now = time.monotonic()
+                    if now - last_log >= self.stats_interval:
+                        self.log_progress(total, now - started)
+                        last_log = now
+        finally:
+            output.close()
+            conn.close()
+        self.log_progress(total, time.monotonic() - started)
+
+    def collect(self, output, batch, future):
+        try:
+            results = future.result()
+        except Exception as e:
+            logging.error(f"Erreur de rejeu d'un lot de {len(batch)} réponses: {str(e)}")
+            self.failed += len(batch)
+            return
+        for (url, content_type, content), row in zip(results, batch):
+            if content_type is None:
+                self.failed += 1
+                continue
+            _, _, final_url, _, _, path, status, stored_type, digest, fetched_at = row
+            output.submit({
+                'url': url,
+                'content_type': content_type,
+                'content': content,
+                'timestamp': self.format_timestamp(fetched_at),
+                'metadata': {
+                    'status_code': status,
+                    'final_url': final_url,
+                    'content_type': stored_type,
+                    'digest': digest,
+                    'replayed': True,
+                },
+                'raw': None,
+            })
+            self.replayed += 1
+
+    @staticmethod
+    def format_timestamp(fetched_at):
+        """Date de téléchargement (format WARC) au format des enregistrements de sortie"""
+        try:
+            return datetime.strptime(fetched_at, '%Y-%m-%dT%H:%M:%SZ').strftime("%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def log_progress(self, total, elapsed):
+        rate = self.replayed / elapsed if elapsed else 0.0
+        logging.info(
+            f"Rejeu: {self.replayed}/{total} réponses ré-extraites ({rate:.1f}/s), {self.failed} échecs"
+        )
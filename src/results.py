@@ -0,0 +1,17 @@
+# src/results.py
+
+
+class CrawlResult:
+    """Résultat du traitement d'une URL, issu d'une seule requête et d'une seule analyse"""
+
+    def __init__(self, content_type, url, content, links=None, metadata=None, raw=None):
+        self.content_type = content_type
+        self.url = url
+        self.content = content
+        self.links = links or []
+        self.metadata = metadata or {}
+        self.raw = raw  # Corps HTML brut, conservé seulement si la sortie l'archive (WARC)
+
+    def __repr__(self):
+        return f"CrawlResult({self.content_type!r}, {self.url!r}, links={len(self.links)})"
+
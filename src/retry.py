@@ -0,0 +1,186 @@
+# src/retry.py
+from src.constants import *
+import heapq
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from src.metrics import METRICS
+
+
+class TransientFetchError(Exception):
+    """Échec temporaire d'une requête (réseau, délai dépassé, statut 429/5xx) : l'URL sera réessayée"""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Délai en secondes d'un en-tête Retry-After (nombre de secondes ou date HTTP), ou None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryScheduler:
+    """Politique unique de nouvelles tentatives, sans attente sur les workers
+
+    Une URL en échec temporaire est programmée avec une échéance (backoff exponentiel
+    avec gigue, ou Retry-After pour les réponses 429/503) puis remise en tête de
+    frontière lorsqu'elle arrive à échéance. Après retry.circuit_failures échecs
+    consécutifs, un hôte est suspendu pendant retry.circuit_cooldown secondes via
+    l'ordonnanceur de politesse ; un succès referme le circuit.
+
+    Mesures exportées (src/metrics.py) : retries par cause (statut HTTP ou network),
+    retries_exhausted, backoff_seconds (délais programmés), circuit_open et circuit_close
+    par hôte.
+    """
+
+    def __init__(self, config, host_scheduler):
+        retry_config = config.get('retry') or {}
+        self.host_scheduler = host_scheduler
+        # Nombre total de tentatives par URL, y compris la première
+        self.max_attempts = retry_config.get('max_retries') or config['timeouts']['max_retries']
+        self.backoff_base = retry_config.get('backoff_base', 1.0)
+        self.backoff_max = retry_config.get('backoff_max', 60.0)
+        self.retry_statuses = set(retry_config.get('retry_statuses', [408, 429, 500, 502, 503, 504]))
+        self.max_retry_after = retry_config.get('max_retry_after', 300.0)
+        self.circuit_failures = retry_config.get('circuit_failures', 5)
+        self.circuit_cooldown = retry_config.get('circuit_cooldown', 60.0)
+
+        self.heap = []  # (échéance, ordre, url, instant de l'échec)
+        self.sequence = 0
+        self.attempts = {}  # url -> échecs temporaires déjà subis
+        self.host_failures = {}  # hôte -> échecs consécutifs
+        self.open_until = {}  # hôte -> fin de la pause du circuit ouvert
+
+        self.retries_scheduled = 0
+        self.retries_exhausted = 0
+        self.retry_after_honoured = 0
+        self.backoff_seconds = 0.0
+        self.circuit_opens = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
+
+    def is_retryable_status(self, status):
+        return status in self.retry_statuses
+
+    def backoff_delay(self, attempt):
+        """Backoff exponentiel plafonné, avec gigue complète pour désynchroniser les workers"""
+        delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+        return random.uniform(delay / 2, delay)
+
+    def schedule(self, url, error):
+        """Programme une nouvelle tentative ; retourne False si le budget de l'URL est épuisé"""
+        host = self.host_scheduler.host_of(url)
+        now = time.monotonic()
+        self._record_host_failure(host, now)
+
+        attempt = self.attempts.get(url, 0) + 1
+        if attempt >= self.max_attempts:
+            self.attempts.pop(url, None)
+            self.retries_exhausted += 1
+            METRICS.inc('retries_exhausted')
+            logging.error(f"Max retries atteints pour {url}: {str(error)}")
+            return False
+        self.attempts[url] = attempt
+
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            delay = min(retry_after, self.max_retry_after)
+            self.retry_after_honoured += 1
+            # Le serveur demande de ralentir : tout l'hôte est concerné, pas seulement cette URL
+            self.host_scheduler.defer(host, now + delay)
+        else:
+            delay = self.backoff_delay(attempt)
+        heapq.heappush(self.heap, (now + delay, self.sequence, url, now))
+        self.sequence += 1
+        self.retries_scheduled += 1
+        status = getattr(error, 'status', None)
+        METRICS.inc('retries', reason=str(status) if status is not None else 'network')
+        METRICS.inc('backoff_seconds', delay)
+        logging.warning(
+            f"Nouvel essai de {url} dans {delay:.1f}s ({attempt}/{self.max_attempts - 1}): {str(error)}"
+        )
+        return True
+
+    def _record_host_failure(self, host, now):
+        failures = self.host_failures.get(host, 0) + 1
+        self.host_failures[host] = failures
+        if failures >= self.circuit_failures and now >= self.open_until.get(host, 0):
+            # Ouverture, ou échec de la requête d'essai après la pause (demi-ouvert)
+            self.circuit_opens += 1
+            METRICS.inc('circuit_open', host=host)
+            self.open_until[host] = now + self.circuit_cooldown
+            self.host_scheduler.defer(host, self.open_until[host])
+            logging.warning(
+                f"Circuit ouvert pour {host}: {failures} échecs consécutifs, pause de {self.circuit_cooldown:.0f}s"
+            )
+
+    def record_success(self, url):
+        self.attempts.pop(url, None)
+        host = self.host_scheduler.host_of(url)
+        if self.host_failures.pop(host, 0) >= self.circuit_failures:
+            self.open_until.pop(host, None)
+            METRICS.inc('circuit_close', host=host)
+            logging.info(f"Circuit refermé pour {host}")
+
+    def forget(self, url):
+        """Échec définitif (404, type non supporté...) : l'URL ne sera pas réessayée"""
+        self.attempts.pop(url, None)
+
+    def pop_due(self, now=None):
+        """URLs dont l'échéance est atteinte, dans l'ordre des échéances"""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, _, url, failed_at = heapq.heappop(self.heap)
+            self.backoff_seconds += now - failed_at
+            due.append(url)
+        return due
+
+    def time_until_due(self, now=None):
+        if not self.heap:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(self.heap[0][0] - now, 0)
+
+    def drain(self):
+        """Retire toutes les URLs en attente (arrêt du crawl) pour les remettre en file"""
+        urls = [url for _, _, url, _ in sorted(self.heap)]
+        self.heap.clear()
+        return urls
+
+    def stats(self):
+        return {
+            'pending': len(self.heap),
+            'retries_scheduled': self.retries_scheduled,
+            'retries_exhausted': self.retries_exhausted,
+            'retry_after_honoured': self.retry_after_honoured,
+            'backoff_seconds': round(self.backoff_seconds, 3),
+            'circuit_opens': self.circuit_opens,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logging.info(
+            f"Nouvelles tentatives: {stats['retries_scheduled']} programmées, {stats['pending']} en attente, "
+            f"{stats['retries_exhausted']} abandons, Retry-After respecté: {stats['retry_after_honoured']}, "
+            f"temps en backoff: {stats['backoff_seconds']:.1f}s, circuits ouverts: {stats['circuit_opens']}"
+        )
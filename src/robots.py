@@ -0,0 +1,205 @@
+# src/robots.py
+from src.constants import *
+import logging
+import re
+import threading
+from urllib.parse import urlparse, unquote
+
+
+class RobotsRules:
+    """Règles robots.txt (RFC 9309) applicables à un User-Agent
+
+    Les chemins acceptent les jokers « * » et « $ » ; la règle la plus longue qui
+    correspond l'emporte, Allow l'emportant à longueur égale.
+    """
+
+    def __init__(self, rules=None, crawl_delay=None, sitemaps=None):
+        # (longueur du motif, autorisation, expression compilée), triées par longueur décroissante
+        self.rules = sorted(rules or [], key=lambda rule: (rule[0], rule[1]), reverse=True)
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+
+    @classmethod
+    def allow_all(cls):
+        return cls()
+
+    @classmethod
+    def disallow_all(cls):
+        return cls([(1, False, re.compile('/'))])
+
+    @staticmethod
+    def compile_pattern(path):
+        pattern = re.escape(unquote(path)).replace(r'\*', '.*')
+        if pattern.endswith(r'\$'):
+            pattern = pattern[:-2] + '$'
+        return re.compile(pattern)
+
+    @staticmethod
+    def product_token(user_agent):
+        """Jeton produit d'un User-Agent, en minuscules : « MyBot/1.0 (+https://...) » -> « mybot »"""
+        parts = user_agent.strip().split(None, 1)
+        return parts[0].split('/', 1)[0].lower() if parts else ''
+
+    @classmethod
+    def parse(cls, text, user_agent):
+        """Retient les groupes dont la ligne User-agent est le jeton produit de user_agent, sinon les groupes « * »
+
+        La comparaison ignore la casse (RFC 9309) ; les règles de plusieurs groupes
+        correspondants sont réunies.
+        """
+        agent = cls.product_token(user_agent)
+        groups = []  # [agents, règles, crawl-delay]
+        sitemaps = []
+        current = None
+        last_was_agent = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, value = (part.strip() for part in line.split(':', 1))
+            field = field.lower()
+            if field == 'sitemap':
+                sitemaps.append(value)
+                continue
+            if field == 'user-agent':
+                if current is None or not last_was_agent:
+                    current = [[], [], None]
+                    groups.append(current)
+                current[0].append(value.lower())
+                last_was_agent = True
+                continue
+            last_was_agent = False
+            if current is None:
+                continue
+            if field in ('allow', 'disallow'):
+                if value:
+                    current[1].append((len(value), field == 'allow', cls.compile_pattern(value)))
+            elif field == 'crawl-delay':
+                try:
+                    current[2] = float(value)
+                except ValueError:
+                    pass
+
+        matching = [group for group in groups if agent and agent in {cls.product_token(token) for token in group[0]}]
+        if not matching:
+            matching = [group for group in groups if '*' in group[0]]
+        if not matching:
+            return cls(sitemaps=sitemaps)
+        rules = [rule for group in matching for rule in group[1]]
+        delays = [group[2] for group in matching if group[2] is not None]
+        return cls(rules, delays[0] if delays else None, sitemaps)
+
+    def allowed(self, path):
+        for _, allow, regex in self.rules:
+            if regex.match(path):
+                return allow
+        return True
+
+
+class RobotsCache:
+    """robots.txt de chaque hôte, récupéré une fois et conservé pour la durée du crawl
+
+    Une réponse 4xx autorise tout ; une erreur réseau ou 5xx interdit tout l'hôte
+    (RFC 9309), sauf si robots.unreachable vaut "allow". Hors de l'amorçage, le
+    robots.txt d'un nouvel hôte n'est pas récupéré par la boucle d'ordonnancement :
+    allowed() répond None, le crawler lance la requête (start_fetch, puis load ou le
+    client asyncio) et garde les URLs de l'hôte en file jusqu'à son arrivée.
+    """
+
+    def __init__(self, config, session):
+        robots_config = config.get('robots') or {}
+        self.session = session
+        self.user_agent = robots_config.get('user_agent') or (config.get('transport') or {}).get('user_agent') or '*'
+        self.max_crawl_delay = robots_config.get('max_crawl_delay', 30)
+        self.unreachable = robots_config.get('unreachable', 'disallow')
+        self.timeouts = (config['timeouts']['connect'], config['timeouts']['read'])
+        self.lock = threading.Lock()
+        self.rules = {}
+        self.pending = set()  # hôtes dont le robots.txt est en cours de récupération
+        self.disallowed = 0
+
+    @staticmethod
+    def robots_url(url):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+    def rules_for(self, url):
+        """Règles de l'hôte, récupérées si besoin de façon bloquante (amorçage du crawl)"""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            rules = self.rules.get(host)
+        if rules is None:
+            rules = self.fetch(self.robots_url(url))
+            self.store(host, rules)
+        return rules
+
+    def start_fetch(self, url):
+        """URL du robots.txt à récupérer pour l'hôte de url, ou None s'il est connu ou déjà demandé"""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host in self.rules or host in self.pending:
+                return None
+            self.pending.add(host)
+        return self.robots_url(url)
+
+    def load(self, robots_url):
+        """Récupère et enregistre le robots.txt demandé par start_fetch (thread de récupération)"""
+        self.store(urlparse(robots_url).netloc.lower(), self.fetch(robots_url))
+
+    def store(self, host, rules):
+        with self.lock:
+            self.rules[host] = rules
+            self.pending.discard(host)
+
+    def fetch(self, robots_url):
+        try:
+            response = self.session.get(robots_url, timeout=self.timeouts, verify=False)
+        except Exception as e:
+            return self.unreachable_rules(robots_url, str(e))
+        return self.response_rules(robots_url, response.status_code, response.text)
+
+    def unreachable_rules(self, robots_url, reason):
+        logging.warning(f"robots.txt inaccessible ({robots_url}): {reason}")
+        return RobotsRules.allow_all() if self.unreachable == 'allow' else RobotsRules.disallow_all()
+
+    def response_rules(self, robots_url, status, text):
+        """Règles tirées d'une réponse HTTP au robots.txt (client requests ou aiohttp)"""
+        if status >= 500:
+            return self.unreachable_rules(robots_url, f"HTTP {status}")
+        if status >= 400:
+            logging.info(f"Pas de robots.txt ({robots_url}): tout est autorisé")
+            return RobotsRules.allow_all()
+        rules = RobotsRules.parse(text, self.user_agent)
+        logging.info(
+            f"robots.txt chargé ({robots_url}): {len(rules.rules)} règles, "
+            f"Crawl-delay: {rules.crawl_delay}, {len(rules.sitemaps)} sitemaps"
+        )
+        return rules
+
+    def allowed(self, url):
+        """True ou False selon le robots.txt de l'hôte ; None s'il n'est pas encore chargé (aucune requête)"""
+        parsed = urlparse(url)
+        rules = self.rules.get(parsed.netloc.lower())
+        if rules is None:
+            return None
+        path = unquote(parsed.path) or '/'
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        if rules.allowed(path):
+            return True
+        with self.lock:
+            self.disallowed += 1
+        return False
+
+    def crawl_delay(self, host):
+        """Crawl-delay de l'hôte (plafonné à robots.max_crawl_delay), sans déclencher de requête"""
+        rules = self.rules.get(host)
+        if rules is None or rules.crawl_delay is None:
+            return None
+        return min(rules.crawl_delay, self.max_crawl_delay)
+
+    def sitemaps(self, url):
+        return self.rules_for(url).sitemaps
+
+    def log_stats(self):
+        logging.info(f"robots.txt: {len(self.rules)} hôtes, {self.disallowed} URLs interdites écartées")
@@ -0,0 +1,219 @@
+# src/scheduler.py
+from src.constants import *
+import logging
+import random
+import time
+from urllib.parse import urlparse
+
+
+class AdaptiveConcurrency:
+    """Limite de requêtes simultanées par hôte ajustée en AIMD (augmentation additive,
+    diminution multiplicative)
+
+    Tant que la latence reste proche de la meilleure latence observée pour l'hôte, la
+    limite augmente de increase_step après chaque « tour » (autant de réponses que la
+    limite courante). Une réponse 429/503, un échec temporaire ou une latence lissée
+    dépassant latency_factor fois la référence la multiplie par decrease_factor ; les
+    signaux des requêtes lancées avant la dernière baisse (plus de requêtes en vol que la
+    nouvelle limite) sont ignorés, comme une seule baisse par aller-retour en TCP. La
+    limite reste entre min_per_host et max_per_host.
+    """
+
+    SMOOTHING = 0.2  # Poids d'une nouvelle mesure dans la moyenne mobile de latence
+    BASELINE_DRIFT = 0.01  # Remontée lente de la référence si l'hôte devient durablement plus lent
+
+    def __init__(self, config, ceiling):
+        adaptive_config = config['crawler'].get('adaptive') or {}
+        self.min_per_host = adaptive_config.get('min_per_host', 1)
+        self.max_per_host = max(adaptive_config.get('max_per_host') or ceiling, self.min_per_host)
+        self.initial_per_host = adaptive_config.get('initial_per_host', self.min_per_host)
+        self.increase_step = adaptive_config.get('increase_step', 1)
+        self.decrease_factor = adaptive_config.get('decrease_factor', 0.5)
+        self.latency_factor = adaptive_config.get('latency_factor', 2.0)
+        self.latency_min_delta = adaptive_config.get('latency_min_delta', 0.05)
+        self.hosts = {}
+        self.increases = 0
+        self.decreases = 0
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            initial = min(max(self.initial_per_host, self.min_per_host), self.max_per_host)
+            state = {'limit': float(initial), 'ewma': None, 'baseline': None, 'acked': 0}
+            self.hosts[host] = state
+        return state
+
+    def limit(self, host):
+        return max(int(self._state(host)['limit']), self.min_per_host)
+
+    def record_success(self, host, latency=None, in_flight=0):
+        state = self._state(host)
+        if latency is not None:
+            state['ewma'] = latency if state['ewma'] is None else (
+                self.SMOOTHING * latency + (1 - self.SMOOTHING) * state['ewma']
+            )
+            if state['baseline'] is None or state['ewma'] < state['baseline']:
+                state['baseline'] = state['ewma']
+            else:
+                state['baseline'] += (state['ewma'] - state['baseline']) * self.BASELINE_DRIFT
+            if (state['ewma'] > self.latency_factor * state['baseline']
+                    and state['ewma'] - state['baseline'] > self.latency_min_delta):
+                reason = f"latence {state['ewma'] * 1000:.0f} ms, référence {state['baseline'] * 1000:.0f} ms"
+                self._decrease(host, state, reason, in_flight)
+                return
+        state['acked'] += 1
+        if state['acked'] >= int(state['limit']) and state['limit'] < self.max_per_host:
+            old = int(state['limit'])
+            state['limit'] = min(state['limit'] + self.increase_step, self.max_per_host)
+            state['acked'] = 0
+            self.increases += 1
+            latency_info = f"latence {state['ewma'] * 1000:.0f} ms" if state['ewma'] is not None else "sans mesure"
+            logging.info(f"Concurrence {host}: {old} -> {int(state['limit'])} ({latency_info})")
+
+    def record_failure(self, host, status=None, in_flight=0):
+        reason = f"HTTP {status}" if status else "échec temporaire"
+        self._decrease(host, self._state(host), reason, in_flight)
+
+    def _decrease(self, host, state, reason, in_flight):
+        if in_flight >= int(state['limit']):
+            # Requête de la rafale précédant la dernière baisse : déjà prise en compte
+            return
+        old = int(state['limit'])
+        state['limit'] = max(state['limit'] * self.decrease_factor, self.min_per_host)
+        state['acked'] = 0
+        self.decreases += 1
+        logging.info(f"Concurrence {host}: {old} -> {int(state['limit'])} ({reason})")
+
+    def log_stats(self):
+        limits = ', '.join(
+            f"{host}={self.limit(host)}" for host in sorted(self.hosts, key=self.limit, reverse=True)[:10]
+        )
+        logging.info(
+            f"Concurrence adaptative: {self.increases} hausses, {self.decreases} baisses - limites finales: {limits}"
+        )
+
+
+class HostScheduler:
+    """Applique le délai de politesse et la limite de requêtes simultanées par hôte
+
+    La limite est fixe (crawler.max_per_host) ou, si crawler.adaptive.enabled est vrai,
+    ajustée par hôte par AdaptiveConcurrency à partir de la latence et des erreurs. Le
+    Crawl-delay du robots.txt de l'hôte, s'il est plus long, remplace le délai de politesse.
+    Pour un worker d'un crawl distribué partitionné par URL, le Crawl-delay est multiplié
+    par le nombre de workers, qui servent tous le même hôte.
+    """
+
+    def __init__(self, config, robots=None):
+        crawler_config = config['crawler']
+        self.delay_min = crawler_config['delay_min']
+        self.delay_max = crawler_config['delay_max']
+        self.max_per_host = crawler_config.get('max_per_host', crawler_config['max_workers'])
+        self.adaptive = None
+        if (crawler_config.get('adaptive') or {}).get('enabled'):
+            self.adaptive = AdaptiveConcurrency(config, self.max_per_host)
+            self.max_per_host = self.adaptive.max_per_host
+        self.robots = robots
+        distributed_config = config.get('distributed') or {}
+        self.crawl_delay_factor = 1
+        if distributed_config.get('worker_count') and distributed_config.get('partition', 'url') == 'url':
+            self.crawl_delay_factor = distributed_config['worker_count']
+        self.next_allowed = {}
+        self.in_flight = {}
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(url).netloc.lower()
+
+    def limit_for(self, host):
+        if self.adaptive is not None:
+            return self.adaptive.limit(host)
+        return self.max_per_host
+
+    def is_ready(self, host, now=None):
+        now = time.monotonic() if now is None else now
+        return (self.in_flight.get(host, 0) < self.limit_for(host)
+                and self.next_allowed.get(host, 0) <= now)
+
+    def acquire(self, host):
+        """Réserve un créneau pour l'hôte et programme le prochain départ autorisé"""
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        # Le délai est réparti entre les créneaux de l'hôte : à plein régime, on conserve
+        # le débit moyen de « limite » requêtes par intervalle delay_min..delay_max
+        delay = random.uniform(self.delay_min, self.delay_max) / max(self.limit_for(host), 1)
+        crawl_delay = self.robots.crawl_delay(host) if self.robots is not None else None
+        if crawl_delay:
+            # Crawl-delay : intervalle minimal entre deux requêtes, quelle que soit la concurrence
+            delay = max(delay, crawl_delay * self.crawl_delay_factor)
+        self.next_allowed[host] = time.monotonic() + delay
+
+    def release(self, host):
+        self.in_flight[host] = max(self.in_flight.get(host, 0) - 1, 0)
+
+    def record_success(self, host, latency=None):
+        """Signal d'une réponse reçue, à appeler après release()"""
+        if self.adaptive is not None:
+            self.adaptive.record_success(host, latency, self.in_flight.get(host, 0))
+
+    def record_failure(self, host, status=None):
+        """Signal d'un échec temporaire (429/5xx, réseau), à appeler après release()"""
+        if self.adaptive is not None:
+            self.adaptive.record_failure(host, status, self.in_flight.get(host, 0))
+
+    def defer(self, host, until):
+        """Aucune requête vers l'hôte avant l'instant donné (Retry-After, circuit ouvert)"""
+        self.next_allowed[host] = max(self.next_allowed.get(host, 0), until)
+
+    def time_until_ready(self, hosts):
+        """Temps d'attente avant qu'un des hôtes donnés puisse recevoir une requête"""
+        now = time.monotonic()
+        waits = [
+            max(self.next_allowed.get(host, 0) - now, 0)
+            for host in hosts
+            if self.in_flight.get(host, 0) < self.limit_for(host)
+        ]
+        return min(waits) if waits else None
+
+
+class ThroughputMonitor:
+    """Mesure le débit (pages/s) et l'utilisation des workers, et les journalise périodiquement"""
+
+    def __init__(self, max_workers, interval=10):
+        self.max_workers = max_workers
+        self.interval = interval
+        self.start_time = time.monotonic()
+        self.total_completed = 0
+        self._reset_window(self.start_time)
+
+    def _reset_window(self, now):
+        self.window_start = now
+        self.window_completed = 0
+        self.busy_time = 0.0
+        self.last_sample = now
+
+    def sample(self, in_flight):
+        """Intègre le nombre de requêtes en cours depuis le dernier échantillon"""
+        now = time.monotonic()
+        self.busy_time += in_flight * (now - self.last_sample)
+        self.last_sample = now
+
+    def record_completed(self, count=1):
+        self.window_completed += count
+        self.total_completed += count
+
+    def maybe_log(self, queue_size, in_flight, parse_pending=0):
+        """Journalise le débit si l'intervalle est écoulé ; retourne True si une ligne a été émise"""
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed < self.interval:
+            return False
+        self.sample(in_flight)
+        pages_per_sec = self.window_completed / elapsed
+        utilisation = self.busy_time / (elapsed * self.max_workers) if self.max_workers else 0
+        overall = self.total_completed / max(now - self.start_time, 1e-9)
+        logging.info(
+            f"Débit: {pages_per_sec:.2f} pages/s (moyenne {overall:.2f}) - "
+            f"utilisation workers: {utilisation:.0%} - file: {queue_size} - "
+            f"téléchargements en cours: {in_flight} - analyses en attente: {parse_pending}"
+        )
+        self._reset_window(now)
+        return True
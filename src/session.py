@@ -1,40 +1,42 @@
 # src/session.py
 from src.constants import *
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-from fake_useragent import UserAgent
+from src.transport import SafeTransport, TransportStats
 import requests
 import logging
 
 class SafeSession:
-    """Classe gérant les sessions HTTP de manière sécurisée"""
-    
+    """Classe gérant les sessions HTTP de manière sécurisée
+
+    La couche réseau (taille des pools, compression, cache DNS, HTTP/2) est configurée par
+    la section transport (src/transport.py) ; ses compteurs sont exposés dans
+    session.transport_stats.
+    """
+
     @staticmethod
     def create(config):
         try:
             session = requests.Session()
-            retry_strategy = Retry(
-                total=config['timeouts']['max_retries'],
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-                allowed_methods=["HEAD", "GET", "OPTIONS"],
-                raise_on_status=False  # Modifier pour ne pas lever d'exception sur certains statuts
-            )
-            
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            session.mount("http://", adapter)
-            session.mount("https://", adapter)
-            
+            transport = SafeTransport(config)
+            session.transport_stats = TransportStats()
+
+            user_agent = transport.user_agent
+            if not user_agent:
+                # fake_useragent (et ses données) n'est chargé que sans transport.user_agent
+                from fake_useragent import UserAgent
+                user_agent = UserAgent().random
+
             session.headers.update({
-                'User-Agent': UserAgent().random,
+                'User-Agent': user_agent,
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.5',
                 'Connection': 'keep-alive',
             })
-            
+            transport.mount(session, session.transport_stats)
+            session.transport = transport
+
             # Désactive la vérification SSL
             session.verify = False
-            
+
             return session
         except Exception as e:
             logging.error(f"Erreur lors de la création de la session: {str(e)}")
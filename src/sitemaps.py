@@ -0,0 +1,142 @@
+# src/sitemaps.py
+from src.constants import *
+import gzip
+import heapq
+import io
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+# En-tête d'un flux gzip : un corps qui le porte encore n'a pas été décodé par urllib3
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_lastmod(value):
+    """Date W3C d'un <lastmod> (2024-05-01, 2024-05-01T10:00:00+00:00...) en datetime UTC, ou None"""
+    if not value:
+        return None
+    value = value.strip().replace('Z', '+00:00')
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value[:10], '%Y-%m-%d')
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class SitemapReader:
+    """Lecture en flux des sitemaps et index de sitemaps, compressés ou non
+
+    Chaque fichier est analysé au fil du téléchargement (iterparse) et ses éléments sont
+    libérés aussitôt lus. Les URLs d'un fichier passent par un tas borné de
+    sitemaps.sort_window entrées : elles sont rendues de la plus récemment modifiée à la
+    plus ancienne au sein de cette fenêtre (dans tout le fichier s'il est plus petit),
+    et la mémoire dépend de la fenêtre, pas de la taille du sitemap.
+    """
+
+    def __init__(self, config, session):
+        sitemaps_config = config.get('sitemaps') or {}
+        self.session = session
+        self.extra_urls = sitemaps_config.get('urls') or []
+        self.max_sitemaps = sitemaps_config.get('max_sitemaps', 1000)
+        self.max_urls = sitemaps_config.get('max_urls', 1000000)
+        self.sort_window = max(sitemaps_config.get('sort_window', 10000), 1)
+        self.lastmod_after = parse_lastmod(sitemaps_config.get('lastmod_after'))
+        self.timeouts = (config['timeouts']['connect'], config['timeouts']['read'])
+        self.sitemaps_read = 0
+        self.urls_read = 0
+        self.urls_too_old = 0
+
+    @staticmethod
+    def default_sitemap(start_url):
+        parsed = urlparse(start_url)
+        return f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"
+
+    def read(self, sitemap_urls):
+        """Génère les (url, lastmod) de tous les sitemaps, en suivant les index"""
+        pending = list(dict.fromkeys(list(sitemap_urls) + self.extra_urls))
+        visited = set()
+        while pending and self.sitemaps_read < self.max_sitemaps:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            for loc, lastmod in self._most_recent_first(self._urls(sitemap_url, pending)):
+                if self.urls_read >= self.max_urls:
+                    return
+                self.urls_read += 1
+                yield loc, lastmod
+
+    def _urls(self, sitemap_url, pending):
+        """(url, lastmod) d'un fichier ; les sitemaps d'un index sont ajoutés à pending"""
+        for kind, loc, lastmod in self._stream(sitemap_url):
+            if kind == 'sitemap':
+                pending.append(loc)
+                continue
+            if self.lastmod_after is not None and lastmod is not None and lastmod < self.lastmod_after:
+                self.urls_too_old += 1
+                continue
+            yield loc, lastmod
+
+    def _most_recent_first(self, entries):
+        """Réordonne les entrées dans un tas de sort_window éléments : les plus récentes d'abord, sans date à la fin"""
+        heap = []
+        for sequence, (loc, lastmod) in enumerate(entries):
+            key = -lastmod.timestamp() if lastmod is not None else float('inf')
+            heapq.heappush(heap, (key, sequence, loc, lastmod))
+            if len(heap) > self.sort_window:
+                _, _, loc, lastmod = heapq.heappop(heap)
+                yield loc, lastmod
+        while heap:
+            _, _, loc, lastmod = heapq.heappop(heap)
+            yield loc, lastmod
+
+    def _stream(self, sitemap_url):
+        try:
+            response = self.session.get(sitemap_url, timeout=self.timeouts, verify=False, stream=True)
+        except Exception as e:
+            logging.warning(f"Sitemap inaccessible ({sitemap_url}): {str(e)}")
+            return
+        try:
+            if response.status_code != 200:
+                logging.info(f"Sitemap ignoré ({sitemap_url}): HTTP {response.status_code}")
+                return
+            self.sitemaps_read += 1
+            response.raw.decode_content = True
+            # Lu par io.BufferedReader : le corps ne doit pas se fermer de lui-même en fin de lecture
+            response.raw.auto_close = False
+            source = io.BufferedReader(response.raw)
+            if source.peek(2)[:2] == GZIP_MAGIC:
+                # Fichier .xml.gz servi tel quel : un Content-Encoding gzip a déjà été décodé par urllib3
+                source = gzip.GzipFile(fileobj=source)
+            count = 0
+            for _, element in ET.iterparse(source, events=('end',)):
+                tag = element.tag.rsplit('}', 1)[-1]
+                if tag in ('url', 'sitemap'):
+                    loc, lastmod = None, None
+                    for child in element:
+                        child_tag = child.tag.rsplit('}', 1)[-1]
+                        if child_tag == 'loc' and child.text:
+                            loc = child.text.strip()
+                        elif child_tag == 'lastmod':
+                            lastmod = parse_lastmod(child.text)
+                    element.clear()
+                    if loc:
+                        count += 1
+                        yield tag, loc, lastmod
+            logging.info(f"Sitemap lu ({sitemap_url}): {count} entrées")
+        except (ET.ParseError, OSError, EOFError) as e:
+            logging.warning(f"Sitemap invalide ({sitemap_url}): {str(e)}")
+        finally:
+            response.close()
+
+    def log_stats(self):
+        logging.info(
+            f"Sitemaps: {self.sitemaps_read} fichiers lus, {self.urls_read} URLs, "
+            f"{self.urls_too_old} URLs antérieures à sitemaps.lastmod_after"
+        )
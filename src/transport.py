@@ -0,0 +1,416 @@
+# src/transport.py
+from src.constants import *
+import importlib.util
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+from urllib3.util.request import ACCEPT_ENCODING
+from src.metrics import METRICS
+
+
+# Encodages que urllib3 sait décoder ici : gzip et deflate, br et zstd selon les paquets installés
+SUPPORTED_ENCODINGS = ACCEPT_ENCODING
+
+
+class TransportStats:
+    """Compteurs de la couche de transport, partagés par tous les workers
+
+    Le taux de réutilisation compare les connexions ouvertes aux requêtes envoyées ; les
+    octets « réseau » sont ceux du corps avant décompression, les octets décodés ceux
+    transmis au crawler.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.http2_responses = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def record_http2(self):
+        with self.lock:
+            self.http2_responses += 1
+
+    def record_body(self, wire_bytes, decoded_bytes):
+        with self.lock:
+            self.wire_bytes += wire_bytes
+            self.decoded_bytes += decoded_bytes
+        METRICS.inc('wire_bytes', wire_bytes)
+        METRICS.inc('decoded_bytes', decoded_bytes)
+
+    def stats(self):
+        with self.lock:
+            reuse = 1 - self.connections / self.requests if self.requests else 0.0
+            saving = 1 - self.wire_bytes / self.decoded_bytes if self.decoded_bytes else 0.0
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'reuse_ratio': max(reuse, 0.0),
+                'http2_responses': self.http2_responses,
+                'wire_bytes': self.wire_bytes,
+                'decoded_bytes': self.decoded_bytes,
+                'compression_saving': saving,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        logging.info(
+            f"Transport: {stats['requests']} requêtes, {stats['connections']} connexions ouvertes "
+            f"(réutilisation {stats['reuse_ratio']:.0%}, HTTP/2: {stats['http2_responses']}) - "
+            f"corps reçus: {stats['wire_bytes'] / 1048576:.2f} Mo sur le réseau pour "
+            f"{stats['decoded_bytes'] / 1048576:.2f} Mo décodés (économie {stats['compression_saving']:.0%})"
+        )
+
+
+class DNSCache:
+    """Cache local des résolutions DNS avec une durée de vie fixe et une taille bornée
+
+    Utilisé par les connexions du TransportAdapter (CountingHTTPConnection et
+    CountingHTTPSConnection) pour ouvrir leurs sockets : socket.getaddrinfo n'est pas
+    remplacé pour le reste du processus. Seules les résolutions réussies sont conservées ;
+    au-delà de max_size entrées, la moins récemment utilisée est évincée.
+    """
+
+    def __init__(self, ttl, max_size=1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with METRICS.time('dns'):
+            result = socket.getaddrinfo(host, port, family, type, proto, flags)
+        with self.lock:
+            self.entries[key] = (now + self.ttl, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return result
+
+    def create_connection(self, address, timeout, source_address=None, socket_options=None):
+        """urllib3.util.connection.create_connection, résolution faite par le cache"""
+        host, port = address
+        if host.startswith('['):
+            host = host.strip('[]')
+        err = None
+        for af, socktype, proto, _, sa in self.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM):
+            sock = None
+            try:
+                sock = socket.socket(af, socktype, proto)
+                for option in socket_options or ():
+                    sock.setsockopt(*option)
+                if timeout is not _DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sa)
+                return sock
+            except OSError as e:
+                err = e
+                if sock is not None:
+                    sock.close()
+        if err is not None:
+            raise err
+        raise OSError("getaddrinfo n'a renvoyé aucune adresse")
+
+    def new_conn(self, conn):
+        """HTTPConnection._new_conn de urllib3 (mêmes exceptions), avec résolution par le cache"""
+        try:
+            return self.create_connection(
+                (conn._dns_host, conn.port), conn.timeout,
+                source_address=conn.source_address, socket_options=conn.socket_options,
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(conn.host, conn, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                conn, f"Connection to {conn.host} timed out. (connect timeout={conn.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(conn, f"Failed to establish a new connection: {e}") from e
+
+
+class CountingHTTPConnection(HTTPConnection):
+    """Compte chaque ouverture de socket, y compris la reconnexion d'une connexion fermée par le serveur"""
+    transport_stats = None
+    dns_cache = None
+
+    def _new_conn(self):
+        if self.transport_stats is not None:
+            self.transport_stats.record_connection()
+        with METRICS.time('connect'):
+            if self.dns_cache is not None:
+                return self.dns_cache.new_conn(self)
+            return super()._new_conn()
+
+
+class CountingHTTPSConnection(HTTPSConnection):
+    transport_stats = None
+    dns_cache = None
+
+    def _new_conn(self):
+        if self.transport_stats is not None:
+            self.transport_stats.record_connection()
+        started = time.perf_counter()
+        try:
+            if self.dns_cache is not None:
+                return self.dns_cache.new_conn(self)
+            return super()._new_conn()
+        finally:
+            self._tcp_time = time.perf_counter() - started
+            METRICS.observe('connect', self._tcp_time)
+
+    def connect(self):
+        # connect() ouvre le socket (_new_conn) puis négocie TLS : la différence est la poignée de main
+        self._tcp_time = 0.0
+        started = time.perf_counter()
+        super().connect()
+        METRICS.observe('tls', time.perf_counter() - started - self._tcp_time)
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+    transport_stats = None
+    dns_cache = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.transport_stats = self.transport_stats
+        conn.dns_cache = self.dns_cache
+        return conn
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+    transport_stats = None
+    dns_cache = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.transport_stats = self.transport_stats
+        conn.dns_cache = self.dns_cache
+        return conn
+
+
+class CountingPoolManager(PoolManager):
+    """PoolManager dont les pools comptent les connexions ouvertes et résolvent par le cache DNS"""
+
+    def __init__(self, transport_stats, *args, dns_cache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transport_stats = transport_stats
+        self.dns_cache = dns_cache
+        self.pool_classes_by_scheme = {'http': CountingHTTPConnectionPool, 'https': CountingHTTPSConnectionPool}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.transport_stats = self.transport_stats
+        pool.dns_cache = self.dns_cache
+        return pool
+
+
+class TransportAdapter(HTTPAdapter):
+    """HTTPAdapter instrumenté : requêtes, connexions ouvertes et octets réseau / décodés"""
+
+    def __init__(self, transport_stats, dns_cache=None, **kwargs):
+        self.transport_stats = transport_stats
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = CountingPoolManager(
+            self.transport_stats, num_pools=connections, maxsize=maxsize, block=block,
+            dns_cache=self.dns_cache, **pool_kwargs
+        )
+
+    def send(self, request, **kwargs):
+        self.transport_stats.record_request()
+        return super().send(request, **kwargs)
+
+    def build_response(self, req, resp):
+        response = super().build_response(req, resp)
+        self._meter_body(resp)
+        return response
+
+    def _meter_body(self, raw):
+        """Compte les octets du corps au fil de la lecture (Response.iter_content lit raw.stream)"""
+        stats = self.transport_stats
+        stream = raw.stream
+
+        def metered_stream(amt=2 ** 16, decode_content=None):
+            decoded = 0
+            try:
+                for chunk in stream(amt, decode_content=decode_content):
+                    decoded += len(chunk)
+                    yield chunk
+            finally:
+                # tell() : octets lus sur la connexion, avant décompression
+                stats.record_body(raw.tell(), decoded)
+
+        raw.stream = metered_stream
+
+
+class _HTTPXBody:
+    """Corps d'une réponse httpx présenté comme le « raw » urllib3 attendu par requests"""
+
+    def __init__(self, response, transport_stats, transport_error):
+        self.response = response
+        self.transport_stats = transport_stats
+        self.transport_error = transport_error  # httpx.TransportError
+
+    def stream(self, amt=2 ** 16, decode_content=True):
+        decoded = 0
+        try:
+            for chunk in self.response.iter_bytes(chunk_size=amt):
+                decoded += len(chunk)
+                yield chunk
+        except self.transport_error as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        finally:
+            self.transport_stats.record_body(self.response.num_bytes_downloaded, decoded)
+
+    def read(self, amt=None, decode_content=True):
+        return b''.join(self.stream(amt or 2 ** 16))
+
+    def close(self):
+        self.response.close()
+
+    def release_conn(self):
+        self.response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Adaptateur requests s'appuyant sur httpx pour négocier HTTP/2 (ALPN) sur HTTPS
+
+    Les redirections restent gérées par requests ; les cookies de réponse ne sont pas
+    repris dans la session.
+    """
+
+    def __init__(self, transport_stats, max_connections, max_keepalive):
+        super().__init__()
+        # httpx n'est importé que si transport.http2 est activé
+        import httpx
+        self.httpx = httpx
+        self.transport_stats = transport_stats
+        self.client = httpx.Client(
+            http2=True,
+            verify=False,
+            follow_redirects=False,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        )
+
+    def _trace(self, event_name, info):
+        if event_name == 'connection.connect_tcp.complete':
+            self.transport_stats.record_connection()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        self.transport_stats.record_request()
+        httpx_request = self.client.build_request(
+            request.method,
+            request.url,
+            headers=list(request.headers.items()),
+            content=request.body,
+            timeout=self.httpx.Timeout(read_timeout, connect=connect_timeout),
+            extensions={'trace': self._trace},
+        )
+        try:
+            httpx_response = self.client.send(httpx_request, stream=True)
+        except self.httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except self.httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        if httpx_response.http_version == 'HTTP/2':
+            self.transport_stats.record_http2()
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = httpx_response.reason_phrase
+        response.url = str(httpx_response.url)
+        response.raw = _HTTPXBody(httpx_response, self.transport_stats, self.httpx.TransportError)
+        response.request = request
+        response.connection = self
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+class SafeTransport:
+    """Configuration de la couche réseau (section transport) pour les deux moteurs"""
+
+    def __init__(self, config):
+        transport_config = config.get('transport') or {}
+        crawler_config = config['crawler']
+        workers = max(crawler_config['max_workers'], crawler_config.get('max_per_host') or 0)
+        self.pool_connections = transport_config.get('pool_connections', 10)
+        # Au moins une connexion conservée par worker : sinon urllib3 jette des connexions et renégocie TLS
+        self.pool_maxsize = transport_config.get('pool_maxsize') or workers
+        self.pool_block = transport_config.get('pool_block', False)
+        self.compression = transport_config.get('compression', True)
+        self.dns_cache_ttl = transport_config.get('dns_cache_ttl', 300)
+        self.dns_cache_size = transport_config.get('dns_cache_size', 1024)
+        # Un cache par configuration, partagé par les sessions montées avec ce transport
+        self.dns_cache = DNSCache(self.dns_cache_ttl, self.dns_cache_size) if self.dns_cache_ttl else None
+        self.http2 = transport_config.get('http2', False)
+        self.keepalive_timeout = transport_config.get('keepalive_timeout', 30)
+        self.user_agent = transport_config.get('user_agent')
+        if self.http2 and importlib.util.find_spec('httpx') is None:
+            logging.warning("HTTP/2 demandé mais httpx n'est pas installé (pip install httpx[http2]), HTTP/1.1 utilisé")
+            self.http2 = False
+
+    def mount(self, session, transport_stats):
+        adapter = TransportAdapter(
+            transport_stats,
+            dns_cache=self.dns_cache,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            # Pas de nouvelles tentatives au niveau urllib3 : elles sont gérées par le
+            # RetryScheduler du crawler, sans bloquer les workers (src/retry.py)
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        if self.http2:
+            session.mount("https://", HTTP2Adapter(transport_stats, self.pool_maxsize * self.pool_connections, self.pool_maxsize))
+        else:
+            session.mount("https://", adapter)
+        session.headers['Accept-Encoding'] = SUPPORTED_ENCODINGS if self.compression else 'identity'
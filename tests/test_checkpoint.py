@@ -0,0 +1,121 @@
+# tests/test_checkpoint.py
+from src.checkpoint import CrawlJournal
+from src.frontier import Frontier
+from src.processors import URLProcessor
+
+
+def make_processor():
+    return URLProcessor({'domain': {'name': 'example.com'}, 'files': {'max_url_length': 2000}})
+
+
+def write_journal(path, text):
+    path.write_text(text, encoding='utf-8')
+    return CrawlJournal(str(path))
+
+
+def test_replay_reads_events_in_order(tmp_path):
+    journal = write_journal(tmp_path / 'journal.log', (
+        "E\t0\thttps://example.com/\n"
+        "E\t1\thttps://example.com/a\n"
+        "C\thttps://example.com/\n"
+        "D\thttps://example.com/b\n"
+        "E\t2\thttps://example.com/c\n"
+    ))
+    completed, done, enqueued = journal.replay()
+    assert completed == {'https://example.com/'}
+    assert done == {'https://example.com/b'}
+    assert enqueued == [('https://example.com/', 0), ('https://example.com/a', 1), ('https://example.com/c', 2)]
+    assert journal.events_since_compaction == 5
+
+
+def test_replay_ignores_truncated_final_line(tmp_path):
+    """Dernière ligne écrite à moitié lors d'un arrêt brutal : ignorée, les précédentes sont conservées"""
+    journal = write_journal(tmp_path / 'journal.log', (
+        "E\t0\thttps://example.com/\n"
+        "C\thttps://example.com/\n"
+        "E\t1\thttps://example.com/tronq"
+    ))
+    completed, done, enqueued = journal.replay()
+    assert completed == {'https://example.com/'}
+    assert enqueued == [('https://example.com/', 0)]
+
+
+def test_replay_reads_journals_without_depths(tmp_path):
+    """Journal d'une version antérieure (E<TAB>url) : profondeur 0"""
+    journal = write_journal(tmp_path / 'journal.log', (
+        "E\thttps://example.com/\n"
+        "E\thttps://example.com/a\n"
+        "C\thttps://example.com/\n"
+    ))
+    completed, _, enqueued = journal.replay()
+    assert completed == {'https://example.com/'}
+    assert enqueued == [('https://example.com/', 0), ('https://example.com/a', 0)]
+
+
+def test_compact_keeps_only_live_state_and_appends_afterwards(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'journal.log'))
+    journal.open(reset=True)
+    for i in range(10):
+        journal.record_enqueue(f"https://example.com/{i}", 1)
+        journal.record_complete(f"https://example.com/{i}")
+    journal.flush()
+
+    journal.compact(['https://example.com/0'], ['https://example.com/1'], [('https://example.com/q', 3)])
+    assert journal.events_since_compaction == 0
+    journal.record_enqueue('https://example.com/after', 4)
+    journal.close()
+
+    completed, done, enqueued = CrawlJournal(str(tmp_path / 'journal.log')).replay()
+    assert completed == {'https://example.com/0'}
+    assert done == {'https://example.com/1'}
+    assert enqueued == [('https://example.com/q', 3), ('https://example.com/after', 4)]
+    assert not (tmp_path / 'journal.log.tmp').exists()
+
+
+def test_needs_compaction_at_twice_the_live_state():
+    journal = CrawlJournal('unused', compact_min_events=10)
+    journal.events_since_compaction = 15
+    assert not journal.needs_compaction(8)
+    assert journal.needs_compaction(7)
+    journal.events_since_compaction = 9
+    assert not journal.needs_compaction(0)
+
+
+def test_frontier_resume_requeues_urls_in_flight(tmp_path):
+    """Reprise : les URLs traitées ne reviennent pas, celles en vol et en file sont remises en file"""
+    path = str(tmp_path / 'journal.log')
+    journal = CrawlJournal(path)
+    journal.open(reset=True)
+    frontier = Frontier(make_processor(), journal=journal)
+    for url in ('https://example.com/', 'https://example.com/a', 'https://example.com/b'):
+        frontier.push(url, 1)
+    frontier.mark_completed(frontier.pop())
+    assert frontier.pop() == 'https://example.com/a'
+    frontier.checkpoint()
+    journal.close()
+
+    resumed = Frontier(make_processor(), journal=CrawlJournal(path))
+    resumed.restore_from_journal()
+    assert list(resumed.queued_urls()) == ['https://example.com/a', 'https://example.com/b']
+    assert resumed.completed_count() == 1
+    assert not resumed.push('https://example.com/')
+
+
+def test_frontier_resume_after_compaction(tmp_path):
+    path = str(tmp_path / 'journal.log')
+    journal = CrawlJournal(path)
+    journal.open(reset=True)
+    frontier = Frontier(make_processor(), journal=journal)
+    for url in ('https://example.com/', 'https://example.com/a', 'https://example.com/b'):
+        frontier.push(url, 2)
+    frontier.mark_completed(frontier.pop())
+    frontier.mark_failed(frontier.pop())
+    frontier.checkpoint(force=True)
+    journal.close()
+
+    resumed = Frontier(make_processor(), journal=CrawlJournal(path))
+    resumed.restore_from_journal()
+    assert list(resumed.queued_urls()) == ['https://example.com/b']
+    assert resumed.completed_count() == 1
+    # URL abandonnée : connue, elle n'est pas remise en file
+    assert not resumed.push('https://example.com/a')
@@ -0,0 +1,98 @@
+# tests/test_dedup.py
+import random
+
+from src.dedup import Deduplicator, NearDuplicateIndex, hamming_distance, simhash
+
+WORDS = [f"mot{i}" for i in range(500)]
+
+
+def make_text(seed, length=200):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def make_dedup(tmp_path, **dedup):
+    return Deduplicator({'dedup': dedup}, str(tmp_path))
+
+
+def test_register_reports_exact_duplicates_when_content_addressed(tmp_path):
+    dedup = make_dedup(tmp_path, content_addressed=True)
+    assert dedup.register('https://example.com/a', 'd1', 'blobs/d1.pdf', 100) is None
+    assert dedup.register('https://example.com/b', 'd1', 'blobs/d1.pdf', 100) == 'https://example.com/a'
+    assert dedup.register('https://example.com/c', 'd2', 'blobs/d2.pdf', 50) is None
+    # Reprise : même URL, même contenu, même réponse qu'au premier enregistrement
+    assert dedup.register('https://example.com/b', 'd1', 'blobs/d1.pdf', 100) == 'https://example.com/a'
+    assert dedup.register('https://example.com/a', 'd1', 'blobs/d1.pdf', 100) is None
+    assert dedup.duplicates == 1
+    assert dedup.bytes_saved == 100
+    assert dedup.register('https://example.com/d', None) is None
+    dedup.close()
+
+
+def test_register_without_content_addressing_reports_nothing(tmp_path):
+    dedup = make_dedup(tmp_path)
+    assert dedup.register('https://example.com/a', 'd1') is None
+    assert dedup.register('https://example.com/b', 'd1') is None
+    assert dedup.duplicates == 0
+    dedup.close()
+
+
+def test_manifest_survives_reopen(tmp_path):
+    dedup = make_dedup(tmp_path, content_addressed=True)
+    dedup.register('https://example.com/a', 'd1', 'blobs/d1.pdf', 100)
+    dedup.close()
+
+    reopened = make_dedup(tmp_path, content_addressed=True)
+    assert reopened.register('https://example.com/b', 'd1', 'blobs/d1.pdf', 100) == 'https://example.com/a'
+    reopened.close()
+
+
+def test_store_file_writes_each_content_once(tmp_path):
+    dedup = make_dedup(tmp_path, content_addressed=True)
+    first, second = tmp_path / 'a.tmp', tmp_path / 'b.tmp'
+    first.write_bytes(b'contenu')
+    second.write_bytes(b'contenu')
+    path = dedup.store_file(str(first), 'ab12', '.pdf')
+    assert path == str(tmp_path / 'blobs' / 'ab' / 'ab12.pdf')
+    assert dedup.store_file(str(second), 'ab12', '.pdf') == path
+    assert not first.exists() and not second.exists()
+    assert open(path, 'rb').read() == b'contenu'
+    dedup.close()
+
+
+def test_simhash_is_deterministic_and_close_for_close_texts():
+    text = make_text(1)
+    edited = text.replace(text.split()[100], 'remplacé', 1)
+    assert simhash(text) == simhash(text)
+    assert simhash(text)[1] == 200
+    assert hamming_distance(simhash(text)[0], simhash(edited)[0]) <= 3
+    assert hamming_distance(simhash(text)[0], simhash(make_text(2))[0]) > 3
+    assert simhash('') == (0, 0)
+
+
+def test_near_duplicate_index_finds_fingerprints_within_distance():
+    index = NearDuplicateIndex(max_distance=3)
+    index.add(0b1011 << 40, 'https://example.com/a')
+    assert index.find((0b1011 << 40) ^ 0b111) == 'https://example.com/a'
+    assert index.find((0b1011 << 40) ^ 0b1111) is None
+
+
+def test_near_duplicates_are_detected_and_reloaded(tmp_path):
+    text = make_text(1)
+    edited = text.replace(text.split()[100], 'remplacé', 1)
+    dedup = make_dedup(tmp_path, near_duplicates=True, min_words=20)
+    dedup.register('https://example.com/a', 'd1')
+    dedup.register('https://example.com/b', 'd2')
+    dedup.register('https://example.com/c', 'd3')
+    assert dedup.check_near_duplicate('https://example.com/a', text) is None
+    assert dedup.check_near_duplicate('https://example.com/b', edited) == 'https://example.com/a'
+    assert dedup.check_near_duplicate('https://example.com/c', make_text(2)) is None
+    # Trop court pour être comparé
+    assert dedup.check_near_duplicate('https://example.com/d', 'quelques mots seulement') is None
+    dedup.close()
+
+    reopened = make_dedup(tmp_path, near_duplicates=True, min_words=20)
+    # Les quasi-doublons ne sont pas réindexés : seules a et c reviennent
+    assert reopened.index.size == 2
+    assert reopened.check_near_duplicate('https://example.com/e', edited) == 'https://example.com/a'
+    reopened.close()
@@ -0,0 +1,55 @@
+# tests/test_frontier_store.py
+from src.frontier_store import SQLiteFrontierStore
+
+
+def open_store(tmp_path):
+    return SQLiteFrontierStore(str(tmp_path / 'frontier.sqlite3'))
+
+
+def test_url_in_flight_is_requeued_after_reopen(tmp_path):
+    """Une URL retirée mais ni traitée ni abandonnée revient en file après un arrêt"""
+    store = open_store(tmp_path)
+    store.add_discovered('https://example.com/a')
+    store.enqueue('https://example.com/a', 0, 1, 'https://example.com/a')
+    assert store.dequeue() == ('https://example.com/a', 0, 1)
+    assert store.queue_size() == 0
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.queue_size() == 1
+    assert store.dequeue() == ('https://example.com/a', 0, 1)
+    store.close()
+
+
+def test_completed_and_failed_urls_leave_the_queue(tmp_path):
+    store = open_store(tmp_path)
+    for key in ('https://example.com/a', 'https://example.com/b'):
+        store.add_discovered(key)
+        store.enqueue(key, 0, 0, key)
+    store.dequeue()
+    store.dequeue()
+    assert store.mark_completed('https://example.com/a')
+    store.mark_failed('https://example.com/b')
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.queue_size() == 0
+    assert store.is_completed('https://example.com/a')
+    assert store.is_discovered('https://example.com/b')
+    store.close()
+
+
+def test_requeue_puts_leased_url_back_at_head(tmp_path):
+    store = open_store(tmp_path)
+    for key in ('https://example.com/a', 'https://example.com/b'):
+        store.add_discovered(key)
+        store.enqueue(key, 0, 0, key)
+    url, priority, depth = store.dequeue()
+    store.requeue([(url, priority, depth)])
+    assert store.queue_size() == 2
+    assert store.peek(2) == ['https://example.com/a', 'https://example.com/b']
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.queue_size() == 2
+    store.close()
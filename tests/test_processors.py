@@ -0,0 +1,70 @@
+# tests/test_processors.py
+from src.processors import URLProcessor
+
+
+def make_processor(**urls):
+    return URLProcessor({'domain': {'name': 'example.com'}, 'files': {'max_url_length': 2000}, 'urls': urls})
+
+
+def test_canonicalize_normalizes_scheme_host_port_path_and_fragment():
+    assert make_processor().canonicalize('HTTPS://Example.COM:443/a/./b/../c#section') == (
+        'https://example.com/a/c', 'https://example.com/a/c', '/a/c'
+    )
+    assert make_processor().canonicalize('http://example.com') == (
+        'http://example.com/', 'http://example.com/', '/'
+    )
+    assert make_processor().canonicalize('http://example.com:8080/x')[0] == 'http://example.com:8080/x'
+
+
+def test_tracking_params_are_stripped():
+    canonical, key, _ = make_processor().canonicalize(
+        'https://example.com/p?utm_source=news&id=3&fbclid=abc&utm_medium=mail&page=2&gclid=x'
+    )
+    assert canonical == 'https://example.com/p?id=3&page=2'
+    # Sans urls.keep_query, la clé de déduplication omet la requête
+    assert key == 'https://example.com/p'
+
+
+def test_only_tracking_params_leave_no_query():
+    assert make_processor().canonicalize('https://example.com/p?utm_campaign=x&_ga=1')[0] == 'https://example.com/p'
+
+
+def test_strip_params_can_be_overridden():
+    processor = make_processor(strip_params=['sessionid', 'ref_*'])
+    canonical, _, _ = processor.canonicalize('https://example.com/p?utm_source=x&SessionId=1&ref_a=2&id=3')
+    assert canonical == 'https://example.com/p?utm_source=x&id=3'
+
+
+def test_keep_query_puts_sorted_params_in_the_key():
+    canonical, key, _ = make_processor(keep_query=True).canonicalize('https://example.com/p?b=2&a=1&utm_source=x')
+    assert canonical == 'https://example.com/p?b=2&a=1'
+    assert key == 'https://example.com/p?a=1&b=2'
+    assert make_processor(keep_query=True).canonicalize('https://example.com/p?a=1&b=2')[1] == key
+
+
+def test_exact_host_and_subdomains_are_accepted():
+    processor = make_processor()
+    assert processor.canonicalize('https://example.com/') is not None
+    assert processor.canonicalize('https://www.example.com/') is not None
+    assert processor.canonicalize('https://user@docs.example.com/') is not None
+
+
+def test_lookalike_hosts_are_rejected():
+    processor = make_processor()
+    assert processor.canonicalize('https://badexample.com/') is None
+    assert processor.canonicalize('https://example.com.evil.org/') is None
+    assert processor.canonicalize('https://evil.org/?next=https://example.com/') is None
+
+
+def test_subdomains_can_be_disabled():
+    processor = make_processor(allow_subdomains=False)
+    assert processor.canonicalize('https://example.com/') is not None
+    assert processor.canonicalize('https://www.example.com/') is None
+
+
+def test_invalid_urls_are_rejected():
+    processor = make_processor()
+    assert processor.canonicalize('mailto:contact@example.com') is None
+    assert processor.canonicalize('ftp://example.com/file') is None
+    assert processor.canonicalize('https://example.com:abc/') is None
+    assert processor.canonicalize('https://example.com/' + 'a' * 2001) is None
@@ -0,0 +1,46 @@
+# tests/test_recrawl.py
+from src.recrawl import RecrawlCache
+
+METADATA = {
+    'etag': '"abc"',
+    'last_modified': 'Wed, 01 Oct 2025 10:00:00 GMT',
+    'digest': 'd1',
+    'content_length': 1234,
+}
+
+
+def test_update_then_get_returns_validators_and_links(tmp_path):
+    cache = RecrawlCache(str(tmp_path / 'recrawl.sqlite3'))
+    cache.update('https://example.com/', METADATA, ['https://example.com/a', 'https://example.com/b'])
+    assert cache.get('https://example.com/') == dict(METADATA, links=['https://example.com/a', 'https://example.com/b'])
+    cache.update('https://example.com/vide', {'digest': 'd2'}, [])
+    assert cache.get('https://example.com/vide') == {
+        'etag': None, 'last_modified': None, 'digest': 'd2', 'content_length': 0, 'links': []
+    }
+    assert cache.get('https://example.com/inconnue') is None
+    cache.close()
+
+
+def test_conditional_headers(tmp_path):
+    cache = RecrawlCache(str(tmp_path / 'recrawl.sqlite3'))
+    cache.update('https://example.com/', METADATA, [])
+    cache.update('https://example.com/etag', {'etag': 'W/"1"'}, [])
+    assert cache.conditional_headers('https://example.com/') == {
+        'If-None-Match': '"abc"', 'If-Modified-Since': 'Wed, 01 Oct 2025 10:00:00 GMT'
+    }
+    assert cache.conditional_headers('https://example.com/etag') == {'If-None-Match': 'W/"1"'}
+    assert cache.conditional_headers('https://example.com/inconnue') == {}
+    cache.close()
+
+
+def test_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / 'sous-dossier' / 'recrawl.sqlite3')
+    cache = RecrawlCache(path)
+    cache.update('https://example.com/', METADATA, ['https://example.com/a'])
+    cache.close()
+
+    reopened = RecrawlCache(path)
+    assert reopened.get('https://example.com/')['links'] == ['https://example.com/a']
+    reopened.record_not_modified(reopened.get('https://example.com/'))
+    assert reopened.bytes_saved == 1234
+    reopened.close()
@@ -0,0 +1,99 @@
+# tests/test_retry.py
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from src.retry import RetryScheduler, TransientFetchError, parse_retry_after
+from src.scheduler import HostScheduler
+
+
+def make_retry(**retry):
+    config = {
+        'crawler': {'delay_min': 0, 'delay_max': 0, 'max_workers': 4},
+        'timeouts': {'max_retries': 3},
+        'retry': retry,
+    }
+    host_scheduler = HostScheduler(config)
+    return RetryScheduler(config, host_scheduler), host_scheduler
+
+
+def test_backoff_doubles_with_jitter_and_is_capped():
+    retry, _ = make_retry(backoff_base=1.0, backoff_max=10.0)
+    for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 8.0), (5, 10.0), (9, 10.0)):
+        for _ in range(20):
+            assert ceiling / 2 <= retry.backoff_delay(attempt) <= ceiling
+
+
+def test_retry_budget_counts_the_first_attempt():
+    retry, _ = make_retry(backoff_base=0.01)
+    error = TransientFetchError('timeout')
+    assert retry.schedule('https://example.com/a', error)
+    assert retry.schedule('https://example.com/a', error)
+    assert not retry.schedule('https://example.com/a', error)
+    assert retry.retries_scheduled == 2
+    assert retry.retries_exhausted == 1
+    # Budget épuisé puis oublié : une nouvelle série d'échecs repart de zéro
+    assert retry.schedule('https://example.com/a', error)
+
+
+def test_retry_after_sets_the_due_time_and_defers_the_host():
+    retry, host_scheduler = make_retry(max_retry_after=100.0)
+    before = time.monotonic()
+    assert retry.schedule('https://example.com/a', TransientFetchError('HTTP 429', 429, retry_after=30.0))
+    assert 29.0 <= retry.time_until_due() <= 30.0
+    assert host_scheduler.next_allowed['example.com'] >= before + 30.0
+    assert retry.retry_after_honoured == 1
+
+    assert retry.schedule('https://example.com/b', TransientFetchError('HTTP 503', 503, retry_after=3600.0))
+    assert host_scheduler.next_allowed['example.com'] <= time.monotonic() + 100.0
+
+
+def test_pop_due_returns_urls_in_due_order():
+    retry, _ = make_retry()
+    retry.schedule('https://example.com/late', TransientFetchError('HTTP 429', 429, retry_after=20.0))
+    retry.schedule('https://example.com/early', TransientFetchError('HTTP 429', 429, retry_after=10.0))
+    now = time.monotonic()
+    assert retry.pop_due(now) == []
+    assert retry.pop_due(now + 15.0) == ['https://example.com/early']
+    assert retry.pop_due(now + 25.0) == ['https://example.com/late']
+    assert not retry
+
+
+def test_drain_returns_every_pending_url():
+    retry, _ = make_retry()
+    retry.schedule('https://example.com/a', TransientFetchError('HTTP 429', 429, retry_after=20.0))
+    retry.schedule('https://example.com/b', TransientFetchError('HTTP 429', 429, retry_after=10.0))
+    assert retry.drain() == ['https://example.com/b', 'https://example.com/a']
+    assert len(retry) == 0
+
+
+def test_circuit_opens_after_consecutive_failures_and_closes_on_success():
+    retry, host_scheduler = make_retry(circuit_failures=3, circuit_cooldown=60.0, backoff_base=0.01)
+    error = TransientFetchError('connexion refusée')
+    for i in range(2):
+        retry.schedule(f"https://example.com/{i}", error)
+    assert retry.circuit_opens == 0
+    # Sans Retry-After ni circuit ouvert, le backoff ne retarde que l'URL, pas l'hôte
+    assert host_scheduler.is_ready('example.com', time.monotonic() + 1.0)
+
+    retry.schedule('https://example.com/2', error)
+    assert retry.circuit_opens == 1
+    assert not host_scheduler.is_ready('example.com', time.monotonic() + 59.0)
+    # Pendant la pause, un nouvel échec ne rouvre pas le circuit
+    retry.schedule('https://example.com/3', error)
+    assert retry.circuit_opens == 1
+
+    retry.record_success('https://example.com/4')
+    assert 'example.com' not in retry.open_until
+    assert 'example.com' not in retry.host_failures
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(' 7 ') == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('bientôt') is None
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(minutes=5), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert 80.0 <= parse_retry_after(future) <= 90.0
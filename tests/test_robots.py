@@ -0,0 +1,85 @@
+# tests/test_robots.py
+from src.robots import RobotsRules
+
+ROBOTS = """
+User-agent: *
+Disallow: /private/
+Crawl-delay: 5
+
+User-agent: MyBot
+Disallow: /mybot-only/
+Crawl-delay: 2
+
+User-agent: MyBotExtra
+Disallow: /
+"""
+
+
+def test_wildcard_and_end_anchor():
+    rules = RobotsRules.parse("User-agent: *\nDisallow: /*.pdf$\nDisallow: /tmp*/cache\n", 'AnyBot')
+    assert not rules.allowed('/docs/rapport.pdf')
+    assert rules.allowed('/docs/rapport.pdf?page=2')
+    assert rules.allowed('/docs/rapport.pdfx')
+    assert not rules.allowed('/tmp-2024/cache/a')
+    assert rules.allowed('/tmp/other')
+
+
+def test_longest_match_wins_and_allow_wins_ties():
+    rules = RobotsRules.parse(
+        "User-agent: *\nDisallow: /docs/\nAllow: /docs/public/\nAllow: /page\nDisallow: /page\n", 'AnyBot'
+    )
+    assert not rules.allowed('/docs/internal')
+    assert rules.allowed('/docs/public/index.html')
+    assert rules.allowed('/page')
+    assert rules.allowed('/elsewhere')
+
+
+def test_empty_disallow_allows_everything():
+    rules = RobotsRules.parse("User-agent: *\nDisallow:\n", 'AnyBot')
+    assert rules.allowed('/anything')
+
+
+def test_product_token():
+    assert RobotsRules.product_token('MyBot/2.1 (+https://example.com/bot)') == 'mybot'
+    assert RobotsRules.product_token('  MyBot  ') == 'mybot'
+    assert RobotsRules.product_token('') == ''
+
+
+def test_group_matching_product_token_is_used():
+    """Le groupe MyBot s'applique à « MyBot/2.1 (...) », sans égard à la casse ; pas MyBotExtra"""
+    for user_agent in ('MyBot/2.1 (+https://example.com/bot)', 'mybot'):
+        rules = RobotsRules.parse(ROBOTS, user_agent)
+        assert not rules.allowed('/mybot-only/page')
+        assert rules.allowed('/private/page')
+        assert rules.allowed('/')
+        assert rules.crawl_delay == 2
+
+
+def test_other_agents_fall_back_to_star_group():
+    rules = RobotsRules.parse(ROBOTS, 'OtherBot/1.0')
+    assert not rules.allowed('/private/page')
+    assert rules.allowed('/mybot-only/page')
+    assert rules.crawl_delay == 5
+
+
+def test_matching_groups_are_merged():
+    rules = RobotsRules.parse(
+        "User-agent: mybot\nDisallow: /a/\n\nUser-agent: *\nDisallow: /b/\n\nUser-agent: MYBOT\nDisallow: /c/\n",
+        'MyBot/1.0'
+    )
+    assert not rules.allowed('/a/x')
+    assert not rules.allowed('/c/x')
+    assert rules.allowed('/b/x')
+
+
+def test_consecutive_user_agent_lines_share_a_group():
+    rules = RobotsRules.parse("User-agent: OtherBot\nUser-agent: MyBot\nDisallow: /shared/\n", 'MyBot')
+    assert not rules.allowed('/shared/x')
+
+
+def test_no_matching_group_allows_all_and_keeps_sitemaps():
+    rules = RobotsRules.parse(
+        "Sitemap: https://example.com/sitemap.xml\nUser-agent: OtherBot\nDisallow: /\n", 'MyBot'
+    )
+    assert rules.allowed('/anything')
+    assert rules.sitemaps == ['https://example.com/sitemap.xml']